@@ -0,0 +1,127 @@
+"""compress slide text
+
+Revision ID: c4e9a7d2f816
+Revises: b83f2c6d1e94
+Create Date: 2026-10-18 09:12:47.305118
+
+"""
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7d2f816'
+down_revision: Union[str, Sequence[str], None] = 'b83f2c6d1e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('content', 'speaker_notes', 'delivery_tutorial')
+BATCH_SIZE = 500
+
+# the storage format of src/database/compression.py as of this revision, kept
+# here so the migration doesn't change with the app code
+COMPRESSION_LEVEL = 6
+COMPRESSION_MIN_SIZE = 64
+RAW = b'\x00'
+ZLIB = b'\x01'
+ZLIB_DICTIONARY = b'\x02'
+DICTIONARY_DIR = Path(
+    os.getenv(
+        'COMPRESSION_DICTIONARY_DIR',
+        str(Path(__file__).parents[2] / 'src' / 'database' / 'dictionaries'),
+    )
+)
+
+
+def compress(text: str) -> bytes:
+    # values written later may use a dictionary, these don't need one
+    data = text.encode()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return RAW + data
+    return ZLIB + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress(value: bytes, dictionaries: Dict[int, bytes]) -> str:
+    kind, body = value[:1], value[1:]
+    if kind == RAW:
+        return body.decode()
+    if kind == ZLIB:
+        return zlib.decompress(body).decode()
+    if kind == ZLIB_DICTIONARY:
+        (key,) = struct.unpack('>I', body[:4])
+        if key not in dictionaries:
+            raise ValueError(f'Compression dictionary {key:08x} not found')
+        decompressor = zlib.decompressobj(zdict=dictionaries[key])
+        return (decompressor.decompress(body[4:]) + decompressor.flush()).decode()
+    raise ValueError(f'Unknown compression format {kind!r}')
+
+
+def read_dictionaries() -> Dict[int, bytes]:
+    dictionaries = {}
+    for path in DICTIONARY_DIR.glob('*.zdict'):
+        data = path.read_bytes()
+        dictionaries[zlib.crc32(data)] = data
+    return dictionaries
+
+
+def convert_columns(new_type: sa.types.TypeEngine, convert: Callable) -> None:
+    """Copy the slide text columns into columns of `new_type` through `convert`."""
+    for column in COLUMNS:
+        op.add_column('slides', sa.Column(f'{column}_new', new_type, nullable=True))
+
+    bind = op.get_bind()
+    slides = sa.table(
+        'slides',
+        sa.column('id', sa.Uuid()),
+        *(sa.column(column) for column in COLUMNS),
+        *(sa.column(f'{column}_new', new_type) for column in COLUMNS),
+    )
+    last_id = None
+    while True:
+        query = sa.select(slides.c.id, *(slides.c[column] for column in COLUMNS))
+        if last_id is not None:
+            query = query.where(slides.c.id > last_id)
+        rows = bind.execute(query.order_by(slides.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(
+                slides.update()
+                .where(slides.c.id == row.id)
+                .values(
+                    {
+                        f'{column}_new': convert(row._mapping[column])
+                        for column in COLUMNS
+                    }
+                )
+            )
+        last_id = rows[-1].id
+
+    for column in COLUMNS:
+        op.drop_column('slides', column)
+        op.alter_column('slides', f'{column}_new', new_column_name=column)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    convert_columns(
+        sa.LargeBinary(),
+        lambda value: None if value is None else compress(value),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dictionaries = read_dictionaries()
+    convert_columns(
+        sa.Text(),
+        lambda value: (
+            None if value is None else decompress(bytes(value), dictionaries)
+        ),
+    )
@@ -0,0 +1,79 @@
+"""Cold start benchmark for the API.
+
+Imports `src.app` in fresh interpreters, without a database or API key, and
+fails if the median import time is above the threshold. Autoscaled instances
+only receive traffic once `/v1/health` answers, so this is the floor on how
+fast a new instance can take load.
+
+Run with `python -m benchmarks.import_time --runs 5 --threshold 1.5`.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import src.app\n"
+    "elapsed = time.perf_counter() - start\n"
+    "deferred = ['langgraph.graph', 'langchain_google_genai']\n"
+    "loaded = [name for name in deferred if name in sys.modules]\n"
+    "print(f'{elapsed}|{\",\".join(loaded)}')\n"
+)
+
+
+def measure_import() -> tuple[float, list[str]]:
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("DATABASE_URL", "GOOGLE_API_KEY")
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = result.stdout.strip().splitlines()[-1].split("|", 1)
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EaseAI cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh imports to time")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Maximum median import time in seconds",
+    )
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed, loaded = measure_import()
+        timings.append(elapsed)
+        if loaded:
+            print(f"Modules that should load lazily were imported: {loaded}")
+            sys.exit(1)
+
+    median = statistics.median(timings)
+    print(
+        f"import src.app: median {median:.3f}s, "
+        f"min {min(timings):.3f}s, max {max(timings):.3f}s over {args.runs} runs"
+    )
+    if median > args.threshold:
+        print(f"Cold start is above the {args.threshold:.2f}s threshold")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
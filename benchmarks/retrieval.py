@@ -0,0 +1,129 @@
+"""Search latency benchmark for the document chunk indexes.
+
+Builds a vector and a keyword index over synthetic chunks in a temporary
+directory, then reports search latency percentiles for each and for fusing
+their rankings. Needs no database or API key.
+
+Run with `python -m benchmarks.retrieval --chunks 5000 --dimensions 768`.
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+from uuid import uuid4
+
+import numpy as np
+
+from benchmarks.throughput import percentile
+
+CHUNKS_PER_DOCUMENT = 100
+WORDS_PER_CHUNK = 400
+VOCABULARY = 20000
+
+
+def measure(search: Callable[[], object], queries: int) -> List[float]:
+    latencies = []
+    for _ in range(queries):
+        started = time.perf_counter()
+        search()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    print(
+        f"{name:<10} p50 {percentile(latencies, 0.50) * 1000:6.2f} ms  "
+        f"p95 {percentile(latencies, 0.95) * 1000:6.2f} ms  "
+        f"mean {statistics.mean(latencies) * 1000:6.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    args = parser.parse_args()
+
+    from src.documents.embeddings import normalize
+    from src.documents.index import VectorIndex
+    from src.documents.keywords import KeywordIndex
+    from src.documents.retrieval import reciprocal_rank_fusion
+
+    rng = np.random.default_rng(0)
+    words = [f"term{number}" for number in range(VOCABULARY)]
+    # Zipf-like word frequencies, as in natural text
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as root:
+        vectors = VectorIndex(f"{root}/vectors")
+        keywords = KeywordIndex(f"{root}/keywords")
+        project_id = uuid4()
+
+        indexing = 0.0
+        for start in range(0, args.chunks, CHUNKS_PER_DOCUMENT):
+            count = min(CHUNKS_PER_DOCUMENT, args.chunks - start)
+            document_id = uuid4()
+            embeddings = normalize(rng.normal(size=(count, args.dimensions)))
+            chunks = [
+                " ".join(random.choices(words, cum_weights=weights, k=WORDS_PER_CHUNK))
+                for _ in range(count)
+            ]
+            started = time.perf_counter()
+            vectors.add_document(project_id, document_id, embeddings)
+            keywords.add_document(project_id, document_id, chunks)
+            indexing += time.perf_counter() - started
+        print(
+            f"indexed {args.chunks} chunks in {indexing:.2f}s, "
+            f"{CHUNKS_PER_DOCUMENT} per document"
+        )
+
+        queries = normalize(rng.normal(size=(args.queries, args.dimensions)))
+        texts = [
+            " ".join(random.choices(words, cum_weights=weights, k=8))
+            for _ in range(args.queries)
+        ]
+        # open the indexes before timing
+        vectors.search(project_id, queries[0], args.k)
+        keywords.search(project_id, texts[0], args.k)
+
+        position = iter(range(args.queries * 3))
+        report(
+            "vector",
+            measure(
+                lambda: vectors.search(
+                    project_id, queries[next(position) % args.queries], args.k
+                ),
+                args.queries,
+            ),
+        )
+        report(
+            "keyword",
+            measure(
+                lambda: keywords.search(
+                    project_id, texts[next(position) % args.queries], args.k
+                ),
+                args.queries,
+            ),
+        )
+
+        def hybrid() -> None:
+            number = next(position) % args.queries
+            reciprocal_rank_fusion(
+                [
+                    vectors.search(project_id, queries[number], args.k),
+                    keywords.search(project_id, texts[number], args.k),
+                ]
+            )
+
+        report("hybrid", measure(hybrid, args.queries))
+
+
+if __name__ == "__main__":
+    main()
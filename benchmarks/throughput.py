@@ -0,0 +1,225 @@
+"""End to end throughput benchmark on the offline fake LLM.
+
+Drives the real FastAPI app in process and the real generation graph with
+`LLM_PROVIDER=fake`, and reports requests/sec, latency percentiles and the
+number of database queries per operation.
+
+Scenarios:
+    chat      POST /v1/projects/{id}/messages/ chat turns through the planner
+    approval  POST /v1/projects/{id}/plan/approve until the worker finishes
+              the generation job (needs Postgres for the checkpointer)
+
+Run with `python -m benchmarks.throughput --scenario chat --requests 200
+--concurrency 10`. DATABASE_URL must point at a migrated database.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from uuid import UUID
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args: Any) -> None:
+        self.count += 1
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(
+    scenario: str,
+    latencies: List[float],
+    elapsed: float,
+    queries: int,
+    concurrency: int,
+) -> None:
+    count = len(latencies)
+    print(f"scenario:       {scenario}")
+    print(f"operations:     {count} (concurrency {concurrency})")
+    print(f"throughput:     {count / elapsed:.2f} ops/s")
+    print(f"latency p50:    {percentile(latencies, 0.50) * 1000:.1f} ms")
+    print(f"latency p95:    {percentile(latencies, 0.95) * 1000:.1f} ms")
+    print(f"latency p99:    {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"latency mean:   {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"db queries/op:  {queries / count:.1f}")
+
+
+async def run_concurrently(
+    operations: List[Callable[[], Awaitable[float]]], concurrency: int
+) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(operation: Callable[[], Awaitable[float]]) -> float:
+        async with semaphore:
+            return await operation()
+
+    return await asyncio.gather(*(run(operation) for operation in operations))
+
+
+async def create_project(client: Any, title: str) -> UUID:
+    response = await client.post("/v1/projects/", json={"title": title})
+    response.raise_for_status()
+    return UUID(response.json()["id"])
+
+
+async def chat_turn(client: Any, project_id: UUID, message: str) -> None:
+    response = await client.post(
+        f"/v1/projects/{project_id}/messages/", json={"message": message}
+    )
+    response.raise_for_status()
+
+
+async def bench_chat(
+    client: Any, args: argparse.Namespace, counter: QueryCounter
+) -> Tuple[List[float], float, int]:
+    # one project per concurrent client, each taking turns in its conversation
+    projects = [
+        await create_project(client, f"Benchmark chat {index}")
+        for index in range(args.concurrency)
+    ]
+
+    def operation(index: int) -> Callable[[], Awaitable[float]]:
+        async def run() -> float:
+            start = time.perf_counter()
+            await chat_turn(
+                client,
+                projects[index % len(projects)],
+                f"Turn {index}: make the presentation about quarterly results",
+            )
+            return time.perf_counter() - start
+
+        return run
+
+    counter.count = 0
+    start = time.perf_counter()
+    latencies = await run_concurrently(
+        [operation(index) for index in range(args.requests)], args.concurrency
+    )
+    return latencies, time.perf_counter() - start, counter.count
+
+
+async def bench_approval(
+    client: Any, args: argparse.Namespace, counter: QueryCounter
+) -> Tuple[List[float], float, int]:
+    from src.database import JobsAdapter, get_db_session
+    from src.worker import JOB_MAX_ATTEMPTS, JOB_TIMEOUT, run_job
+
+    # every approval needs a project with a plan, built by a chat turn
+    projects = []
+    for index in range(args.requests):
+        project_id = await create_project(client, f"Benchmark approval {index}")
+        await chat_turn(client, project_id, "Plan a talk on quarterly results")
+        projects.append(project_id)
+
+    approved: Dict[UUID, float] = {}
+    finished: Dict[UUID, float] = {}
+
+    async def worker() -> None:
+        while len(finished) < len(projects):
+            async with get_db_session() as session:
+                job = await JobsAdapter(session).claim_job(
+                    stale_after=timedelta(seconds=JOB_TIMEOUT),
+                    max_attempts=JOB_MAX_ATTEMPTS,
+                )
+            if job is None:
+                await asyncio.sleep(0.05)
+                continue
+            await run_job(job)
+            finished[job.id] = time.perf_counter()
+
+    async def approve(project_id: UUID) -> None:
+        start = time.perf_counter()
+        response = await client.post(f"/v1/projects/{project_id}/plan/approve")
+        response.raise_for_status()
+        approved[UUID(response.json()["id"])] = start
+
+    counter.count = 0
+    start = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    await asyncio.gather(*(approve(project_id) for project_id in projects))
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+    latencies = [finished[job_id] - approved[job_id] for job_id in approved]
+    return latencies, elapsed, counter.count
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    import httpx
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from src.app import app
+
+    # the app logs every prompt at debug level
+    logging.getLogger("easeai").setLevel(logging.WARNING)
+    counter = QueryCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=None
+    ) as client:
+        match args.scenario:
+            case "chat":
+                latencies, elapsed, queries = await bench_chat(client, args, counter)
+            case "approval":
+                latencies, elapsed, queries = await bench_approval(
+                    client, args, counter
+                )
+
+    from src.database import dispose_engine
+
+    await dispose_engine()
+    report(args.scenario, latencies, elapsed, queries, args.concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EaseAI throughput benchmark")
+    parser.add_argument("--scenario", choices=["chat", "approval"], default="chat")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--latency-ms",
+        default="200-800",
+        help="Fake LLM latency range per call, e.g. 500 or 200-800",
+    )
+    parser.add_argument(
+        "--slides", default="5-8", help="Fake LLM slides per deck, e.g. 6 or 5-8"
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Keep the LLM cache enabled (the fake LLM is deterministic)",
+    )
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        print("DATABASE_URL must point at a migrated database")
+        sys.exit(1)
+
+    # settings are read when the modules are first imported
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = args.latency_ms
+    os.environ["FAKE_LLM_ITEMS"] = args.slides
+    os.environ["WARMUP_ON_STARTUP"] = "false"
+    if not args.llm_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -38,50 +38,23 @@ const App = () => {
       setLoading(true);
       setError(null);
       
-      // Fetch project details
-      const projectResponse = await fetch(`${API_BASE}/projects/${id}`);
-      if (!projectResponse.ok) throw new Error('Failed to fetch project');
-      const project = await projectResponse.json();
-      setProjectPhase(project.phase);
-      
-      // Fetch messages
-      try {
-        const messagesResponse = await fetch(`${API_BASE}/projects/${id}/messages/`);
-        if (messagesResponse.ok) {
-          const messagesResult = await messagesResponse.json();
-          setMessages(messagesResult.messages || []);
-        } else {
-          setMessages([]);
-        }
-      } catch {
-        setMessages([]);
-      }
-      
-      // Fetch presentation plan
-      try {
-        const planResponse = await fetch(`${API_BASE}/projects/${id}/plan/`);
-        if (planResponse.ok) {
-          const plan = await planResponse.json();
-          setPresentationPlan(plan);
-        } else {
-          setPresentationPlan(null);
-        }
-      } catch {
-        setPresentationPlan(null);
-      }
-      
-      // Fetch slides if available
-      try {
-        const slidesResponse = await fetch(`${API_BASE}/projects/${id}/slides/`);
-        if (slidesResponse.ok) {
-          const slidesResult = await slidesResponse.json();
-          setSlides(slidesResult.slides || []);
-        } else {
-          setSlides([]);
-        }
-      } catch {
-        setSlides([]);
-      }
+      // Fetch the project with its messages, plan and slides in one request
+      const fields = [
+        'messages',
+        'plan',
+        'slides',
+        'slides.content',
+        'slides.speaker_notes',
+        'slides.delivery_tutorial',
+      ];
+      const query = fields.map((field) => `fields=${field}`).join('&');
+      const snapshotResponse = await fetch(`${API_BASE}/projects/${id}/snapshot?${query}`);
+      if (!snapshotResponse.ok) throw new Error('Failed to fetch project');
+      const snapshot = await snapshotResponse.json();
+      setProjectPhase(snapshot.project.phase);
+      setMessages(snapshot.messages || []);
+      setPresentationPlan(snapshot.plan || null);
+      setSlides(snapshot.slides || []);
       
     } catch (err) {
       setError(err.message);
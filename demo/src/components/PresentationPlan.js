@@ -20,6 +20,22 @@ const PresentationPlan = ({ plan, projectId, loading, setLoading, setError, setP
       }
       
       setProjectPhase('generation');
+
+      // Generation runs in a background worker, poll the job until it finishes
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobResponse = await fetch(`${API_BASE}/jobs/${job.id}`);
+        if (!jobResponse.ok) {
+          throw new Error('Failed to fetch generation status');
+        }
+        job = await jobResponse.json();
+      }
+      if (job.status === 'failed') {
+        setProjectPhase('preparation');
+        throw new Error(job.error || 'Content generation failed');
+      }
+
       onPlanApproved();
       
     } catch (err) {
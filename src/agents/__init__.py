@@ -1,4 +1,57 @@
-from .agent import agent
-from .state import OverallState
+"""LangGraph agents for EaseAI.
 
-__all__ = ["agent", "OverallState"]
+Exports are imported on first access, so importing the API does not pull in
+LangGraph or the LLM provider SDK until a request or the startup warmup needs
+them.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .agent import get_agent, get_generation_agent
+    from .checkpointer import close_checkpointer, get_checkpointer
+    from .context import build_context
+    from .instrumentation import metrics_handler, track_run
+    from .lifecycle import shutdown, warmup
+    from .regeneration import regenerate_stale_slides
+    from .research import summarize_research
+    from .state import OverallState
+
+_exports = {
+    "get_agent": ".agent",
+    "get_generation_agent": ".agent",
+    "close_checkpointer": ".checkpointer",
+    "get_checkpointer": ".checkpointer",
+    "build_context": ".context",
+    "metrics_handler": ".instrumentation",
+    "track_run": ".instrumentation",
+    "shutdown": ".lifecycle",
+    "warmup": ".lifecycle",
+    "regenerate_stale_slides": ".regeneration",
+    "summarize_research": ".research",
+    "OverallState": ".state",
+}
+
+__all__ = [
+    "build_context",
+    "close_checkpointer",
+    "get_agent",
+    "get_checkpointer",
+    "get_generation_agent",
+    "metrics_handler",
+    "regenerate_stale_slides",
+    "shutdown",
+    "summarize_research",
+    "track_run",
+    "warmup",
+    "OverallState",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,9 +1,13 @@
 import logging
+from typing import Optional
 
 from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 
 from src.types import ProjectPhase
 
+from .checkpointer import get_checkpointer
+from .instrumentation import instrument_node
 from .nodes import (
     call_tool,
     delivery_tutorial,
@@ -39,23 +43,49 @@ builder = StateGraph(OverallState)
 builder.add_conditional_edges(START, phase_router)
 
 # Planning phase
-builder.add_node("planner", planner)
-builder.add_node("call_tool", call_tool)
+builder.add_node("planner", instrument_node("planner", planner))
+builder.add_node("call_tool", instrument_node("call_tool", call_tool))
 
 builder.add_conditional_edges("planner", response_router)
 builder.add_edge("call_tool", "planner")
 
 # generation phase
-builder.add_node("outline", outline)
-builder.add_node("slide", slide)
-builder.add_node("speaker_notes", speaker_notes)
-builder.add_node("delivery_tutorial", delivery_tutorial)
-builder.add_node("write_results", write_results)
+builder.add_node("outline", instrument_node("outline", outline))
+builder.add_node("slide", instrument_node("slide", slide))
+builder.add_node("speaker_notes", instrument_node("speaker_notes", speaker_notes))
+builder.add_node(
+    "delivery_tutorial", instrument_node("delivery_tutorial", delivery_tutorial)
+)
+builder.add_node("write_results", instrument_node("write_results", write_results))
 
+# slide content, speaker notes and delivery tutorials only depend on the outline
+# so they fan out in parallel and are merged by the update_slides reducer
 builder.add_edge("outline", "slide")
-builder.add_edge("slide", "speaker_notes")
-builder.add_edge("speaker_notes", "delivery_tutorial")
-builder.add_edge("delivery_tutorial", "write_results")
+builder.add_edge("outline", "speaker_notes")
+builder.add_edge("outline", "delivery_tutorial")
+builder.add_edge(["slide", "speaker_notes", "delivery_tutorial"], "write_results")
 builder.add_edge("write_results", END)
 
-agent = builder.compile()
+_agent: Optional[CompiledStateGraph] = None
+_generation_agent: Optional[CompiledStateGraph] = None
+
+
+def get_agent() -> CompiledStateGraph:
+    """Graph for chat turns, compiled on first use or by the startup warmup."""
+    global _agent
+    if _agent is None:
+        _agent = builder.compile()
+        logger.info("Compiled agent graph")
+    return _agent
+
+
+async def get_generation_agent() -> CompiledStateGraph:
+    """Graph compiled with the Postgres checkpointer for resumable generation.
+
+    Runs must set a `thread_id`. Invoking a thread whose last run stopped part
+    way through with `None` as input resumes it from the last completed step.
+    """
+    global _generation_agent
+    if _generation_agent is None:
+        _generation_agent = builder.compile(checkpointer=await get_checkpointer())
+    return _generation_agent
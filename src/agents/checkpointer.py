@@ -0,0 +1,53 @@
+import logging
+import os
+from typing import Optional
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg import AsyncConnection
+from psycopg.rows import DictRow, dict_row
+from psycopg_pool import AsyncConnectionPool
+
+logger = logging.getLogger("easeai")
+
+CHECKPOINT_POOL_SIZE = int(os.getenv("CHECKPOINT_POOL_SIZE", "5"))
+
+_checkpointer: Optional[AsyncPostgresSaver] = None
+
+
+def checkpoint_conninfo() -> str:
+    """Convert the SQLAlchemy DATABASE_URL into a plain psycopg connection string."""
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError(
+            "Database connection string is not set in the environment variables."
+        )
+    return url.replace("postgresql+psycopg://", "postgresql://", 1)
+
+
+async def get_checkpointer() -> AsyncPostgresSaver:
+    """Get the shared Postgres checkpointer, creating its tables on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        pool: AsyncConnectionPool[AsyncConnection[DictRow]] = AsyncConnectionPool(
+            checkpoint_conninfo(),
+            max_size=CHECKPOINT_POOL_SIZE,
+            kwargs={
+                "autocommit": True,
+                "prepare_threshold": 0,
+                "row_factory": dict_row,
+            },
+            open=False,
+        )
+        await pool.open()
+        checkpointer = AsyncPostgresSaver(pool)
+        await checkpointer.setup()
+        _checkpointer = checkpointer
+        logger.info("Initialized generation checkpointer")
+    return _checkpointer
+
+
+async def close_checkpointer() -> None:
+    global _checkpointer
+    if _checkpointer is not None:
+        await _checkpointer.conn.close()
+        _checkpointer = None
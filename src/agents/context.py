@@ -0,0 +1,118 @@
+import logging
+import os
+from typing import List, Optional
+from uuid import UUID
+
+from langchain_core.messages import AnyMessage, SystemMessage
+from langchain_core.prompts import PromptTemplate
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import ConversationSummaryAdapter, MessagesAdapter
+from src.types import Message
+
+from .llm import SUMMARY_LLM
+from .llm_cache import cached_structured_output
+
+logger = logging.getLogger("easeai")
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+# older turns are only folded into the summary once they add up to this many
+# tokens, so the summary is refreshed every few turns rather than every turn
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "2000"))
+
+
+class SummaryResponse(BaseModel):
+    summary: str = Field(description="The updated summary of the conversation")
+
+
+# llm
+structured_llm = cached_structured_output(SUMMARY_LLM, SummaryResponse)
+
+# prompts
+summary_prompt = PromptTemplate(
+    template="""You are EaseAI, an AI assistant helping users create presentations.
+Your goal is to keep a running summary of the conversation with the user.
+
+# Current Summary:
+{current_summary}
+
+# New Messages:
+{new_messages}
+
+Update the summary so that it also covers the new messages.
+Keep every decision, preference and fact the user has given about their presentation.
+Drop small talk and anything that has since been superseded.""",  # noqa: E501
+    input_variables=[
+        "current_summary",
+        "new_messages",
+    ],
+)
+
+
+async def summarize(current_summary: Optional[str], messages: List[Message]) -> str:
+    new_messages = "\n".join(
+        f"{message.type.value}: {message.content}" for message in messages
+    )
+    system = summary_prompt.format(
+        current_summary=current_summary or "No summary yet.",
+        new_messages=new_messages,
+    )
+    response: SummaryResponse = await structured_llm.ainvoke(
+        [SystemMessage(content=system)]
+    )
+    return response.summary
+
+
+async def build_context(
+    db: AsyncSession, project_id: UUID, token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> List[AnyMessage]:
+    """Build the conversation context sent to the agent.
+
+    The most recent messages are kept verbatim within `token_budget`. Older
+    messages are folded into a persisted rolling summary, which is only
+    extended with messages it has not seen yet.
+    """
+    messages_adapter = MessagesAdapter(db)
+    summary_adapter = ConversationSummaryAdapter(db)
+
+    window = await messages_adapter.get_context_window(project_id, token_budget)
+    summary = await summary_adapter.get_summary(project_id)
+    summarized = summary.summarized_sequence if summary else 0
+
+    # messages that fell out of the window but are not in the summary yet
+    pending: List[Message] = []
+    oldest = window[0].sequence if window else None
+    if oldest is not None and oldest > summarized + 1:
+        pending = (
+            await messages_adapter.get_messages(
+                project_id=project_id,
+                limit=None,
+                after=summarized,
+                before=oldest,
+            )
+        )[0]
+        pending_tokens = sum(message.token_count or 0 for message in pending)
+        if pending and pending_tokens >= SUMMARY_BATCH_TOKENS:
+            # stored messages always have a sequence
+            last_sequence = pending[-1].sequence
+            assert last_sequence is not None
+            logger.debug(
+                f"Summarizing {len(pending)} messages for project {project_id}"
+            )
+            summary = await summary_adapter.save_summary(
+                project_id,
+                await summarize(summary.summary if summary else None, pending),
+                last_sequence,
+            )
+            pending = []
+
+    context: List[AnyMessage] = []
+    if summary:
+        context.append(
+            SystemMessage(
+                content=f"# Summary of the earlier conversation:\n{summary.summary}"
+            )
+        )
+    context.extend(message.AnyMessage for message in pending + window)
+    return context
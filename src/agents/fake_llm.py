@@ -0,0 +1,334 @@
+"""Deterministic offline chat model for local runs and benchmarks.
+
+Selected with `LLM_PROVIDER=fake`. Structured output calls answer with a tool
+call whose arguments are generated from the requested schema, so every node
+parses them exactly like a real response. The output is seeded by the schema
+and the prompt, so the same input always gives the same response.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+Range = Tuple[float, float]
+
+
+def parse_range(value: str) -> Range:
+    """Parse `"5"` or `"5-10"` into an inclusive range."""
+    low, _, high = value.partition("-")
+    return float(low), float(high or low)
+
+
+# latency of a whole call in milliseconds, items per generated list and words
+# per generated string, each drawn uniformly from the range
+FAKE_LLM_LATENCY_MS = parse_range(os.getenv("FAKE_LLM_LATENCY_MS", "200-800"))
+FAKE_LLM_ITEMS = parse_range(os.getenv("FAKE_LLM_ITEMS", "5-8"))
+FAKE_LLM_WORDS = parse_range(os.getenv("FAKE_LLM_WORDS", "3-12"))
+FAKE_LLM_LONG_WORDS = parse_range(os.getenv("FAKE_LLM_LONG_WORDS", "80-300"))
+FAKE_LLM_STREAM_CHUNKS = 8
+# requests per minute before calls fail with a 429, like a provider quota
+FAKE_LLM_QUOTA_RPM = int(os.getenv("FAKE_LLM_QUOTA_RPM", "0"))
+
+# free text fields that are long in real responses
+LONG_FIELDS = {
+    "content",
+    "delivery_tutorial",
+    "research_summary",
+    "response",
+    "speaker_notes",
+    "summary",
+}
+WORDS = (
+    "audience slide story data insight growth team market plan result "
+    "customer design strategy research example impact question goal idea "
+    "quarter product launch risk trend summary process value feedback"
+).split()
+
+
+class FakeRateLimitError(Exception):
+    code = 429
+
+
+class FakeQuota:
+    """Sliding one minute window of calls shared by every fake model."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.per_minute = per_minute
+        self._calls: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        if self.per_minute <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= 60:
+                self._calls.popleft()
+            if len(self._calls) >= self.per_minute:
+                raise FakeRateLimitError("429 RESOURCE_EXHAUSTED. Quota exceeded")
+            self._calls.append(now)
+
+
+quota = FakeQuota(FAKE_LLM_QUOTA_RPM)
+
+
+class FakeChatModel(BaseChatModel):
+    model: str = "fake"
+    temperature: float = 0.7
+    latency_ms: Range = FAKE_LLM_LATENCY_MS
+    items: Range = FAKE_LLM_ITEMS
+    words: Range = FAKE_LLM_WORDS
+    long_words: Range = FAKE_LLM_LONG_WORDS
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(
+        self,
+        tools: Sequence[Union[Dict[str, Any], type, Callable, BaseTool]],
+        *,
+        tool_choice: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, AIMessage]:
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        quota.check()
+        rng = self._rng(messages, kwargs.get("tools"))
+        message = self._respond(rng, messages, kwargs.get("tools"))
+        time.sleep(self._latency(rng))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        quota.check()
+        rng = self._rng(messages, kwargs.get("tools"))
+        message = self._respond(rng, messages, kwargs.get("tools"))
+        await asyncio.sleep(self._latency(rng))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        quota.check()
+        rng = self._rng(messages, kwargs.get("tools"))
+        message = self._respond(rng, messages, kwargs.get("tools"))
+        delay = self._latency(rng) / FAKE_LLM_STREAM_CHUNKS
+        for chunk in self._chunks(message):
+            time.sleep(delay)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        quota.check()
+        rng = self._rng(messages, kwargs.get("tools"))
+        message = self._respond(rng, messages, kwargs.get("tools"))
+        delay = self._latency(rng) / FAKE_LLM_STREAM_CHUNKS
+        for chunk in self._chunks(message):
+            await asyncio.sleep(delay)
+            yield chunk
+
+    def _rng(
+        self, messages: Sequence[BaseMessage], tools: Optional[List[Dict]]
+    ) -> random.Random:
+        payload = json.dumps(
+            {
+                "seed": self.seed,
+                "tools": [tool["function"]["name"] for tool in tools or []],
+                "messages": [(message.type, message.content) for message in messages],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return random.Random(hashlib.sha256(payload.encode()).hexdigest())
+
+    def _latency(self, rng: random.Random) -> float:
+        return rng.uniform(*self.latency_ms) / 1000
+
+    def _respond(
+        self,
+        rng: random.Random,
+        messages: Sequence[BaseMessage],
+        tools: Optional[List[Dict]],
+    ) -> AIMessage:
+        if tools:
+            function = tools[0]["function"]
+            parameters = function.get("parameters", {})
+            args = self._value(rng, parameters, parameters.get("$defs", {}), "", 0)
+            content = ""
+            tool_calls = [
+                {"name": function["name"], "args": args, "id": self._call_id(rng)}
+            ]
+        else:
+            args = None
+            content = self._text(rng, self.long_words)
+            tool_calls = []
+
+        input_chars = sum(len(str(message.content)) for message in messages)
+        output_chars = len(content) + len(json.dumps(args))
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            response_metadata={"model_name": self.model},
+            usage_metadata={
+                "input_tokens": input_chars // 4,
+                "output_tokens": output_chars // 4,
+                "total_tokens": (input_chars + output_chars) // 4,
+            },
+        )
+
+    def _chunks(self, message: AIMessage) -> Iterator[ChatGenerationChunk]:
+        """Split a response into chunks the way a streamed response arrives,
+        with tool call arguments as partial JSON."""
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            arguments = json.dumps(call["args"])
+            size = -(-len(arguments) // FAKE_LLM_STREAM_CHUNKS)
+            pieces = [
+                arguments[start : start + size]
+                for start in range(0, len(arguments), size)
+            ]
+            for index, piece in enumerate(pieces):
+                first = index == 0
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="",
+                        tool_call_chunks=[
+                            {
+                                "name": call["name"] if first else None,
+                                "args": piece,
+                                "id": call["id"] if first else None,
+                                "index": 0,
+                            }
+                        ],
+                    )
+                )
+        else:
+            text = str(message.content)
+            size = -(-len(text) // FAKE_LLM_STREAM_CHUNKS) or 1
+            for start in range(0, len(text), size):
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(content=text[start : start + size])
+                )
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                response_metadata=message.response_metadata,
+                usage_metadata=message.usage_metadata,
+            )
+        )
+
+    def _value(
+        self,
+        rng: random.Random,
+        schema: Dict[str, Any],
+        defs: Dict[str, Any],
+        name: str,
+        index: int,
+    ) -> Any:
+        """Generate a value matching a JSON schema.
+
+        Optional values are always filled in. List lengths are drawn from
+        `items` once per seed and field name and `slide_number` follows the list
+        position, so the slides of every response line up with the outline.
+        """
+        if "$ref" in schema:
+            schema = defs[schema["$ref"].rsplit("/", 1)[-1]]
+        for key in ("anyOf", "oneOf", "allOf"):
+            if key in schema:
+                options = [
+                    option for option in schema[key] if option.get("type") != "null"
+                ]
+                return self._value(rng, options[0], defs, name, index)
+        if "enum" in schema:
+            return rng.choice(schema["enum"])
+
+        match schema.get("type"):
+            case "object":
+                return {
+                    key: self._value(rng, value, defs, key, index)
+                    for key, value in schema.get("properties", {}).items()
+                }
+            case "array":
+                # the same for every call, so all stages agree on the slide count
+                lengths = random.Random(f"{self.seed}:{name}")
+                count = round(lengths.uniform(*self.items))
+                return [
+                    self._value(rng, schema.get("items", {}), defs, name, position)
+                    for position in range(count)
+                ]
+            case "integer":
+                if name == "slide_number":
+                    return index + 1
+                return rng.randint(1, 10)
+            case "number":
+                return round(rng.uniform(0, 10), 2)
+            case "boolean":
+                return rng.random() < 0.5
+            case "null":
+                return None
+        words = self.long_words if name in LONG_FIELDS else self.words
+        return self._text(rng, words)
+
+    def _text(self, rng: random.Random, words: Range) -> str:
+        count = max(1, round(rng.uniform(*words)))
+        return " ".join(rng.choice(WORDS) for _ in range(count)).capitalize()
+
+    def _call_id(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128)))
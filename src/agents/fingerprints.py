@@ -0,0 +1,79 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from src.types import PresentationPlan, Slide
+
+# plan fields each generation stage's prompt is given, so editing any other
+# plan field leaves the stage's output untouched on regeneration
+STAGE_PLAN_FIELDS = {
+    "outline": ["title", "objective", "duration", "research_summary"],
+    "content": ["title", "target_audience", "tone"],
+    "speaker_notes": ["objective", "target_audience", "tone", "research_summary"],
+    "delivery_tutorial": ["target_audience", "tone", "duration"],
+}
+SLIDE_FIELDS = ["content", "speaker_notes", "delivery_tutorial"]
+
+
+def _digest(payload: Dict) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _plan_data(stage: str, plan: Optional[PresentationPlan]) -> Dict:
+    return {
+        field: getattr(plan, field) if plan else None
+        for field in STAGE_PLAN_FIELDS[stage]
+    }
+
+
+def stage_plan(stage: str, plan: Optional[PresentationPlan]) -> str:
+    """The part of the plan given to a stage's prompt."""
+    return "\n".join(
+        f"{field}={value}" for field, value in _plan_data(stage, plan).items()
+    )
+
+
+def outline_fingerprint(plan: Optional[PresentationPlan]) -> str:
+    return _digest({"plan": _plan_data("outline", plan)})
+
+
+def field_fingerprint(
+    field: str, plan: Optional[PresentationPlan], slide: Slide
+) -> str:
+    """Hash the plan fields, outline entry and instructions a slide field is
+    generated from."""
+    return _digest(
+        {
+            "plan": _plan_data(field, plan),
+            "outline": {
+                "title": slide.title,
+                "description": slide.description,
+                "time_spent_on_slide": slide.time_spent_on_slide,
+            },
+            "instructions": (slide.instructions or {}).get(field),
+        }
+    )
+
+
+def slide_fingerprints(
+    plan: Optional[PresentationPlan], slide: Slide
+) -> Dict[str, str]:
+    """Fingerprint the outline and the fields the slide has. A field whose
+    generation failed gets none, so it is regenerated next time."""
+    fingerprints = {"outline": outline_fingerprint(plan)}
+    for field in SLIDE_FIELDS:
+        if getattr(slide, field) is not None:
+            fingerprints[field] = field_fingerprint(field, plan, slide)
+    return fingerprints
+
+
+def stale_fields(plan: Optional[PresentationPlan], slide: Slide) -> List[str]:
+    """Slide fields whose inputs changed since they were generated."""
+    stored = slide.fingerprints or {}
+    return [
+        field
+        for field in SLIDE_FIELDS
+        if stored.get(field) != field_fingerprint(field, plan, slide)
+    ]
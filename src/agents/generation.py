@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Callable, Dict, List, TypeVar
+
+from langchain_core.messages import AnyMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from src.types import Slide
+
+logger = logging.getLogger("easeai")
+
+T = TypeVar("T")
+
+# "deck" generates every slide in one LLM call, "per_slide" fans out one call per
+# slide. Both can be overridden per run through the RunnableConfig.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "deck")
+SLIDE_CONCURRENCY = int(os.getenv("SLIDE_CONCURRENCY", "4"))
+
+
+def per_slide_enabled(config: RunnableConfig) -> bool:
+    configurable = config.get("configurable", {})
+    mode: str = configurable.get("generation_mode", GENERATION_MODE)
+    return mode == "per_slide"
+
+
+async def map_slides(
+    structured_llm: Runnable,
+    slides: Dict[int, Slide],
+    build_messages: Callable[[Slide], List[AnyMessage]],
+    config: RunnableConfig,
+) -> Dict[int, T]:
+    """Run one structured LLM call per slide with bounded concurrency.
+
+    Slides whose call fails are logged and left out of the result so that a
+    single bad response does not discard the rest of the deck. Such a slide
+    keeps its stored text and, having no fingerprint for the field, is
+    generated again on the next regeneration.
+    """
+    slide_numbers = list(slides.keys())
+    inputs = [build_messages(slides[number]) for number in slide_numbers]
+    batch_config = RunnableConfig(
+        **{
+            **config,
+            "max_concurrency": config.get("max_concurrency") or SLIDE_CONCURRENCY,
+        }
+    )
+    responses = await structured_llm.abatch(
+        inputs, batch_config, return_exceptions=True
+    )
+
+    results: Dict[int, T] = {}
+    for slide_number, response in zip(slide_numbers, responses):
+        if isinstance(response, Exception):
+            logger.warning(f"Generation failed for slide {slide_number}: {response}")
+            continue
+        results[slide_number] = response
+    return results
@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, Protocol
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.database import MetricsAdapter, get_db_session
+from src.utils.metrics import registry
+
+from .state import OverallState
+
+logger = logging.getLogger("easeai")
+
+# USD per million tokens (input, output)
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+run_duration = registry.histogram(
+    "easeai_run_duration_seconds", "Wall time of agent runs", ["kind"]
+)
+node_duration = registry.histogram(
+    "easeai_node_duration_seconds", "Wall time of graph nodes", ["node"]
+)
+node_db_duration = registry.histogram(
+    "easeai_node_db_seconds", "Database time spent inside graph nodes", ["node"]
+)
+llm_duration = registry.histogram(
+    "easeai_llm_duration_seconds", "Latency of individual LLM calls", ["node"]
+)
+llm_tokens = registry.counter(
+    "easeai_llm_tokens_total", "LLM tokens used", ["node", "direction"]
+)
+llm_retries = registry.counter(
+    "easeai_llm_retries_total", "Failed LLM calls that were retried", ["node"]
+)
+llm_cost = registry.counter(
+    "easeai_llm_cost_usd_total", "Estimated LLM cost in USD", ["node"]
+)
+db_duration = registry.histogram(
+    "easeai_db_query_seconds",
+    "Latency of database queries",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+class NodeMetrics:
+    def __init__(self) -> None:
+        self.wall_time = 0.0
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.retries = 0
+        self.db_time = 0.0
+        self.cost_usd = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class RunMetrics:
+    """Per node measurements for a single agent run."""
+
+    def __init__(self, project_id: UUID, kind: str) -> None:
+        self.run_id = uuid.uuid4()
+        self.project_id = project_id
+        self.kind = kind
+        self.nodes: Dict[str, NodeMetrics] = {}
+        self._lock = threading.Lock()
+
+    def update(self, node: str, **values: float) -> None:
+        with self._lock:
+            metrics = self.nodes.setdefault(node, NodeMetrics())
+            for name, value in values.items():
+                setattr(metrics, name, getattr(metrics, name) + value)
+
+
+current_run: ContextVar[Optional[RunMetrics]] = ContextVar("current_run", default=None)
+current_node: ContextVar[str] = ContextVar("current_node", default="none")
+
+
+def record(node: str, **values: float) -> None:
+    run = current_run.get()
+    if run is not None:
+        run.update(node, **values)
+
+
+@asynccontextmanager
+async def track_run(project_id: UUID, kind: str) -> AsyncGenerator[RunMetrics, None]:
+    """Collect node metrics for an agent run and store them when it ends.
+
+    The yielded RunMetrics must be passed to the graph as `run_metrics` in the
+    run's configurable so the instrumented nodes can report to it.
+    """
+    run = RunMetrics(project_id, kind)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run_duration.observe(time.perf_counter() - start, kind=kind)
+        try:
+            async with get_db_session() as session:
+                await MetricsAdapter(session).save_node_metrics(
+                    run_id=run.run_id,
+                    project_id=project_id,
+                    run_kind=kind,
+                    nodes=[
+                        {"node": node, **metrics.as_dict()}
+                        for node, metrics in run.nodes.items()
+                    ],
+                )
+        except Exception as e:
+            logger.warning(f"Failed to store run metrics: {e}")
+
+
+class GraphNode(Protocol):
+    async def __call__(
+        self, state: OverallState, config: RunnableConfig
+    ) -> OverallState: ...
+
+
+def instrument_node(
+    name: str, node: Callable[..., Awaitable[OverallState]]
+) -> GraphNode:
+    """Wrap a graph node so its wall time is recorded and work inside it is
+    attributed to it."""
+
+    async def instrumented(state: OverallState, config: RunnableConfig) -> OverallState:
+        run = config.get("configurable", {}).get("run_metrics")
+        run_token = current_run.set(run)
+        node_token = current_node.set(name)
+        start = time.perf_counter()
+        try:
+            return await node(state, config)
+        finally:
+            elapsed = time.perf_counter() - start
+            node_duration.observe(elapsed, node=name)
+            record(name, wall_time=elapsed)
+            current_node.reset(node_token)
+            current_run.reset(run_token)
+
+    instrumented.__name__ = name
+    return instrumented
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM latency, token usage, retries and cost per graph node."""
+
+    # run in the calling task so the current node context var is visible
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        node = current_node.get()
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            llm_duration.observe(time.perf_counter() - start, node=node)
+
+        input_tokens = output_tokens = 0
+        model = ""
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                metadata = getattr(message, "response_metadata", None) or {}
+                model = metadata.get("model_name", model)
+
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1e6
+        llm_tokens.inc(input_tokens, node=node, direction="input")
+        llm_tokens.inc(output_tokens, node=node, direction="output")
+        llm_cost.inc(cost, node=node)
+        record(
+            node,
+            llm_calls=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=cost,
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # counted as a retry by the caller only if the call is retried
+        self._starts.pop(run_id, None)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        record_retry()
+
+
+def record_retry() -> None:
+    """Count a failed LLM call that is about to be retried."""
+    node = current_node.get()
+    llm_retries.inc(node=node)
+    record(node, retries=1)
+
+
+metrics_handler = MetricsCallbackHandler()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, many: Any
+) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, many: Any
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_duration.observe(elapsed)
+    node = current_node.get()
+    if node != "none":
+        node_db_duration.observe(elapsed, node=node)
+        record(node, db_time=elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context: Any) -> None:
+    # a failed statement gets no after_cursor_execute, drop its start time so
+    # it isn't taken for the next statement's
+    connection = context.connection
+    if (
+        context.execution_context is not None
+        and connection is not None
+        and connection.info.get("query_start")
+    ):
+        connection.info["query_start"].pop()
@@ -0,0 +1,34 @@
+import asyncio
+import logging
+import time
+
+from .llm import GENERATION_LLM, SUMMARY_LLM, get_chat_model
+
+logger = logging.getLogger("easeai")
+
+
+def _load() -> None:
+    # importing the graph pulls in LangGraph and every node module
+    from .agent import get_agent
+
+    get_agent()
+    get_chat_model(GENERATION_LLM)
+    get_chat_model(SUMMARY_LLM)
+
+
+async def warmup() -> None:
+    """Compile the graph and create the LLM clients off the event loop, so
+    the first chat request does not pay for it."""
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(_load)
+    except Exception:
+        logger.exception("Agent warmup failed, loading on first use instead")
+        return
+    logger.info(f"Warmed up agents in {time.perf_counter() - start:.2f}s")
+
+
+async def shutdown() -> None:
+    from .checkpointer import close_checkpointer
+
+    await close_checkpointer()
@@ -0,0 +1,64 @@
+"""Shared chat model clients, created on first use."""
+
+import logging
+import os
+import threading
+from typing import Dict, NamedTuple
+
+from langchain_core.language_models import BaseChatModel
+
+logger = logging.getLogger("easeai")
+
+# "google" for Gemini or "fake" for the deterministic offline model
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "google")
+LLM_MODEL = os.getenv(
+    "LLM_MODEL", "fake" if LLM_PROVIDER == "fake" else "gemini-2.5-flash"
+)
+
+
+class LLMConfig(NamedTuple):
+    provider: str = LLM_PROVIDER
+    model: str = LLM_MODEL
+    temperature: float = 0.7
+    # quota and server errors are retried through the rate limiter instead
+    max_retries: int = 0
+
+
+GENERATION_LLM = LLMConfig(temperature=0.7)
+SUMMARY_LLM = LLMConfig(temperature=0.2)
+
+_models: Dict[LLMConfig, BaseChatModel] = {}
+_lock = threading.Lock()
+
+
+def get_chat_model(config: LLMConfig) -> BaseChatModel:
+    """Get the client for a model config, creating it on first use.
+
+    Every node using the same config shares one client and its connection
+    pool. The provider SDK is only imported here, so importing the agents
+    stays cheap.
+    """
+    with _lock:
+        model = _models.get(config)
+        if model is None:
+            model = _create_chat_model(config)
+            _models[config] = model
+            logger.debug(f"Created chat model client for {config}")
+        return model
+
+
+def _create_chat_model(config: LLMConfig) -> BaseChatModel:
+    match config.provider:
+        case "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            return ChatGoogleGenerativeAI(
+                model=config.model,
+                temperature=config.temperature,
+                max_retries=config.max_retries,
+            )
+        case "fake":
+            from .fake_llm import FakeChatModel
+
+            return FakeChatModel(model=config.model, temperature=config.temperature)
+    raise ValueError(f"Unknown LLM provider: {config.provider}")
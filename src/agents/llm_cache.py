@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from langchain_core.messages import AnyMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from src.database import LLMCacheAdapter, get_db_session
+from src.utils.metrics import registry
+
+from .instrumentation import record_retry
+from .llm import LLMConfig, get_chat_model
+from .rate_limiter import (
+    LLM_MAX_RETRIES,
+    estimate_call_tokens,
+    is_retryable_error,
+    rate_limiter,
+)
+
+logger = logging.getLogger("easeai")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 60 * 60)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_EVICT_EVERY = 100
+
+Schema = Union[Dict[str, Any], Type[BaseModel]]
+
+cache_requests = registry.counter(
+    "easeai_llm_cache_requests_total", "LLM cache lookups", ["result"]
+)
+
+
+class LLMCache:
+    """Two tier cache for structured LLM responses.
+
+    An in-process LRU sits in front of the Postgres `llm_cache` table. Both
+    tiers expire entries after `ttl` seconds, the LRU is capped at
+    `memory_entries` and the table is trimmed to `max_entries` periodically.
+    """
+
+    def __init__(self, ttl: int, memory_entries: int, max_entries: int) -> None:
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                cache_requests.inc(result="memory_hit")
+                return entry[1]
+            self._entries.pop(key, None)
+
+        try:
+            async with get_db_session() as session:
+                response = await LLMCacheAdapter(session).get_entry(
+                    key, timedelta(seconds=self.ttl)
+                )
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            response = None
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+                cache_requests.inc(result="miss")
+                return None
+            self.db_hits += 1
+            cache_requests.inc(result="db_hit")
+            self._remember(key, response)
+        return response
+
+    async def put(self, key: str, model: str, schema_name: str, response: Any) -> None:
+        with self._lock:
+            self._remember(key, response)
+            self._puts += 1
+            evict = self._puts % LLM_CACHE_EVICT_EVERY == 0
+
+        try:
+            async with get_db_session() as session:
+                adapter = LLMCacheAdapter(session)
+                await adapter.put_entry(key, model, schema_name, response)
+                if evict:
+                    await adapter.evict(timedelta(seconds=self.ttl), self.max_entries)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._entries),
+            }
+
+    def _remember(self, key: str, response: Any) -> None:
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_entries:
+            self._entries.popitem(last=False)
+
+
+llm_cache = LLMCache(
+    ttl=LLM_CACHE_TTL,
+    memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+)
+
+
+def normalize_messages(messages: Sequence[AnyMessage]) -> List[Dict[str, Any]]:
+    normalized = []
+    for message in messages:
+        content = message.content
+        if isinstance(content, str):
+            content = content.strip()
+        normalized.append({"type": message.type, "content": content})
+    return normalized
+
+
+def cache_bypassed(config: Optional[RunnableConfig]) -> bool:
+    if not LLM_CACHE_ENABLED:
+        return True
+    configurable = (config or {}).get("configurable", {})
+    return bool(configurable.get("bypass_llm_cache", False))
+
+
+class CachedStructuredLLM(Runnable[Sequence[AnyMessage], Any]):
+    """Structured output runnable that consults the LLM cache before calling out.
+
+    Entries are keyed by model name, temperature, output schema and a hash of
+    the normalized messages. Set `bypass_llm_cache` in the run's configurable
+    to force a fresh call. The cache is backed by the async engine, so only
+    the async methods consult it, and only they go through the rate limiter.
+    """
+
+    def __init__(self, llm_config: LLMConfig, schema: Schema) -> None:
+        self.llm_config = llm_config
+        self.schema = schema
+        self._structured_llm: Optional[Runnable] = None
+        if isinstance(schema, dict):
+            self.schema_name = schema.get("title", "dict")
+            schema_json = schema
+        else:
+            self.schema_name = schema.__name__
+            schema_json = schema.model_json_schema()
+        self.schema_hash = hashlib.sha256(
+            json.dumps(schema_json, sort_keys=True).encode()
+        ).hexdigest()
+
+    @property
+    def structured_llm(self) -> Runnable:
+        # the client is only created once the first call is made
+        if self._structured_llm is None:
+            llm = get_chat_model(self.llm_config)
+            self._structured_llm = llm.with_structured_output(self.schema)
+        return self._structured_llm
+
+    @property
+    def model_name(self) -> str:
+        return self.llm_config.model
+
+    def cache_key(self, messages: Sequence[AnyMessage]) -> str:
+        payload = {
+            "model": self.model_name,
+            "temperature": self.llm_config.temperature,
+            "schema": self.schema_hash,
+            "messages": normalize_messages(messages),
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def invoke(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> Any:
+        return self.structured_llm.invoke(input, config, **kwargs)
+
+    def stream(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> Iterator[Any]:
+        yield from self.structured_llm.stream(input, config, **kwargs)
+
+    async def ainvoke(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if cache_bypassed(config):
+            return await self._call(input, config, **kwargs)
+
+        key = self.cache_key(input)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {self.schema_name}")
+            return self._load(cached)
+
+        output = await self._call(input, config, **kwargs)
+        await llm_cache.put(key, self.model_name, self.schema_name, self._dump(output))
+        return output
+
+    async def astream(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        if cache_bypassed(config):
+            async for output in self._stream(input, config, **kwargs):
+                yield output
+            return
+
+        key = self.cache_key(input)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {self.schema_name}")
+            yield self._load(cached)
+            return
+
+        output = None
+        async for output in self._stream(input, config, **kwargs):
+            yield output
+        if output is not None:
+            await llm_cache.put(
+                key, self.model_name, self.schema_name, self._dump(output)
+            )
+
+    async def _call(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig],
+        **kwargs: Any,
+    ) -> Any:
+        """Call the model through the rate limiter, retrying quota and server
+        errors."""
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with rate_limiter.slot(estimate_call_tokens(input)) as slot:
+                    return await self.structured_llm.ainvoke(
+                        input, slot.config(config), **kwargs
+                    )
+            except Exception as e:
+                if attempt == LLM_MAX_RETRIES or not is_retryable_error(e):
+                    raise
+                logger.warning(f"{self.schema_name} call failed, retrying: {e}")
+                record_retry()
+                await asyncio.sleep(2**attempt)
+
+    async def _stream(
+        self,
+        input: Sequence[AnyMessage],
+        config: Optional[RunnableConfig],
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        # a stream can only be retried until its first chunk was passed on
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            started = False
+            try:
+                async with rate_limiter.slot(estimate_call_tokens(input)) as slot:
+                    async for output in self.structured_llm.astream(
+                        input, slot.config(config), **kwargs
+                    ):
+                        started = True
+                        yield output
+                return
+            except Exception as e:
+                if started or attempt == LLM_MAX_RETRIES or not is_retryable_error(e):
+                    raise
+                logger.warning(f"{self.schema_name} call failed, retrying: {e}")
+                record_retry()
+                await asyncio.sleep(2**attempt)
+
+    def _dump(self, output: Any) -> Any:
+        if isinstance(output, BaseModel):
+            return output.model_dump(mode="json")
+        return output
+
+    def _load(self, response: Any) -> Any:
+        if isinstance(self.schema, dict):
+            return response
+        return self.schema.model_validate(response)
+
+
+def cached_structured_output(llm_config: LLMConfig, schema: Schema) -> Runnable:
+    return CachedStructuredLLM(llm_config, schema)
@@ -12,10 +12,10 @@ tools: list[BaseTool] = []
 tools_by_name = {tool.name: tool for tool in tools}
 
 
-def call_tool(state: OverallState, config: RunnableConfig) -> OverallState:
+async def call_tool(state: OverallState, config: RunnableConfig) -> OverallState:
     outputs = []
     for tool_call in state["messages"][-1].tool_calls:
-        tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+        tool_result = await tools_by_name[tool_call["name"]].ainvoke(tool_call["args"])
         outputs.append(
             ToolMessage(
                 content=tool_result,
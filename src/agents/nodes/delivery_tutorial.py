@@ -1,14 +1,17 @@
 import logging
 from typing import Dict, List
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AnyMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 
 from src.types import Slide
 
+from ..fingerprints import stage_plan
+from ..generation import map_slides, per_slide_enabled
+from ..llm import GENERATION_LLM
+from ..llm_cache import cached_structured_output
 from ..state import OverallState
 
 logger = logging.getLogger("easeai")
@@ -24,12 +27,8 @@ class DeliveryTutorialResponse(BaseModel):
 
 
 # llm
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    max_retries=2,
-)
-structured_llm = llm.with_structured_output(DeliveryTutorialResponse)
+structured_llm = cached_structured_output(GENERATION_LLM, DeliveryTutorialResponse)
+structured_slide_llm = cached_structured_output(GENERATION_LLM, DeliveryTutorialContent)
 
 # prompts
 delivery_tutorial_prompt = PromptTemplate(
@@ -39,8 +38,8 @@ Your goal is to generate delivery tutorials for each slide in the presentation.
 # Current Presentation Plan:
 {current_plan}
 
-# Current Slides:
-{current_slides}
+# Slide Outlines:
+{slide_outlines}
 
 Create detailed delivery tutorials that will help the presenter deliver each slide with confidence and impact.
 Focus on:
@@ -58,7 +57,7 @@ The delivery tutorials should be practical, actionable advice that transforms go
 They should help presenters connect with their audience and deliver memorable experiences.""",  # noqa: E501
     input_variables=[
         "current_plan",
-        "current_slides",
+        "slide_outlines",
     ],
 )
 step_instructions = (
@@ -68,29 +67,52 @@ step_instructions = (
     "Return a list of DeliveryTutorialContent objects with slide numbers and delivery tutorials."  # noqa: E501
 )
 
+single_slide_instructions = (
+    "Generate a comprehensive delivery tutorial for this slide only: {slide}. "
+    "Focus on actionable advice for presenting this slide with confidence and impact. "
+    "Return a DeliveryTutorialContent object with the slide number and delivery tutorial."  # noqa: E501
+)
+
 
 # node
-def delivery_tutorial(state: OverallState, config: RunnableConfig) -> OverallState:
-    slides = state.get("slides", {})
-    current_slides = "\n".join(str(slide) for slide in slides.values())
+async def delivery_tutorial(
+    state: OverallState, config: RunnableConfig
+) -> OverallState:
+    slides = state.get("slides") or {}
+    slide_outlines = "\n".join(str(slide) for slide in slides.values())
     system = delivery_tutorial_prompt.format(
-        current_plan=state.get("presentation_plan"),
-        current_slides=current_slides,
+        current_plan=stage_plan("delivery_tutorial", state.get("presentation_plan")),
+        slide_outlines=slide_outlines,
     )
     logger.debug(f"System prompt: {system}")
-    messages = (
-        [SystemMessage(content=system)]
-        + state.get("messages", [])
-        + [SystemMessage(content=step_instructions)]
-    )
-    response: DeliveryTutorialResponse = structured_llm.invoke(messages, config)
+    messages = [SystemMessage(content=system)] + state.get("messages", [])
 
     # Create dictionary of delivery tutorial updates
     tutorial_updates: Dict[int, Slide] = {}
-    for tutorial_content in response.slides:
-        tutorial_updates[tutorial_content.slide_number] = Slide(
-            delivery_tutorial=tutorial_content.delivery_tutorial
+    if per_slide_enabled(config):
+
+        def slide_messages(outline: Slide) -> List[AnyMessage]:
+            instructions = single_slide_instructions.format(slide=outline)
+            return messages + [SystemMessage(content=instructions)]
+
+        responses: Dict[int, DeliveryTutorialContent] = await map_slides(
+            structured_slide_llm,
+            slides,
+            slide_messages,
+            config,
+        )
+        for slide_number, tutorial_content in responses.items():
+            tutorial_updates[slide_number] = Slide(
+                delivery_tutorial=tutorial_content.delivery_tutorial
+            )
+    else:
+        response: DeliveryTutorialResponse = await structured_llm.ainvoke(
+            messages + [SystemMessage(content=step_instructions)], config
         )
+        for tutorial_content in response.slides:
+            tutorial_updates[tutorial_content.slide_number] = Slide(
+                delivery_tutorial=tutorial_content.delivery_tutorial
+            )
 
     return {
         "slides": tutorial_updates,
@@ -1,14 +1,17 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from langchain_core.messages import SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel, Field
 
-from src.types import Slide
+from src.documents import format_chunks, retrieve_chunks
+from src.types import PresentationPlan, Slide
 
+from ..fingerprints import stage_plan
+from ..llm import GENERATION_LLM
+from ..llm_cache import cached_structured_output
 from ..state import InputState, OverallState
 
 logger = logging.getLogger("easeai")
@@ -27,12 +30,7 @@ class OutlineResponse(BaseModel):
 
 
 # llm
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    max_retries=2,
-)
-structured_llm = llm.with_structured_output(OutlineResponse)
+structured_llm = cached_structured_output(GENERATION_LLM, OutlineResponse)
 
 # prompts
 planner_prompt = PromptTemplate(
@@ -40,11 +38,22 @@ planner_prompt = PromptTemplate(
 Your goal is to help users build and refine their presentation plan through conversation.
 
 # Current Presentation Plan:
-{current_plan}""",  # noqa: E501
+{current_plan}{research}""",  # noqa: E501
     input_variables=[
         "current_plan",
+        "research",
     ],
 )
+research_prompt = PromptTemplate(
+    template="""
+
+# Research Excerpts:
+Excerpts from the user's research documents relevant to the presentation.
+Build the outline on them where they apply.
+
+{excerpts}""",
+    input_variables=["excerpts"],
+)
 step_instructions = (
     "The current stage is to build a slide outline based on the presentation plan."
     "Think over what would make a compelling presentation and how to structure it."
@@ -52,10 +61,27 @@ step_instructions = (
 )
 
 
+async def research_for(plan: Optional[PresentationPlan], config: RunnableConfig) -> str:
+    """Retrieve the research relevant to the plan's topic."""
+    if plan is None:
+        return ""
+    query = "\n".join(
+        part for part in (plan.title, plan.objective, plan.research_summary) if part
+    )
+    configurable = config["configurable"]
+    chunks = await retrieve_chunks(
+        configurable["db_session"], configurable["project_id"], query
+    )
+    if not chunks:
+        return ""
+    return research_prompt.format(excerpts=format_chunks(chunks))
+
+
 # node
-def outline(state: InputState, config: RunnableConfig) -> OverallState:
+async def outline(state: InputState, config: RunnableConfig) -> OverallState:
     system = planner_prompt.format(
-        current_plan=state.get("presentation_plan"),
+        current_plan=stage_plan("outline", state.get("presentation_plan")),
+        research=await research_for(state.get("presentation_plan"), config),
     )
     logger.debug(f"System prompt: {system}")
     messages = (
@@ -63,7 +89,7 @@ def outline(state: InputState, config: RunnableConfig) -> OverallState:
         + state.get("messages", [])
         + [SystemMessage(content=step_instructions)]
     )
-    response: OutlineResponse = structured_llm.invoke(messages, config)
+    response: OutlineResponse = await structured_llm.ainvoke(messages, config)
 
     # Convert outlines to Slide objects and create dictionary
     slides_dict = {}
@@ -1,15 +1,18 @@
 import logging
 from typing import Optional
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.config import get_stream_writer
 from pydantic import BaseModel, Field
 
 from src.database import MessagesAdapter, PresentationPlanAdapter
+from src.documents import format_chunks, retrieve_chunks
 from src.types import PresentationPlan
 
+from ..llm import GENERATION_LLM
+from ..llm_cache import cached_structured_output
 from ..state import OverallState
 
 logger = logging.getLogger("easeai")
@@ -23,12 +26,11 @@ class PlannerResponse(BaseModel):
 
 
 # llm
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    max_retries=2,
+# a JSON schema (rather than the model class) makes the parser yield partial dicts
+# while streaming, so the response text can be forwarded as it is decoded
+structured_planner = cached_structured_output(
+    GENERATION_LLM, PlannerResponse.model_json_schema()
 )
-structured_planner = llm.with_structured_output(PlannerResponse)
 
 # prompts
 planner_prompt = PromptTemplate(
@@ -40,33 +42,80 @@ Take initiative to ask questions and provide guidance to the user.
 Return the plan edits as a JSON object along with a response to the user.
 
 # Current Presentation Plan:
-{current_plan}""",  # noqa: E501
+{current_plan}{research}""",  # noqa: E501
     input_variables=[
         "current_plan",
+        "research",
     ],
 )
+research_prompt = PromptTemplate(
+    template="""
 
+# Research Excerpts:
+Excerpts from the user's research documents relevant to their last message.
+Use them to inform the plan and your answers.
 
-def planner(state: OverallState, config: RunnableConfig) -> OverallState:
+{excerpts}""",
+    input_variables=["excerpts"],
+)
+
+
+async def research_for(state: OverallState, config: RunnableConfig) -> str:
+    """Retrieve the research relevant to the user's last message, searching
+    that message's attachments if it had any."""
+    query = next(
+        (
+            str(message.content)
+            for message in reversed(state.get("messages", []))
+            if isinstance(message, HumanMessage)
+        ),
+        "",
+    )
+    configurable = config["configurable"]
+    chunks = await retrieve_chunks(
+        configurable["db_session"],
+        configurable["project_id"],
+        query,
+        document_ids=configurable.get("attachments"),
+    )
+    if not chunks:
+        return ""
+    return research_prompt.format(excerpts=format_chunks(chunks))
+
+
+async def planner(state: OverallState, config: RunnableConfig) -> OverallState:
     system = planner_prompt.format(
         current_plan=state.get("presentation_plan"),
+        research=await research_for(state, config),
     )
     logger.debug(f"System prompt: {system}")
     messages = [SystemMessage(content=system)] + state.get("messages", [])
-    response: PlannerResponse = structured_planner.invoke(messages, config)
+
+    # stream the response text to any listener, then validate the final output
+    writer = get_stream_writer()
+    streamed_text = ""
+    output: dict = {}
+    async for output in structured_planner.astream(messages, config):
+        text = output.get("response") or ""
+        if len(text) > len(streamed_text):
+            writer({"response": text[len(streamed_text) :]})
+            streamed_text = text
+    response = PlannerResponse.model_validate(output)
 
     # update database
     db_session = config["configurable"]["db_session"]
     project_id = config["configurable"]["project_id"]
     messages_adapter = MessagesAdapter(db_session)
-    messages_adapter.create_message(
+    await messages_adapter.create_message(
         project_id=project_id,
         role="ai",
         content=response.response,
     )
     if response.presentation_plan:
         presentation_plan_adapter = PresentationPlanAdapter(db_session)
-        presentation_plan_adapter.update_plan(project_id, response.presentation_plan)
+        await presentation_plan_adapter.update_plan(
+            project_id, response.presentation_plan
+        )
     return {
         "messages": [response.response],
         "presentation_plan": response.presentation_plan,
@@ -1,14 +1,17 @@
 import logging
 from typing import Dict, List
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AnyMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 
 from src.types import Slide
 
+from ..fingerprints import stage_plan
+from ..generation import map_slides, per_slide_enabled
+from ..llm import GENERATION_LLM
+from ..llm_cache import cached_structured_output
 from ..state import OverallState
 
 logger = logging.getLogger("easeai")
@@ -24,12 +27,8 @@ class SlideContentResponse(BaseModel):
 
 
 # llm
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    max_retries=2,
-)
-structured_llm = llm.with_structured_output(SlideContentResponse)
+structured_llm = cached_structured_output(GENERATION_LLM, SlideContentResponse)
+structured_slide_llm = cached_structured_output(GENERATION_LLM, SlideContent)
 
 # prompts
 slide_generator_prompt = PromptTemplate(
@@ -67,27 +66,48 @@ step_instructions = (
     "Return a list of SlideContent objects with slide numbers and content strings."
 )
 
+single_slide_instructions = (
+    "Generate the complete slide content as HTML/CSS/JS for this slide only: {slide}. "
+    "The content should be production-ready and consistent with the rest of the deck. "
+    "Return a SlideContent object with the slide number and content string."
+)
+
 
 # node
-def slide(state: OverallState, config: RunnableConfig) -> OverallState:
-    slides = state.get("slides", {})
+async def slide(state: OverallState, config: RunnableConfig) -> OverallState:
+    slides = state.get("slides") or {}
     slide_outlines = "\n".join(str(slide) for slide in slides.values())
     system = slide_generator_prompt.format(
-        current_plan=state.get("presentation_plan"),
+        current_plan=stage_plan("content", state.get("presentation_plan")),
         slide_outlines=slide_outlines,
     )
     logger.debug(f"System prompt: {system}")
-    messages = (
-        [SystemMessage(content=system)]
-        + state.get("messages", [])
-        + [SystemMessage(content=step_instructions)]
-    )
-    response: SlideContentResponse = structured_llm.invoke(messages, config)
+    messages = [SystemMessage(content=system)] + state.get("messages", [])
 
     # Create dictionary of slide content updates
     slide_updates: Dict[int, Slide] = {}
-    for slide_content in response.slides:
-        slide_updates[slide_content.slide_number] = Slide(content=slide_content.content)
+    if per_slide_enabled(config):
+
+        def slide_messages(outline: Slide) -> List[AnyMessage]:
+            instructions = single_slide_instructions.format(slide=outline)
+            return messages + [SystemMessage(content=instructions)]
+
+        responses: Dict[int, SlideContent] = await map_slides(
+            structured_slide_llm,
+            slides,
+            slide_messages,
+            config,
+        )
+        for slide_number, slide_content in responses.items():
+            slide_updates[slide_number] = Slide(content=slide_content.content)
+    else:
+        response: SlideContentResponse = await structured_llm.ainvoke(
+            messages + [SystemMessage(content=step_instructions)], config
+        )
+        for slide_content in response.slides:
+            slide_updates[slide_content.slide_number] = Slide(
+                content=slide_content.content
+            )
 
     return {
         "slides": slide_updates,
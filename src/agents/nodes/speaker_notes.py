@@ -1,14 +1,17 @@
 import logging
 from typing import Dict, List
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AnyMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 
 from src.types import Slide
 
+from ..fingerprints import stage_plan
+from ..generation import map_slides, per_slide_enabled
+from ..llm import GENERATION_LLM
+from ..llm_cache import cached_structured_output
 from ..state import OverallState
 
 logger = logging.getLogger("easeai")
@@ -24,12 +27,8 @@ class SpeakerNotesResponse(BaseModel):
 
 
 # llm
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    max_retries=2,
-)
-structured_llm = llm.with_structured_output(SpeakerNotesResponse)
+structured_llm = cached_structured_output(GENERATION_LLM, SpeakerNotesResponse)
+structured_slide_llm = cached_structured_output(GENERATION_LLM, SpeakerNotesContent)
 
 # prompts
 speaker_notes_prompt = PromptTemplate(
@@ -39,8 +38,8 @@ Your goal is to generate comprehensive speaker notes for each slide in the prese
 # Current Presentation Plan:
 {current_plan}
 
-# Current Slides:
-{current_slides}
+# Slide Outlines:
+{slide_outlines}
 
 Create detailed speaker notes that will help the presenter deliver an engaging and informative presentation.
 Focus on:
@@ -56,7 +55,7 @@ The speaker notes should be conversational and natural, helping the presenter so
 They should complement the slide content without simply repeating it.""",  # noqa: E501
     input_variables=[
         "current_plan",
-        "current_slides",
+        "slide_outlines",
     ],
 )
 step_instructions = (
@@ -66,29 +65,50 @@ step_instructions = (
     "Return a list of SpeakerNotesContent objects with slide numbers and speaker notes."
 )
 
+single_slide_instructions = (
+    "Generate comprehensive speaker notes for this slide only: {slide}. "
+    "The notes should flow naturally from the previous slide and into the next one. "
+    "Return a SpeakerNotesContent object with the slide number and speaker notes."
+)
+
 
 # node
-def speaker_notes(state: OverallState, config: RunnableConfig) -> OverallState:
-    slides = state.get("slides", {})
-    current_slides = "\n".join(str(slide) for slide in slides.values())
+async def speaker_notes(state: OverallState, config: RunnableConfig) -> OverallState:
+    slides = state.get("slides") or {}
+    slide_outlines = "\n".join(str(slide) for slide in slides.values())
     system = speaker_notes_prompt.format(
-        current_plan=state.get("presentation_plan"),
-        current_slides=current_slides,
+        current_plan=stage_plan("speaker_notes", state.get("presentation_plan")),
+        slide_outlines=slide_outlines,
     )
     logger.debug(f"System prompt: {system}")
-    messages = (
-        [SystemMessage(content=system)]
-        + state.get("messages", [])
-        + [SystemMessage(content=step_instructions)]
-    )
-    response: SpeakerNotesResponse = structured_llm.invoke(messages, config)
+    messages = [SystemMessage(content=system)] + state.get("messages", [])
 
     # Create dictionary of speaker notes updates
     notes_updates: Dict[int, Slide] = {}
-    for notes_content in response.slides:
-        notes_updates[notes_content.slide_number] = Slide(
-            speaker_notes=notes_content.speaker_notes
+    if per_slide_enabled(config):
+
+        def slide_messages(outline: Slide) -> List[AnyMessage]:
+            instructions = single_slide_instructions.format(slide=outline)
+            return messages + [SystemMessage(content=instructions)]
+
+        responses: Dict[int, SpeakerNotesContent] = await map_slides(
+            structured_slide_llm,
+            slides,
+            slide_messages,
+            config,
+        )
+        for slide_number, notes_content in responses.items():
+            notes_updates[slide_number] = Slide(
+                speaker_notes=notes_content.speaker_notes
+            )
+    else:
+        response: SpeakerNotesResponse = await structured_llm.ainvoke(
+            messages + [SystemMessage(content=step_instructions)], config
         )
+        for notes_content in response.slides:
+            notes_updates[notes_content.slide_number] = Slide(
+                speaker_notes=notes_content.speaker_notes
+            )
 
     return {
         "slides": notes_updates,
@@ -4,12 +4,13 @@ from langchain_core.runnables import RunnableConfig
 
 from src.database import SlidesAdapter
 
+from ..fingerprints import slide_fingerprints
 from ..state import OverallState
 
 logger = logging.getLogger("easeai")
 
 
-def write_results(state: OverallState, config: RunnableConfig) -> OverallState:
+async def write_results(state: OverallState, config: RunnableConfig) -> OverallState:
     """Write generated slides to database."""
     db_session = config["configurable"]["db_session"]
     project_id = config["configurable"]["project_id"]
@@ -20,15 +21,23 @@ def write_results(state: OverallState, config: RunnableConfig) -> OverallState:
         logger.warning("No slides data found to write to database")
         return {}
 
-    # Save each slide individually
     slides_adapter = SlidesAdapter(db_session)
-
-    for slide_num, slide in slides_data.items():
-        # Check if slide already exists for this project and slide number
-        if slides_adapter.slide_exists(project_id, slide_num):
-            slides_adapter.update_slide(project_id, slide_num, slide)
-        else:
-            slides_adapter.create_slide(project_id, slide)
+    plan = state.get("presentation_plan")
+
+    # Save the whole deck at once, remembering what each slide was generated
+    # from for incremental regeneration
+    await slides_adapter.upsert_slides(
+        project_id,
+        [
+            slide.model_copy(
+                update={
+                    "slide_number": slide_num,
+                    "fingerprints": slide_fingerprints(plan, slide),
+                }
+            )
+            for slide_num, slide in sorted(slides_data.items())
+        ],
+    )
 
     logger.info(
         f"Successfully wrote {len(slides_data)} slides to database "
@@ -0,0 +1,282 @@
+"""Adaptive rate limiting for LLM calls.
+
+Every structured LLM call that misses the cache takes a slot from the process
+wide `rate_limiter` first. Request and token buckets pace calls to the
+provider quota, and the number of calls in flight follows AIMD: it grows by
+one for every window of successful calls and halves when the provider answers
+429, so throughput settles just under the quota instead of overshooting it and
+backing off.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Deque, Dict, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AnyMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from src.database import RateLimitAdapter, get_db_session
+from src.utils import estimate_tokens
+from src.utils.metrics import registry
+
+logger = logging.getLogger("easeai")
+
+# provider quota, 0 leaves the bucket out
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# keep the buckets in Postgres so every API and worker process shares the quota
+LLM_RATE_LIMIT_SHARED = os.getenv("LLM_RATE_LIMIT_SHARED", "false").lower() == "true"
+LLM_RATE_LIMIT_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_BACKOFF", "2"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# completion tokens reserved up front, corrected once the call reports its usage
+LLM_ESTIMATED_OUTPUT_TOKENS = int(os.getenv("LLM_ESTIMATED_OUTPUT_TOKENS", "1000"))
+
+rate_limited = registry.counter(
+    "easeai_llm_rate_limited_total", "LLM calls rejected by the provider quota"
+)
+limiter_wait = registry.histogram(
+    "easeai_llm_limiter_wait_seconds", "Time LLM calls waited for the rate limiter"
+)
+
+
+def error_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, looking through wrapped exceptions."""
+    current: Optional[BaseException] = error
+    while current is not None:
+        for attribute in ("code", "status_code"):
+            code = getattr(current, attribute, None)
+            if isinstance(code, int):
+                return int(code)
+        current = current.__cause__ or current.__context__
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return error_code(error) == 429
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    code = error_code(error)
+    return code is not None and (code == 429 or code >= 500)
+
+
+def estimate_call_tokens(messages: Sequence[AnyMessage]) -> int:
+    prompt = sum(estimate_tokens(str(message.content)) for message in messages)
+    return prompt + LLM_ESTIMATED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """In process bucket refilled at `per_minute` up to one minute's worth.
+
+    Reservations are taken straight away and may leave the bucket in debt, the
+    caller then waits until the debt is refilled. Callers are served in order
+    and token estimates can be corrected after the call.
+    """
+
+    def __init__(self, name: str, per_minute: float) -> None:
+        self.name = name
+        self.per_minute = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def reserve(self, amount: float) -> float:
+        """Take `amount` and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.updated
+            self.tokens = min(
+                self.per_minute, self.tokens + elapsed * self.per_minute / 60
+            )
+            self.updated = now
+            self.tokens -= amount
+            return self._wait(self.tokens)
+
+    def _wait(self, tokens: float) -> float:
+        return max(0.0, -tokens * 60 / self.per_minute)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Bucket kept in Postgres, shared by every process using the database."""
+
+    async def reserve(self, amount: float) -> float:
+        try:
+            async with get_db_session() as session:
+                tokens = await RateLimitAdapter(session).reserve(
+                    self.name, amount, self.per_minute
+                )
+        except Exception as e:
+            logger.warning(f"Shared rate limit bucket {self.name} failed: {e}")
+            return await super().reserve(amount)
+        return self._wait(tokens)
+
+
+class Slot:
+    """A granted LLM call, collecting the tokens it actually used."""
+
+    def __init__(self, estimated_tokens: int) -> None:
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens: Optional[int] = None
+
+    def config(self, config: Optional[RunnableConfig]) -> RunnableConfig:
+        return merge_configs(config, {"callbacks": [UsageCallbackHandler(self)]})
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    run_inline = True
+
+    def __init__(self, slot: Slot) -> None:
+        self.slot = slot
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        used = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                used += usage.get("total_tokens", 0)
+        if used:
+            self.slot.used_tokens = (self.slot.used_tokens or 0) + used
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        shared: bool,
+    ) -> None:
+        bucket = SharedTokenBucket if shared else TokenBucket
+        self.requests = (
+            bucket("llm_requests", requests_per_minute)
+            if requests_per_minute > 0
+            else None
+        )
+        self.tokens = (
+            bucket("llm_tokens", tokens_per_minute) if tokens_per_minute > 0 else None
+        )
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncGenerator[Slot, None]:
+        """Wait for a concurrency slot and quota, then run one LLM call.
+
+        A 429 raised inside the block halves the concurrency limit and pauses
+        new calls for the backoff, a clean exit grows the limit again.
+        """
+        start = time.monotonic()
+        await self._acquire()
+        try:
+            wait = self.blocked_until - time.monotonic()
+            if self.requests:
+                wait = max(wait, await self.requests.reserve(1))
+            if self.tokens:
+                wait = max(wait, await self.tokens.reserve(estimated_tokens))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            limiter_wait.observe(time.monotonic() - start)
+
+            slot = Slot(estimated_tokens)
+            try:
+                yield slot
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self._decrease()
+                raise
+            self._increase()
+
+            if self.tokens and slot.used_tokens is not None:
+                await self.tokens.reserve(slot.used_tokens - estimated_tokens)
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "waiting": len(self._waiters),
+            }
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if not self._waiters and self.active < int(self.limit):
+                self.active += 1
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                    return_slot = False
+                else:
+                    # the slot was handed over before the cancellation landed
+                    return_slot = future.done() and not future.cancelled()
+            if return_slot:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            self.active -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.active < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.active += 1
+            future.get_loop().call_soon_threadsafe(self._hand_over, future)
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        if future.done():
+            # the waiter was cancelled after it was picked
+            self._release()
+        else:
+            future.set_result(None)
+
+    def _increase(self) -> None:
+        with self._lock:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._wake()
+
+    def _decrease(self) -> None:
+        rate_limited.inc()
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + LLM_RATE_LIMIT_BACKOFF)
+            # calls in flight when the quota ran out fail together, count them once
+            if now - self._last_decrease < LLM_RATE_LIMIT_BACKOFF or self.limit <= 1:
+                return
+            self._last_decrease = now
+            self.limit = max(1.0, self.limit / 2)
+            limit = self.limit
+        logger.warning(f"LLM rate limited, concurrency limit lowered to {limit:.1f}")
+
+
+rate_limiter = AdaptiveRateLimiter(
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    shared=LLM_RATE_LIMIT_SHARED,
+)
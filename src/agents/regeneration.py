@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Set
+from uuid import UUID
+
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import PresentationPlanAdapter, SlidesAdapter
+from src.types import ProjectPhase, Slide, update_slides
+
+from .context import build_context
+from .fingerprints import (
+    SLIDE_FIELDS,
+    field_fingerprint,
+    outline_fingerprint,
+    stale_fields,
+)
+from .instrumentation import instrument_node
+from .nodes import delivery_tutorial, outline, slide, speaker_notes
+from .state import OverallState
+
+logger = logging.getLogger("easeai")
+
+# graph node that generates each slide field
+FIELD_NODES = {
+    "content": instrument_node("slide", slide),
+    "speaker_notes": instrument_node("speaker_notes", speaker_notes),
+    "delivery_tutorial": instrument_node("delivery_tutorial", delivery_tutorial),
+}
+outline_node = instrument_node("outline", outline)
+
+
+def apply_instructions(
+    slides: Dict[int, Slide],
+    instructions: str,
+    slide_number: Optional[int],
+    fields: Sequence[str],
+) -> None:
+    targets = [slide_number] if slide_number is not None else list(slides)
+    for number in targets:
+        current = slides[number]
+        updated = dict(current.instructions or {})
+        updated.update({field: instructions for field in fields})
+        slides[number] = current.model_copy(update={"instructions": updated})
+
+
+def merge_outline(
+    slides: Dict[int, Slide], outlines: Dict[int, Slide], outline_fp: str
+) -> Dict[int, Slide]:
+    """Replace the outline entries of slides built from an older outline,
+    keeping their content.
+
+    Slides whose outline fingerprint still matches are kept as they are.
+    Fields of slides whose entry changed are picked up as stale by their
+    fingerprints, outdated slides missing from the new outline are dropped.
+    """
+    merged = {
+        number: current
+        for number, current in slides.items()
+        if (current.fingerprints or {}).get("outline") == outline_fp
+    }
+    for number, entry in outlines.items():
+        if number in merged:
+            continue
+        if number not in slides:
+            merged[number] = entry
+            continue
+        merged[number] = slides[number].model_copy(
+            update={
+                "title": entry.title,
+                "description": entry.description,
+                "time_spent_on_slide": entry.time_spent_on_slide,
+            }
+        )
+    return merged
+
+
+async def regenerate_stale_slides(
+    db: AsyncSession,
+    project_id: UUID,
+    config: RunnableConfig,
+    instructions: Optional[str] = None,
+    slide_number: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Slide]:
+    """Regenerate only the slide fields whose inputs changed.
+
+    Each slide field stores a fingerprint of the plan fields, outline entry
+    and instructions it was generated from. The outline is rebuilt only when
+    its plan fields changed, then every generation stage runs once over just
+    its stale slides, with the stages running in parallel.
+    """
+    plan = await PresentationPlanAdapter(db).get_plan(project_id)
+    slides_adapter = SlidesAdapter(db)
+    slides: Dict[int, Slide] = {
+        slide.slide_number: slide
+        for slide in await slides_adapter.get_slides(project_id)
+        if slide.slide_number is not None
+    }
+
+    if instructions:
+        apply_instructions(slides, instructions, slide_number, fields or SLIDE_FIELDS)
+
+    state: OverallState = {
+        "messages": await build_context(db, project_id),
+        "project_phase": ProjectPhase.REVIEW,
+        "presentation_plan": plan,
+        "slides": None,
+    }
+
+    outline_fp = outline_fingerprint(plan)
+    if any(
+        (slide.fingerprints or {}).get("outline") != outline_fp
+        for slide in slides.values()
+    ):
+        logger.info(f"Rebuilding outline for project {project_id}")
+        outlines = (await outline_node(state, config)).get("slides") or {}
+        slides = merge_outline(slides, outlines, outline_fp)
+
+    # stale slides per field, each only carrying the instructions for that field
+    stale: Dict[str, Dict[int, Slide]] = {field: {} for field in SLIDE_FIELDS}
+    for number, current in slides.items():
+        for field in stale_fields(plan, current):
+            field_instructions = (current.instructions or {}).get(field)
+            stale[field][number] = current.model_copy(
+                update={
+                    "instructions": (
+                        {field: field_instructions} if field_instructions else None
+                    )
+                }
+            )
+
+    regenerated: Dict[str, Set[int]] = {field: set() for field in SLIDE_FIELDS}
+    stages = {
+        field: stale_slides for field, stale_slides in stale.items() if stale_slides
+    }
+    if stages:
+        logger.info(
+            f"Regenerating {', '.join(f'{len(s)} {f}' for f, s in stages.items())} "
+            f"for project {project_id}"
+        )
+        outputs = await asyncio.gather(
+            *(
+                FIELD_NODES[field]({**state, "slides": stale_slides}, config)
+                for field, stale_slides in stages.items()
+            )
+        )
+        for field, output in zip(stages, outputs):
+            updates = {
+                number: update
+                for number, update in (output.get("slides") or {}).items()
+                if number in stale[field]
+            }
+            regenerated[field].update(updates)
+            slides = update_slides(slides, updates)
+
+    # only fields that were actually regenerated get a new fingerprint
+    for number, current in slides.items():
+        fingerprints = dict(current.fingerprints or {})
+        fingerprints["outline"] = outline_fp
+        for field in SLIDE_FIELDS:
+            if getattr(current, field) is None:
+                continue
+            if number not in stale[field] or number in regenerated[field]:
+                fingerprints[field] = field_fingerprint(field, plan, current)
+        slides[number] = current.model_copy(update={"fingerprints": fingerprints})
+
+    ordered = [slides[number] for number in sorted(slides)]
+    await slides_adapter.upsert_slides(project_id, ordered)
+    return ordered
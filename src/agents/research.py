@@ -0,0 +1,246 @@
+"""Research summaries of a project's documents, built by map-reduce.
+
+Every chunk of a processed document is summarized on its own (map), with up
+to `RESEARCH_CONCURRENCY` calls in flight. Summaries are then merged in
+groups of up to `RESEARCH_REDUCE_FANOUT`, all groups of a level at once,
+until one is left (reduce): a document's chunk summaries into its summary,
+and the document summaries into the project's research summary. Merging n
+summaries takes about log(n) rounds of calls rather than n.
+
+Chunk and document summaries are stored, so a new document only maps its own
+chunks before the project summary is reduced again from the stored document
+summaries. Chunk prompts hold nothing but the chunk's text, so the LLM cache
+answers for chunks already summarized in another document.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, Field
+
+from src.database import DocumentsAdapter, ProjectsAdapter, get_db_session
+from src.types import Document
+from src.utils import estimate_tokens
+
+from .instrumentation import (
+    current_node,
+    current_run,
+    metrics_handler,
+    record,
+    track_run,
+)
+from .llm import SUMMARY_LLM
+from .llm_cache import cached_structured_output
+
+logger = logging.getLogger("easeai")
+
+RESEARCH_CONCURRENCY = int(os.getenv("RESEARCH_CONCURRENCY", "8"))
+RESEARCH_REDUCE_FANOUT = int(os.getenv("RESEARCH_REDUCE_FANOUT", "8"))
+# summaries merged by one call add up to at most this many tokens, unless
+# two of them alone are longer
+RESEARCH_REDUCE_TOKENS = int(os.getenv("RESEARCH_REDUCE_TOKENS", "6000"))
+
+
+class ResearchSummary(BaseModel):
+    summary: str = Field(description="The summary of the research")
+
+
+# llm
+structured_llm = cached_structured_output(SUMMARY_LLM, ResearchSummary)
+
+# prompts
+chunk_prompt = PromptTemplate(
+    template="""You are EaseAI, an AI assistant helping users create presentations.
+Your goal is to summarize an excerpt of a research document the user uploaded.
+
+# Excerpt:
+{content}
+
+Summarize the excerpt in a few sentences.
+Keep its claims, figures, names and dates; drop formatting and repetition.""",
+    input_variables=["content"],
+)
+merge_prompt = PromptTemplate(
+    template="""You are EaseAI, an AI assistant helping users create presentations.
+Your goal is to merge summaries of the user's research into one summary.
+
+# Summaries:
+{summaries}
+
+Merge the summaries into one summary no longer than the longest of them.
+Keep the findings most useful for a presentation, with their figures and sources.
+Combine points the summaries share and drop repetition.""",
+    input_variables=["summaries"],
+)
+
+
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+    """Attribute the LLM calls inside to `name` in the run's metrics."""
+    token = current_node.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, wall_time=time.perf_counter() - start)
+        current_node.reset(token)
+
+
+def _batch_config() -> RunnableConfig:
+    return RunnableConfig(
+        callbacks=[metrics_handler], max_concurrency=RESEARCH_CONCURRENCY
+    )
+
+
+def group_summaries(
+    summaries: Sequence[str],
+    fanout: int = RESEARCH_REDUCE_FANOUT,
+    token_budget: int = RESEARCH_REDUCE_TOKENS,
+) -> List[List[str]]:
+    """Split summaries, in order, into the groups merged by one call each.
+
+    Every group but a trailing one has at least two summaries, so each level
+    of the reduce has fewer summaries than the last.
+    """
+    groups: List[List[str]] = []
+    group: List[str] = []
+    tokens = 0
+    for summary in summaries:
+        summary_tokens = estimate_tokens(summary)
+        if len(group) >= max(fanout, 2) or (
+            len(group) >= 2 and tokens + summary_tokens > token_budget
+        ):
+            groups.append(group)
+            group, tokens = [], 0
+        group.append(summary)
+        tokens += summary_tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+async def reduce_summaries(summaries: Sequence[str]) -> Optional[str]:
+    """Merge summaries level by level until one is left."""
+    level = list(summaries)
+    while len(level) > 1:
+        groups = group_summaries(level)
+        merging = [group for group in groups if len(group) > 1]
+        responses = await structured_llm.abatch(
+            [
+                [
+                    SystemMessage(
+                        content=merge_prompt.format(
+                            summaries="\n\n".join(
+                                f"[{number}] {summary}"
+                                for number, summary in enumerate(group, 1)
+                            )
+                        )
+                    )
+                ]
+                for group in merging
+            ],
+            _batch_config(),
+        )
+        merged = iter(response.summary for response in responses)
+        level = [group[0] if len(group) == 1 else next(merged) for group in groups]
+    return level[0] if level else None
+
+
+async def summarize_document(document: Document) -> Optional[str]:
+    """Summarize the document's chunks that have no summary yet, then merge
+    all its chunk summaries into the document's summary.
+
+    Chunk summaries are stored as soon as they are made, so if some calls
+    fail only those chunks are summarized on the next attempt.
+    """
+    async with get_db_session() as session:
+        chunks = await DocumentsAdapter(session).get_chunks(document.id)
+
+    pending = [chunk for chunk in chunks if chunk.summary is None]
+    if pending:
+        with _stage("research_map"):
+            responses = await structured_llm.abatch(
+                [
+                    [SystemMessage(content=chunk_prompt.format(content=chunk.content))]
+                    for chunk in pending
+                ],
+                _batch_config(),
+                return_exceptions=True,
+            )
+        summaries = {
+            chunk.chunk_index: response.summary
+            for chunk, response in zip(pending, responses)
+            if not isinstance(response, Exception)
+        }
+        async with get_db_session() as session:
+            await DocumentsAdapter(session).save_chunk_summaries(document.id, summaries)
+        if len(summaries) < len(pending):
+            raise RuntimeError(
+                f"{len(pending) - len(summaries)} of {len(pending)} chunks of "
+                f"document {document.id} could not be summarized"
+            )
+        for chunk in pending:
+            chunk.summary = summaries[chunk.chunk_index]
+
+    with _stage("research_reduce"):
+        summary = await reduce_summaries(
+            [chunk.summary for chunk in chunks if chunk.summary]
+        )
+    if summary is not None:
+        async with get_db_session() as session:
+            await DocumentsAdapter(session).save_document_summary(document.id, summary)
+        logger.debug(
+            f"Summarized document {document.id} from {len(chunks)} chunks, "
+            f"{len(pending)} of them new"
+        )
+    return summary
+
+
+async def summarize_research(project_id: UUID) -> Optional[str]:
+    """Summarize the project's processed documents that have no summary yet
+    and merge all document summaries into the project's research summary.
+
+    The summary is stored on the project and copied into its presentation
+    plan. Documents that fail to summarize are left out until the next run.
+    """
+    async with track_run(project_id, "research") as run:
+        token = current_run.set(run)
+        try:
+            async with get_db_session() as session:
+                documents = await DocumentsAdapter(session).get_completed_documents(
+                    project_id
+                )
+
+            summaries: List[str] = []
+            for document in documents:
+                summary = document.summary
+                if summary is None:
+                    try:
+                        summary = await summarize_document(document)
+                    except Exception:
+                        logger.exception(f"Failed to summarize document {document.id}")
+                if summary:
+                    summaries.append(f"{document.name}:\n{summary}")
+
+            with _stage("research_reduce"):
+                research_summary = await reduce_summaries(summaries)
+        finally:
+            current_run.reset(token)
+
+    if research_summary is not None:
+        async with get_db_session() as session:
+            await ProjectsAdapter(session).set_research_summary(
+                project_id, research_summary
+            )
+        logger.info(
+            f"Summarized research of project {project_id} "
+            f"from {len(summaries)} documents"
+        )
+    return research_summary
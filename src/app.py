@@ -1,20 +1,43 @@
 """Main entry point for EaseAI."""
 
+import asyncio
 import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import agents
+from .database import dispose_engine
 from .routes import v1
 from .utils.logger import setup_logger
 
 setup_logger("easeai", logging.DEBUG)
 logger = logging.getLogger("easeai")
 
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    # the graph and LLM clients load in the background so the server starts
+    # answering health checks straight away
+    warmup = asyncio.create_task(agents.warmup()) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await agents.shutdown()
+    await dispose_engine()
+    logger.info("Shut down EaseAI API")
+
+
 app = FastAPI(
     title="EaseAI API",
     description="AI-powered presentation creation assistant API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
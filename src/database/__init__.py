@@ -1,61 +1,110 @@
 import logging
 import os
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from .conversation_summary_adapter import ConversationSummaryAdapter
+from .documents_adapter import DocumentsAdapter
+from .idempotency_adapter import IdempotencyAdapter
+from .jobs_adapter import JobsAdapter
+from .llm_cache_adapter import LLMCacheAdapter
 from .messages_adapter import MessagesAdapter
+from .metrics_adapter import MetricsAdapter
 from .presentation_plan_adapter import PresentationPlanAdapter
+from .project_locks_adapter import ProjectLocksAdapter
 from .projects_adapter import ProjectsAdapter
+from .rate_limit_adapter import RateLimitAdapter
 from .slides_adapter import SlidesAdapter
 from .sql_models import Base
 
 __all__ = [
     "Base",
+    "ConversationSummaryAdapter",
+    "DocumentsAdapter",
+    "IdempotencyAdapter",
+    "JobsAdapter",
+    "LLMCacheAdapter",
     "MessagesAdapter",
+    "MetricsAdapter",
     "PresentationPlanAdapter",
+    "ProjectLocksAdapter",
     "ProjectsAdapter",
+    "RateLimitAdapter",
     "SlidesAdapter",
     "create_tables",
     "get_db_session",
     "get_db",
-    "engine",
-    "SessionLocal",
+    "get_engine",
+    "dispose_engine",
 ]
 
 logger = logging.getLogger("easeai")
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError(
-        "Database connection string is not set in the environment variables."
-    )
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300, echo=False)
-logger.info(f"Connected to database at {DATABASE_URL}")
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_engine() -> AsyncEngine:
+    """Get the shared engine, creating it on first use.
 
-def create_tables() -> None:
-    Base.metadata.create_all(bind=engine)
+    Importing the app does not need a database, a missing DATABASE_URL only
+    fails the first request that touches it.
+    """
+    global _engine, _sessionmaker
+    if _engine is None:
+        if not DATABASE_URL:
+            raise ValueError(
+                "Database connection string is not set in the environment variables."
+            )
+        # postgresql+psycopg:// resolves to psycopg's async driver for an async engine
+        _engine = create_async_engine(
+            DATABASE_URL, pool_pre_ping=True, pool_recycle=300, echo=False
+        )
+        # objects stay usable after commit, attribute refreshes would need to await
+        _sessionmaker = async_sessionmaker(
+            bind=_engine, autoflush=False, expire_on_commit=False
+        )
+        logger.info(f"Connected to database at {DATABASE_URL}")
+    return _engine
 
 
-@contextmanager
-def get_db_session() -> Generator[Session, None, None]:
-    session = SessionLocal()
+async def dispose_engine() -> None:
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _sessionmaker = None
+
+
+async def create_tables() -> None:
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+@asynccontextmanager
+async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+    get_engine()
+    assert _sessionmaker is not None
+    session = _sessionmaker()
     try:
         yield session
-        session.commit()
+        await session.commit()
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
     finally:
-        session.close()
+        await session.close()
 
 
-def get_db() -> Generator[Session, None, None]:
-    with get_db_session() as session:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_db_session() as session:
         yield session
@@ -0,0 +1,226 @@
+"""Compressed storage for long generated text.
+
+`CompressedText` columns hold zlib compressed UTF-8, optionally against a
+preset dictionary. Slide HTML repeats the same style blocks and markup on
+every slide and in every deck, so a dictionary trained on existing slides
+lets even a single short slide compress well.
+
+Every value starts with a format byte, and values compressed against a
+dictionary also carry the dictionary's id. Old values stay readable after a
+new dictionary is trained, as long as the dictionaries they reference are
+kept in `COMPRESSION_DICTIONARY_DIR`. The newest dictionary there is used for
+writes. A process that reads a value written with a dictionary deployed after
+it started reads the directory again.
+
+Train a dictionary from the slides in the database with
+`python -m src.database.compression --size 32768`.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import struct
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger("easeai")
+
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+COMPRESSION_DICTIONARY_DIR = Path(
+    os.getenv("COMPRESSION_DICTIONARY_DIR", str(Path(__file__).parent / "dictionaries"))
+)
+# values shorter than this are stored as they are
+COMPRESSION_MIN_SIZE = 64
+# zlib only looks back 32 KiB, a longer dictionary is never used
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZLIB_DICTIONARY = b"\x02"
+
+# tags, style and script blocks of slide HTML
+SEGMENT_PATTERN = re.compile(
+    r"<style\b.*?</style>|<script\b.*?</script>|<[^>]+>|[^<]{8,}", re.DOTALL
+)
+
+Dictionary = Tuple[int, bytes]
+
+_dictionaries: Optional[Dict[int, bytes]] = None
+_write_dictionary: Optional[Dictionary] = None
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    return zlib.crc32(dictionary)
+
+
+def load_dictionaries(
+    reload: bool = False,
+) -> Tuple[Dict[int, bytes], Optional[Dictionary]]:
+    """Read the dictionaries once, or again with `reload`, returning them by
+    id and the newest one."""
+    global _dictionaries, _write_dictionary
+    if _dictionaries is None or reload:
+        dictionaries: Dict[int, bytes] = {}
+        newest: Optional[Dictionary] = None
+        # file names start with the training time, so the last one is newest
+        for path in sorted(COMPRESSION_DICTIONARY_DIR.glob("*.zdict")):
+            data = path.read_bytes()
+            newest = (dictionary_id(data), data)
+            dictionaries[newest[0]] = data
+        _write_dictionary = newest
+        _dictionaries = dictionaries
+    return _dictionaries, _write_dictionary
+
+
+def compress(text: str, dictionary: Optional[Dictionary] = None) -> bytes:
+    data = text.encode()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return RAW + data
+    if dictionary is None:
+        return ZLIB + zlib.compress(data, COMPRESSION_LEVEL)
+    key, zdict = dictionary
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict)
+    return (
+        ZLIB_DICTIONARY
+        + struct.pack(">I", key)
+        + compressor.compress(data)
+        + compressor.flush()
+    )
+
+
+def decompress(value: bytes) -> str:
+    kind, body = value[:1], value[1:]
+    if kind == RAW:
+        return body.decode()
+    if kind == ZLIB:
+        return zlib.decompress(body).decode()
+    if kind == ZLIB_DICTIONARY:
+        (key,) = struct.unpack(">I", body[:4])
+        zdict = load_dictionaries()[0].get(key)
+        if zdict is None:
+            zdict = load_dictionaries(reload=True)[0].get(key)
+        if zdict is None:
+            raise ValueError(f"Compression dictionary {key:08x} not found")
+        decompressor = zlib.decompressobj(zdict=zdict)
+        return (decompressor.decompress(body[4:]) + decompressor.flush()).decode()
+    raise ValueError(f"Unknown compression format {kind!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text stored compressed in a binary column."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Any) -> Any:
+        if value is None:
+            return None
+        return compress(value, load_dictionaries()[1])
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        if value is None:
+            return None
+        return decompress(bytes(value))
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """Build a zlib preset dictionary from the segments shared by samples.
+
+    Segments are scored by how many samples contain them times their length.
+    The best ones are placed at the end of the dictionary, where zlib reaches
+    them with the shortest distances.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        counts.update(set(SEGMENT_PATTERN.findall(sample)))
+
+    ranked = sorted(
+        (segment for segment, count in counts.items() if count > 1),
+        key=lambda segment: counts[segment] * len(segment),
+        reverse=True,
+    )
+    chosen = []
+    used = 0
+    for segment in ranked:
+        encoded = segment.encode()
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+async def train_from_slides(limit: int, size: int) -> Optional[Path]:
+    from sqlalchemy import select
+
+    from . import get_db_session
+    from .sql_models import SlideORM
+
+    # mypy types the columns of declarative_base models as Never
+    slides: Any = SlideORM
+    async with get_db_session() as session:
+        samples: List[str] = list(
+            await session.scalars(
+                select(slides.content)
+                .where(slides.content.is_not(None))
+                .order_by(slides.updated_at.desc())
+                .limit(limit)
+            )
+        )
+    dictionary = train_dictionary(samples, size)
+    if not dictionary:
+        logger.warning("Not enough slides to train a compression dictionary")
+        return None
+
+    plain = sum(len(zlib.compress(sample.encode())) for sample in samples)
+    trained = sum(len(compress(sample, (0, dictionary))) for sample in samples)
+    logger.info(
+        f"Trained a {len(dictionary)} byte dictionary on {len(samples)} slides, "
+        f"compressed size {plain} -> {trained} bytes"
+    )
+
+    COMPRESSION_DICTIONARY_DIR.mkdir(parents=True, exist_ok=True)
+    path = COMPRESSION_DICTIONARY_DIR / (
+        f"{int(time.time())}-{dictionary_id(dictionary):08x}.zdict"
+    )
+    path.write_bytes(dictionary)
+    return path
+
+
+def main() -> None:
+    from src.utils import setup_logger
+
+    parser = argparse.ArgumentParser(
+        description="Train a compression dictionary on slide content"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=1000, help="Most recent slides to sample"
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=MAX_DICTIONARY_SIZE,
+        help="Dictionary size in bytes",
+    )
+    args = parser.parse_args()
+
+    setup_logger("easeai", logging.INFO)
+    path = asyncio.run(
+        train_from_slides(args.samples, min(args.size, MAX_DICTIONARY_SIZE))
+    )
+    if path:
+        logger.info(
+            f"Wrote {path}, deploy it with the app so every process can read it"
+        )
+
+
+if __name__ == "__main__":
+    main()
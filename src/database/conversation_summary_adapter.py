@@ -0,0 +1,45 @@
+# mypy: disable-error-code="assignment"
+
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types import ConversationSummary
+from src.utils import estimate_tokens
+
+from .sql_models import ConversationSummaryORM
+
+
+class ConversationSummaryAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_summary(self, project_id: UUID) -> Optional[ConversationSummary]:
+        summary = await self.session.scalar(
+            select(ConversationSummaryORM).where(
+                ConversationSummaryORM.project_id == project_id
+            )
+        )
+        return summary.domain if summary else None
+
+    async def save_summary(
+        self, project_id: UUID, summary: str, summarized_sequence: int
+    ) -> ConversationSummary:
+        db_summary = await self.session.scalar(
+            select(ConversationSummaryORM).where(
+                ConversationSummaryORM.project_id == project_id
+            )
+        )
+        if not db_summary:
+            db_summary = ConversationSummaryORM(project_id=project_id)
+            self.session.add(db_summary)
+
+        db_summary.summary = summary
+        db_summary.summarized_sequence = summarized_sequence
+        db_summary.token_count = estimate_tokens(summary)
+        db_summary.updated_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return db_summary.domain
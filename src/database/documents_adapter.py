@@ -0,0 +1,305 @@
+# mypy: disable-error-code="assignment,arg-type"
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import (
+    Select,
+    and_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types import Document, DocumentChunk, ProcessingStatus
+from src.utils import estimate_tokens
+
+from .sql_models import DocumentChunkORM, DocumentORM
+
+
+def content_lock_key(content_hash: str) -> int:
+    # advisory locks are keyed by a signed 64 bit integer
+    return int.from_bytes(bytes.fromhex(content_hash[:16]), "big", signed=True)
+
+
+class DocumentsAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create_document(
+        self,
+        project_id: UUID,
+        name: str,
+        content_hash: str,
+        file_path: str,
+        file_size: int,
+        file_type: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> Document:
+        document = DocumentORM(
+            project_id=project_id,
+            name=name,
+            description=description,
+            file_type=file_type,
+            file_size=file_size,
+            processing_status=ProcessingStatus.PENDING.value,
+            file_path=file_path,
+            content_hash=content_hash,
+        )
+        self.session.add(document)
+        await self.session.flush()
+        return document.domain
+
+    async def _get_document_orm(
+        self, project_id: UUID, document_id: UUID
+    ) -> Optional[DocumentORM]:
+        return await self.session.scalar(
+            select(DocumentORM)
+            .where(DocumentORM.id == document_id)
+            .where(DocumentORM.project_id == project_id)
+        )
+
+    async def get_document(
+        self, project_id: UUID, document_id: UUID
+    ) -> Optional[Document]:
+        document = await self._get_document_orm(project_id, document_id)
+        return document.domain if document else None
+
+    async def get_documents(self, project_id: UUID) -> List[Document]:
+        documents = await self.session.scalars(
+            select(DocumentORM)
+            .where(DocumentORM.project_id == project_id)
+            .order_by(DocumentORM.upload_date, DocumentORM.id)
+        )
+        return [document.domain for document in documents]
+
+    async def delete_document(
+        self, project_id: UUID, document_id: UUID
+    ) -> Optional[Document]:
+        document = await self._get_document_orm(project_id, document_id)
+        if not document:
+            return None
+
+        await self.session.delete(document)
+        await self.session.flush()
+        return document.domain
+
+    async def lock_content(self, content_hash: str) -> None:
+        """Serialize storing and removing the file with this hash.
+
+        Held until the transaction ends, so a file is never removed while a
+        new document referencing it is being committed.
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(content_lock_key(content_hash)))
+        )
+
+    async def content_in_use(self, content_hash: str) -> bool:
+        return (
+            await self.session.scalar(
+                select(DocumentORM.id)
+                .where(DocumentORM.content_hash == content_hash)
+                .limit(1)
+            )
+            is not None
+        )
+
+    async def claim_document(
+        self, stale_after: timedelta, max_attempts: int
+    ) -> Optional[Document]:
+        """Claim the oldest document waiting to be processed.
+
+        Like jobs, documents whose worker hasn't finished within
+        `stale_after` are claimed again, and rows locked by other workers are
+        skipped.
+        """
+        stale_before = datetime.now(timezone.utc) - stale_after
+        document: Optional[DocumentORM] = await self.session.scalar(
+            select(DocumentORM)
+            .where(
+                or_(
+                    DocumentORM.processing_status == ProcessingStatus.PENDING.value,
+                    and_(
+                        DocumentORM.processing_status
+                        == ProcessingStatus.PROCESSING.value,
+                        DocumentORM.processing_started_at < stale_before,
+                    ),
+                )
+            )
+            .where(DocumentORM.processing_attempts < max_attempts)
+            .order_by(DocumentORM.upload_date)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if not document:
+            return None
+
+        document.processing_status = ProcessingStatus.PROCESSING.value
+        document.processing_attempts = document.processing_attempts + 1
+        document.processing_started_at = datetime.now(timezone.utc)
+        document.progress = 0.0
+        await self.session.flush()
+        return document.domain
+
+    async def update_progress(self, document_id: UUID, progress: float) -> None:
+        await self.session.execute(
+            update(DocumentORM)
+            .where(DocumentORM.id == document_id)
+            .values(progress=progress)
+        )
+
+    async def complete_document(
+        self, document_id: UUID, chunks: Sequence[str]
+    ) -> Optional[Document]:
+        """Replace the document's chunks and mark it completed."""
+        document = await self.session.get(DocumentORM, document_id)
+        if not document:
+            return None
+
+        await self.session.execute(
+            delete(DocumentChunkORM).where(DocumentChunkORM.document_id == document_id)
+        )
+        if chunks:
+            await self.session.execute(
+                insert(DocumentChunkORM),
+                [
+                    {
+                        "document_id": document_id,
+                        "project_id": document.project_id,
+                        "chunk_index": index,
+                        "content": chunk,
+                        "token_count": estimate_tokens(chunk),
+                    }
+                    for index, chunk in enumerate(chunks)
+                ],
+            )
+
+        document.processing_status = ProcessingStatus.COMPLETED.value
+        document.progress = 1.0
+        document.processing_error = None
+        document.chunk_count = len(chunks)
+        # summarized again from the new chunks
+        document.summary = None
+        await self.session.flush()
+        return document.domain
+
+    async def requeue_document(self, document_id: UUID, error: str) -> None:
+        await self._set_status(document_id, ProcessingStatus.PENDING, error)
+
+    async def fail_document(self, document_id: UUID, error: str) -> None:
+        await self._set_status(document_id, ProcessingStatus.FAILED, error)
+
+    async def _set_status(
+        self, document_id: UUID, status: ProcessingStatus, error: str
+    ) -> None:
+        await self.session.execute(
+            update(DocumentORM)
+            .where(DocumentORM.id == document_id)
+            .values(processing_status=status.value, processing_error=error)
+        )
+
+    async def get_processed_chunks(self, content_hash: str) -> Optional[List[str]]:
+        """Chunks of a completed document with this content, if there is one.
+
+        Identical uploads are only processed once.
+        """
+        document_id = await self.session.scalar(
+            select(DocumentORM.id)
+            .where(DocumentORM.content_hash == content_hash)
+            .where(DocumentORM.processing_status == ProcessingStatus.COMPLETED.value)
+            .limit(1)
+        )
+        if document_id is None:
+            return None
+        return list(
+            await self.session.scalars(
+                select(DocumentChunkORM.content)
+                .where(DocumentChunkORM.document_id == document_id)
+                .order_by(DocumentChunkORM.chunk_index)
+            )
+        )
+
+    async def get_chunks(self, document_id: UUID) -> List[DocumentChunk]:
+        chunks = await self.session.scalars(
+            select(DocumentChunkORM)
+            .where(DocumentChunkORM.document_id == document_id)
+            .order_by(DocumentChunkORM.chunk_index)
+        )
+        return [chunk.domain for chunk in chunks]
+
+    async def get_searchable_document_ids(
+        self, project_id: UUID, document_ids: Optional[Sequence[UUID]] = None
+    ) -> List[UUID]:
+        """Completed documents of the project, optionally only some of them."""
+        query: Select[Any] = (
+            select(DocumentORM.id)
+            .where(DocumentORM.project_id == project_id)
+            .where(DocumentORM.processing_status == ProcessingStatus.COMPLETED.value)
+        )
+        if document_ids is not None:
+            query = query.where(DocumentORM.id.in_(document_ids))
+        return list(await self.session.scalars(query))
+
+    async def get_chunks_at(
+        self, project_id: UUID, positions: Sequence[tuple[UUID, int]]
+    ) -> List[DocumentChunk]:
+        """Chunks by document and chunk index, in the order of `positions`."""
+        if not positions:
+            return []
+        chunks = await self.session.scalars(
+            select(DocumentChunkORM)
+            .where(DocumentChunkORM.project_id == project_id)
+            .where(
+                tuple_(DocumentChunkORM.document_id, DocumentChunkORM.chunk_index).in_(
+                    positions
+                )
+            )
+        )
+        by_position = {
+            (chunk.document_id, chunk.chunk_index): chunk
+            for chunk in (row.domain for row in chunks)
+        }
+        return [
+            by_position[position] for position in positions if position in by_position
+        ]
+
+    async def get_completed_documents(self, project_id: UUID) -> List[Document]:
+        documents = await self.session.scalars(
+            select(DocumentORM)
+            .where(DocumentORM.project_id == project_id)
+            .where(DocumentORM.processing_status == ProcessingStatus.COMPLETED.value)
+            .order_by(DocumentORM.upload_date, DocumentORM.id)
+        )
+        return [document.domain for document in documents]
+
+    async def save_chunk_summaries(
+        self, document_id: UUID, summaries: Dict[int, str]
+    ) -> None:
+        """Store summaries of a document's chunks, keyed by chunk index."""
+        if not summaries:
+            return
+        table = DocumentChunkORM.__table__
+        await self.session.execute(
+            update(table)
+            .where(table.c.document_id == document_id)
+            .where(table.c.chunk_index == bindparam("index"))
+            .values(summary=bindparam("chunk_summary")),
+            [
+                {"index": index, "chunk_summary": summary}
+                for index, summary in summaries.items()
+            ],
+        )
+
+    async def save_document_summary(self, document_id: UUID, summary: str) -> None:
+        await self.session.execute(
+            update(DocumentORM)
+            .where(DocumentORM.id == document_id)
+            .values(summary=summary)
+        )
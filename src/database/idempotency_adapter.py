@@ -0,0 +1,97 @@
+# mypy: disable-error-code="arg-type"
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, cast
+
+from sqlalchemy import CursorResult, and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types import IdempotencyRecord, IdempotencyStatus
+
+from .sql_models import IdempotencyKeyORM
+
+
+class IdempotencyAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def claim(
+        self,
+        key: str,
+        fingerprint: str,
+        ttl: timedelta,
+        processing_timeout: timedelta,
+    ) -> Optional[IdempotencyRecord]:
+        """Claim a key for a new request.
+
+        Returns None if the caller now owns the key, otherwise the record of
+        the request that holds it. Expired keys and keys whose request has
+        been processing for longer than `processing_timeout` are reclaimed.
+        """
+        now = datetime.now(timezone.utc)
+        await self.session.execute(
+            delete(IdempotencyKeyORM)
+            .where(IdempotencyKeyORM.key == key)
+            .where(
+                or_(
+                    IdempotencyKeyORM.created_at < now - ttl,
+                    and_(
+                        IdempotencyKeyORM.status == IdempotencyStatus.PROCESSING.value,
+                        IdempotencyKeyORM.created_at < now - processing_timeout,
+                    ),
+                )
+            )
+        )
+        claimed = await self.session.scalar(
+            insert(IdempotencyKeyORM)
+            .values(
+                key=key,
+                fingerprint=fingerprint,
+                status=IdempotencyStatus.PROCESSING.value,
+                created_at=now,
+            )
+            .on_conflict_do_nothing(index_elements=[IdempotencyKeyORM.key])
+            .returning(IdempotencyKeyORM.key)
+        )
+        if claimed is not None:
+            return None
+
+        existing: Optional[IdempotencyKeyORM] = await self.session.scalar(
+            select(IdempotencyKeyORM).where(IdempotencyKeyORM.key == key)
+        )
+        # released between the insert and the select, the caller tries again
+        if existing is None:
+            return await self.claim(key, fingerprint, ttl, processing_timeout)
+        return existing.domain
+
+    async def complete(self, key: str, response: Any) -> None:
+        await self.session.execute(
+            update(IdempotencyKeyORM)
+            .where(IdempotencyKeyORM.key == key)
+            .values(
+                status=IdempotencyStatus.COMPLETED.value,
+                response=response,
+                completed_at=datetime.now(timezone.utc),
+            )
+        )
+        await self.session.flush()
+
+    async def release(self, key: str) -> None:
+        """Forget a key whose request failed, so it can be retried."""
+        await self.session.execute(
+            delete(IdempotencyKeyORM)
+            .where(IdempotencyKeyORM.key == key)
+            .where(IdempotencyKeyORM.status == IdempotencyStatus.PROCESSING.value)
+        )
+        await self.session.flush()
+
+    async def evict(self, ttl: timedelta) -> int:
+        """Delete keys older than `ttl`."""
+        result = await self.session.execute(
+            delete(IdempotencyKeyORM).where(
+                IdempotencyKeyORM.created_at < datetime.now(timezone.utc) - ttl
+            )
+        )
+        await self.session.flush()
+        return cast(CursorResult[Any], result).rowcount
@@ -0,0 +1,140 @@
+# mypy: disable-error-code="assignment,arg-type,unreachable"
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.types import Job, JobKind, JobStatus
+
+from .sql_models import JobORM
+
+
+class JobsAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create_job(
+        self, project_id: UUID, kind: JobKind = JobKind.GENERATION
+    ) -> Job:
+        job = JobORM(
+            project_id=project_id,
+            kind=kind.value,
+            status=JobStatus.QUEUED.value,
+            attempts=0,
+        )
+        self.session.add(job)
+        await self.session.flush()
+        return job.domain
+
+    async def get_job(self, job_id: UUID) -> Optional[Job]:
+        job = await self.session.get(JobORM, job_id)
+        return job.domain if job else None
+
+    async def get_active_job(self, project_id: UUID) -> Optional[Job]:
+        job = await self.session.scalar(
+            select(JobORM)
+            .where(JobORM.project_id == project_id)
+            .where(JobORM.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]))
+            .order_by(JobORM.created_at.desc())
+            .limit(1)
+        )
+        return job.domain if job else None
+
+    async def claim_job(
+        self, stale_after: timedelta, max_attempts: int
+    ) -> Optional[Job]:
+        """Claim the oldest runnable job for this worker.
+
+        Runnable jobs are queued jobs and running jobs whose worker has not
+        finished within `stale_after`. Rows locked by other workers are
+        skipped, so several workers can poll the table concurrently.
+        """
+        stale_before = datetime.now(timezone.utc) - stale_after
+        job: Optional[JobORM] = await self.session.scalar(
+            select(JobORM)
+            .where(
+                or_(
+                    JobORM.status == JobStatus.QUEUED.value,
+                    and_(
+                        JobORM.status == JobStatus.RUNNING.value,
+                        JobORM.started_at < stale_before,
+                    ),
+                )
+            )
+            .where(JobORM.attempts < max_attempts)
+            .order_by(JobORM.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if not job:
+            return None
+
+        job.status = JobStatus.RUNNING.value
+        job.attempts = job.attempts + 1
+        job.started_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return job.domain
+
+    async def get_abandoned_jobs(
+        self, stale_after: timedelta, max_attempts: int
+    ) -> List[Job]:
+        """Running jobs whose worker has not finished their last attempt
+        within `stale_after`, which `claim_job` no longer picks up."""
+        stale_before = datetime.now(timezone.utc) - stale_after
+        jobs = await self.session.scalars(
+            select(JobORM)
+            .where(JobORM.status == JobStatus.RUNNING.value)
+            .where(JobORM.started_at < stale_before)
+            .where(JobORM.attempts >= max_attempts)
+            .order_by(JobORM.created_at)
+        )
+        return [job.domain for job in jobs]
+
+    async def fail_abandoned_job(self, job: Job, error: str) -> bool:
+        """Fail a job unless it has moved on since it was read, e.g. its
+        worker finished it after all."""
+        failed = await self.session.scalar(
+            update(JobORM)
+            .where(JobORM.id == job.id)
+            .where(JobORM.status == JobStatus.RUNNING.value)
+            .where(JobORM.attempts == job.attempts)
+            .values(
+                status=JobStatus.FAILED.value,
+                error=error,
+                finished_at=datetime.now(timezone.utc),
+            )
+            .returning(JobORM.id)
+        )
+        return failed is not None
+
+    async def requeue_job(self, job_id: UUID, error: str) -> Optional[Job]:
+        job = await self.session.get(JobORM, job_id)
+        if not job:
+            return None
+
+        job.status = JobStatus.QUEUED.value
+        job.error = error
+        await self.session.flush()
+        return job.domain
+
+    async def complete_job(self, job_id: UUID) -> Optional[Job]:
+        return await self._finish_job(job_id, JobStatus.COMPLETED)
+
+    async def fail_job(self, job_id: UUID, error: str) -> Optional[Job]:
+        return await self._finish_job(job_id, JobStatus.FAILED, error)
+
+    async def _finish_job(
+        self, job_id: UUID, status: JobStatus, error: Optional[str] = None
+    ) -> Optional[Job]:
+        job = await self.session.get(JobORM, job_id)
+        if not job:
+            return None
+
+        job.status = status.value
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return job.domain
@@ -0,0 +1,71 @@
+# mypy: disable-error-code="assignment,arg-type,unreachable"
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import Select, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .sql_models import LLMCacheEntryORM
+
+
+class LLMCacheAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_entry(self, key: str, ttl: timedelta) -> Optional[Any]:
+        entry = await self.session.scalar(
+            select(LLMCacheEntryORM)
+            .where(LLMCacheEntryORM.key == key)
+            .where(LLMCacheEntryORM.created_at >= datetime.now(timezone.utc) - ttl)
+        )
+        if not entry:
+            return None
+
+        entry.hits = entry.hits + 1
+        entry.last_accessed_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return entry.response
+
+    async def put_entry(
+        self, key: str, model: str, schema_name: str, response: Any
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        statement = insert(LLMCacheEntryORM).values(
+            key=key,
+            model=model,
+            schema_name=schema_name,
+            response=response,
+            hits=0,
+            created_at=now,
+            last_accessed_at=now,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[LLMCacheEntryORM.key],
+            set_={
+                "response": statement.excluded.response,
+                "created_at": now,
+                "last_accessed_at": now,
+            },
+        )
+        await self.session.execute(statement)
+        await self.session.flush()
+
+    async def evict(self, ttl: timedelta, max_entries: int) -> int:
+        """Delete expired entries and the least recently used beyond max_entries."""
+        expired = await self.session.execute(
+            delete(LLMCacheEntryORM).where(
+                LLMCacheEntryORM.created_at < datetime.now(timezone.utc) - ttl
+            )
+        )
+        keep: Select[Any] = (
+            select(LLMCacheEntryORM.key)
+            .order_by(LLMCacheEntryORM.last_accessed_at.desc())
+            .limit(max_entries)
+        )
+        overflow = await self.session.execute(
+            delete(LLMCacheEntryORM).where(LLMCacheEntryORM.key.not_in(keep))
+        )
+        await self.session.flush()
+        return expired.rowcount + overflow.rowcount
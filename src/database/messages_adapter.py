@@ -1,69 +1,141 @@
-# mypy: disable-error-code="assignment"
+# mypy: disable-error-code="assignment,arg-type"
 
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Result, UnaryExpression, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.types import Message
+from src.utils import estimate_tokens
 
-from .sql_models import MessageORM
+from .sql_models import MessageORM, ProjectORM
 
 
 class MessagesAdapter:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def create_message(
+    async def create_message(
         self,
         project_id: UUID,
         role: str,
         content: str,
         attachments: Optional[list] = None,
     ) -> Message:
+        # the row lock on the project serializes concurrent writers
+        sequence: int = (
+            await self.session.execute(
+                update(ProjectORM)
+                .where(ProjectORM.id == project_id)
+                .values(message_sequence=ProjectORM.message_sequence + 1)
+                .returning(ProjectORM.message_sequence)
+            )
+        ).scalar_one()
         message = MessageORM(
             project_id=project_id,
+            sequence=sequence,
             role=role,
             content=content,
-            attachments=attachments or [],
+            # a JSON column, which can't hold UUIDs
+            attachments=[str(attachment) for attachment in attachments or []],
+            token_count=estimate_tokens(content),
         )
         self.session.add(message)
-        self.session.flush()
+        await self.session.flush()
         return message.domain
 
-    def get_message(self, message_id: UUID) -> Optional[Message]:
-        message = (
-            self.session.query(MessageORM).filter(MessageORM.id == message_id).first()
-        )
+    async def get_message(self, message_id: UUID) -> Optional[Message]:
+        message = await self.session.get(MessageORM, message_id)
         return message.domain if message else None
 
-    def get_messages(
-        self, project_id: UUID, limit: int = 50, offset: int = 0
-    ) -> Tuple[List[Message], int]:
-        query = self.session.query(MessageORM).filter(
-            MessageORM.project_id == project_id
+    async def get_messages(
+        self,
+        project_id: UUID,
+        limit: Optional[int] = 50,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        include_total: bool = False,
+    ) -> Tuple[List[Message], bool, Optional[int]]:
+        """Get a page of messages in sequence order.
+
+        Pages are addressed by message sequence: `after` returns the messages
+        following that sequence, `before` the ones preceding it. Returns the
+        page, whether more messages lie beyond it and, if requested, the total
+        number of messages in the project.
+        """
+        total = None
+        if include_total:
+            total = await self.session.scalar(
+                select(func.count())
+                .select_from(MessageORM)
+                .where(MessageORM.project_id == project_id)
+            )
+
+        query = select(MessageORM).where(MessageORM.project_id == project_id)
+        if after is not None:
+            query = query.where(MessageORM.sequence > after)
+        if before is not None:
+            query = query.where(MessageORM.sequence < before)
+
+        # walk backwards from `before` so the page ends right next to it
+        backwards = before is not None and after is None
+        order: UnaryExpression[Any] = (
+            MessageORM.sequence.desc() if backwards else MessageORM.sequence.asc()
         )
+        query = query.order_by(order)
+        if limit is None:
+            messages = list(await self.session.scalars(query))
+            has_more = False
+        else:
+            messages = list(await self.session.scalars(query.limit(limit + 1)))
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        if backwards:
+            messages.reverse()
+
+        return [message.domain for message in messages], has_more, total
+
+    async def get_context_window(
+        self, project_id: UUID, token_budget: int, max_messages: int = 200
+    ) -> List[Message]:
+        """Get the most recent messages that fit within a token budget.
 
-        total = query.count()
-        messages = (
-            query.order_by(MessageORM.timestamp.asc()).offset(offset).limit(limit).all()
+        Returns the window oldest first, always including the latest message.
+        """
+        recent: Result[Any] = await self.session.execute(
+            select(MessageORM.sequence, MessageORM.token_count)
+            .where(MessageORM.project_id == project_id)
+            .order_by(MessageORM.sequence.desc())
+            .limit(max_messages)
         )
 
-        return [message.domain for message in messages], total
+        first_sequence = None
+        used = 0
+        for sequence, token_count in recent:
+            used += token_count or 0
+            if first_sequence is not None and used > token_budget:
+                break
+            first_sequence = sequence
+        if first_sequence is None:
+            return []
 
-    def delete_message(self, message_id: UUID) -> bool:
-        message = (
-            self.session.query(MessageORM).filter(MessageORM.id == message_id).first()
+        messages = await self.session.scalars(
+            select(MessageORM)
+            .where(MessageORM.project_id == project_id)
+            .where(MessageORM.sequence >= first_sequence)
+            .order_by(MessageORM.sequence.asc())
         )
+        return [message.domain for message in messages]
+
+    async def delete_message(self, message_id: UUID) -> bool:
+        message = await self.session.get(MessageORM, message_id)
         if not message:
             return False
 
-        self.session.delete(message)
-        self.session.flush()
+        await self.session.delete(message)
+        await self.session.flush()
         return True
 
-    def message_exists(self, message_id: UUID) -> bool:
-        return (
-            self.session.query(MessageORM).filter(MessageORM.id == message_id).first()
-            is not None
-        )
+    async def message_exists(self, message_id: UUID) -> bool:
+        return await self.session.get(MessageORM, message_id) is not None
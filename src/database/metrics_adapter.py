@@ -0,0 +1,31 @@
+# mypy: disable-error-code="assignment"
+
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .sql_models import NodeMetricsORM
+
+
+class MetricsAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def save_node_metrics(
+        self,
+        run_id: UUID,
+        project_id: UUID,
+        run_kind: str,
+        nodes: List[Dict],
+    ) -> None:
+        self.session.add_all(
+            NodeMetricsORM(
+                run_id=run_id,
+                project_id=project_id,
+                run_kind=run_kind,
+                **node,
+            )
+            for node in nodes
+        )
+        await self.session.flush()
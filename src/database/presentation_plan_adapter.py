@@ -4,36 +4,44 @@ from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.types import PresentationPlan
 
-from .sql_models import PresentationPlanORM
+from .sql_models import PresentationPlanORM, ProjectORM
 
 
 class PresentationPlanAdapter:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def get_plan(self, project_id: UUID) -> Optional[PresentationPlan]:
-        plan = (
-            self.session.query(PresentationPlanORM)
-            .filter(PresentationPlanORM.project_id == project_id)
-            .first()
+    async def _get_plan_orm(self, project_id: UUID) -> Optional[PresentationPlanORM]:
+        return await self.session.scalar(
+            select(PresentationPlanORM)
+            .where(PresentationPlanORM.project_id == project_id)
+            .limit(1)
         )
+
+    async def get_plan(self, project_id: UUID) -> Optional[PresentationPlan]:
+        plan = await self._get_plan_orm(project_id)
         return plan.domain if plan else None
 
-    def update_plan(
+    async def update_plan(
         self,
         project_id: UUID,
         plan_patch: PresentationPlan,
     ) -> Optional[PresentationPlan]:
-        db_plan = (
-            self.session.query(PresentationPlanORM)
-            .filter(PresentationPlanORM.project_id == project_id)
-            .first()
-        )
+        db_plan = await self._get_plan_orm(project_id)
         if not db_plan:
+            research_summary = plan_patch.research_summary
+            if research_summary is None:
+                # summarized from documents uploaded before the plan existed
+                research_summary = await self.session.scalar(
+                    select(ProjectORM.research_summary).where(
+                        ProjectORM.id == project_id
+                    )
+                )
             db_plan = PresentationPlanORM(
                 project_id=project_id,
                 title=plan_patch.title,
@@ -41,10 +49,10 @@ class PresentationPlanAdapter:
                 target_audience=plan_patch.target_audience,
                 tone=plan_patch.tone,
                 duration=plan_patch.duration,
-                research_summary=plan_patch.research_summary,
+                research_summary=research_summary,
             )
             self.session.add(db_plan)
-            self.session.flush()
+            await self.session.flush()
             return db_plan.domain
 
         if plan_patch.title is not None:
@@ -61,13 +69,8 @@ class PresentationPlanAdapter:
             db_plan.research_summary = plan_patch.research_summary
 
         db_plan.updated_at = datetime.now(timezone.utc)
-        self.session.flush()
+        await self.session.flush()
         return db_plan.domain
 
-    def plan_exists(self, project_id: UUID) -> bool:
-        return (
-            self.session.query(PresentationPlanORM)
-            .filter(PresentationPlanORM.project_id == project_id)
-            .first()
-            is not None
-        )
+    async def plan_exists(self, project_id: UUID) -> bool:
+        return await self._get_plan_orm(project_id) is not None
@@ -0,0 +1,34 @@
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def project_lock_key(project_id: UUID) -> int:
+    # advisory locks are keyed by a signed 64 bit integer
+    return int.from_bytes(project_id.bytes[:8], "big", signed=True)
+
+
+class ProjectLocksAdapter:
+    """Per project Postgres advisory locks.
+
+    Locks are transaction scoped: they are held until the session commits or
+    rolls back, and released by Postgres if the connection drops.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def try_lock(self, project_id: UUID) -> bool:
+        """Take the project lock unless another transaction holds it."""
+        return bool(
+            await self.session.scalar(
+                select(func.pg_try_advisory_xact_lock(project_lock_key(project_id)))
+            )
+        )
+
+    async def lock(self, project_id: UUID) -> None:
+        """Take the project lock, waiting for the transaction holding it."""
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(project_lock_key(project_id)))
+        )
@@ -1,21 +1,22 @@
 # mypy: disable-error-code="assignment"
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.types import Project, ProjectPhase
+from src.types import PresentationPlan, Project, ProjectPhase
 
-from .sql_models import ProjectORM
+from .sql_models import PresentationPlanORM, ProjectORM
 
 
 class ProjectsAdapter:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def create_project(
+    async def create_project(
         self,
         title: str,
         description: Optional[str] = None,
@@ -28,31 +29,76 @@ class ProjectsAdapter:
             project_metadata=metadata or {},
         )
         self.session.add(project)
-        self.session.flush()
+        await self.session.flush()
         return project.domain
 
-    def get_project(self, project_id: UUID) -> Optional[Project]:
-        project = (
-            self.session.query(ProjectORM).filter(ProjectORM.id == project_id).first()
-        )
+    async def get_project(self, project_id: UUID) -> Optional[Project]:
+        project = await self.session.get(ProjectORM, project_id)
         return project.domain if project else None
 
-    def get_projects(
-        self, limit: int = 20, offset: int = 0
-    ) -> tuple[List[Project], int]:
-        query = self.session.query(ProjectORM)
-
-        total = query.count()
-        projects = (
-            query.order_by(ProjectORM.updated_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
-
-        return [project.domain for project in projects], total
+    async def get_project_with_plan(
+        self, project_id: UUID
+    ) -> Optional[Tuple[Project, Optional[PresentationPlan]]]:
+        """Get a project and its plan, if any, in one query."""
+        row = (
+            await self.session.execute(
+                select(ProjectORM, PresentationPlanORM)
+                .outerjoin(
+                    PresentationPlanORM,
+                    PresentationPlanORM.project_id == ProjectORM.id,
+                )
+                .where(ProjectORM.id == project_id)
+                .limit(1)
+            )
+        ).first()
+        if row is None:
+            return None
+        project, plan = row
+        return project.domain, plan.domain if plan else None
 
-    def update_project(
+    async def get_projects(
+        self,
+        limit: int = 20,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        include_total: bool = False,
+    ) -> Tuple[List[Project], bool, Optional[int]]:
+        """Get a page of projects, most recently updated first.
+
+        `after` and `before` are (updated_at, id) positions of a project in the
+        listing; the page starts right after or ends right before it. Returns
+        the page, whether more projects lie beyond it and, if requested, the
+        total number of projects.
+        """
+        total = None
+        if include_total:
+            total = await self.session.scalar(
+                select(func.count()).select_from(ProjectORM)
+            )
+
+        query = select(ProjectORM)
+
+        position = tuple_(ProjectORM.updated_at, ProjectORM.id)
+        if after is not None:
+            query = query.where(position < tuple_(*after))
+        if before is not None:
+            query = query.where(position > tuple_(*before))
+
+        # walk backwards from `before` so the page ends right next to it
+        backwards = before is not None and after is None
+        if backwards:
+            query = query.order_by(ProjectORM.updated_at.asc(), ProjectORM.id.asc())
+        else:
+            query = query.order_by(ProjectORM.updated_at.desc(), ProjectORM.id.desc())
+        projects = list(await self.session.scalars(query.limit(limit + 1)))
+        has_more = len(projects) > limit
+        projects = projects[:limit]
+        if backwards:
+            projects.reverse()
+
+        return [project.domain for project in projects], has_more, total
+
+    async def update_project(
         self,
         project_id: UUID,
         title: Optional[str] = None,
@@ -60,9 +106,7 @@ class ProjectsAdapter:
         phase: Optional[ProjectPhase] = None,
         metadata: Optional[dict] = None,
     ) -> Optional[Project]:
-        project = (
-            self.session.query(ProjectORM).filter(ProjectORM.id == project_id).first()
-        )
+        project = await self.session.get(ProjectORM, project_id)
         if not project:
             return None
 
@@ -76,22 +120,46 @@ class ProjectsAdapter:
             project.project_metadata = metadata
 
         project.updated_at = datetime.now(timezone.utc)
-        self.session.flush()
+        await self.session.flush()
         return project.domain
 
-    def delete_project(self, project_id: UUID) -> bool:
-        project = (
-            self.session.query(ProjectORM).filter(ProjectORM.id == project_id).first()
+    async def set_research_summary(self, project_id: UUID, summary: str) -> None:
+        """Store the summary of the project's documents and copy it into the
+        plan, unless the plan holds a summary the user wrote themselves.
+
+        The plan is updated first, while the project still holds its previous
+        summary, so a plan summary copied from an earlier run is refreshed.
+        """
+        previous_summary = (
+            select(ProjectORM.research_summary)
+            .where(ProjectORM.id == project_id)
+            .scalar_subquery()
+        )
+        await self.session.execute(
+            update(PresentationPlanORM)
+            .where(PresentationPlanORM.project_id == project_id)
+            .where(
+                or_(
+                    func.coalesce(PresentationPlanORM.research_summary, "") == "",
+                    PresentationPlanORM.research_summary == previous_summary,
+                )
+            )
+            .values(research_summary=summary)
+        )
+        await self.session.execute(
+            update(ProjectORM)
+            .where(ProjectORM.id == project_id)
+            .values(research_summary=summary)
         )
+
+    async def delete_project(self, project_id: UUID) -> bool:
+        project = await self.session.get(ProjectORM, project_id)
         if not project:
             return False
 
-        self.session.delete(project)
-        self.session.flush()
+        await self.session.delete(project)
+        await self.session.flush()
         return True
 
-    def project_exists(self, project_id: UUID) -> bool:
-        return (
-            self.session.query(ProjectORM).filter(ProjectORM.id == project_id).first()
-            is not None
-        )
+    async def project_exists(self, project_id: UUID) -> bool:
+        return await self.session.get(ProjectORM, project_id) is not None
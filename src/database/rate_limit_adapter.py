@@ -0,0 +1,37 @@
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import ReturningInsert
+
+from .sql_models import RateLimitBucketORM
+
+
+class RateLimitAdapter:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def reserve(self, name: str, amount: float, per_minute: float) -> float:
+        """Take `amount` from a bucket and return what is left in it.
+
+        The bucket refills at `per_minute` up to one minute's worth. The refill
+        and the reservation happen in one statement under the row lock, so
+        concurrent processes never see the same balance. A negative balance is
+        a debt the caller has to wait out.
+        """
+        table = RateLimitBucketORM.__table__
+        elapsed = func.extract("epoch", func.now() - table.c.updated_at)
+        refilled = func.least(per_minute, table.c.tokens + elapsed * (per_minute / 60))
+        statement: ReturningInsert[Any] = (
+            insert(RateLimitBucketORM)
+            .values(name=name, tokens=per_minute - amount, updated_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[RateLimitBucketORM.name],
+                set_={"tokens": refilled - amount, "updated_at": func.now()},
+            )
+            .returning(RateLimitBucketORM.tokens)
+        )
+        tokens = await self.session.scalar(statement)
+        await self.session.flush()
+        return float(tokens)
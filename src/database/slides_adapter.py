@@ -1,54 +1,83 @@
 # mypy: disable-error-code="assignment"
 
+import uuid
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer_group
 
 from src.types import Slide
 
-from .sql_models import SlideORM
+from .sql_models import SLIDE_TEXT_GROUP, SlideORM
+
+# generated text a failed LLM call left empty keeps its stored value on upsert
+GENERATED_COLUMNS = ("content", "speaker_notes", "delivery_tutorial")
 
 
 class SlidesAdapter:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def get_slides(self, project_id: UUID) -> List[Slide]:
-        slides = (
-            self.session.query(SlideORM)
-            .filter(SlideORM.project_id == project_id)
+    def _columns(self, fields: Optional[Sequence[str]]) -> Any:
+        """Loader option for a slide query.
+
+        None loads every column, otherwise only the slide number and `fields`
+        are read and the rest of the slide is left as None.
+        """
+        if fields is None:
+            return undefer_group(SLIDE_TEXT_GROUP)
+        return load_only(
+            SlideORM.slide_number, *(getattr(SlideORM, field) for field in fields)
+        )
+
+    async def get_slides(
+        self, project_id: UUID, fields: Optional[Sequence[str]] = None
+    ) -> List[Slide]:
+        slides = await self.session.scalars(
+            select(SlideORM)
+            .options(self._columns(fields))
+            .where(SlideORM.project_id == project_id)
             .order_by(SlideORM.slide_number)
-            .all()
         )
         return [slide.domain for slide in slides]
 
-    def get_slide(self, project_id: UUID, slide_number: int) -> Optional[Slide]:
-        slide = (
-            self.session.query(SlideORM)
-            .filter(SlideORM.project_id == project_id)
-            .filter(SlideORM.slide_number == slide_number)
-            .first()
+    async def _get_slide_orm(
+        self,
+        project_id: UUID,
+        slide_number: int,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[SlideORM]:
+        return await self.session.scalar(
+            select(SlideORM)
+            .options(self._columns(fields))
+            .where(SlideORM.project_id == project_id)
+            .where(SlideORM.slide_number == slide_number)
         )
+
+    async def get_slide(
+        self,
+        project_id: UUID,
+        slide_number: int,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Slide]:
+        slide = await self._get_slide_orm(project_id, slide_number, fields)
         return slide.domain if slide else None
 
-    def create_slide(self, project_id: UUID, slide: Slide) -> Slide:
+    async def create_slide(self, project_id: UUID, slide: Slide) -> Slide:
         slide_orm = SlideORM.from_domain(slide)
         slide_orm.project_id = project_id
         self.session.add(slide_orm)
-        self.session.flush()
+        await self.session.flush()
         return slide_orm.domain
 
-    def update_slide(
+    async def update_slide(
         self, project_id: UUID, slide_number: int, slide: Slide
     ) -> Optional[Slide]:
-        slide_orm = (
-            self.session.query(SlideORM)
-            .filter(SlideORM.project_id == project_id)
-            .filter(SlideORM.slide_number == slide_number)
-            .first()
-        )
+        slide_orm = await self._get_slide_orm(project_id, slide_number)
         if not slide_orm:
             return None
 
@@ -58,28 +87,87 @@ class SlidesAdapter:
         slide_orm.content = slide.content
         slide_orm.speaker_notes = slide.speaker_notes
         slide_orm.delivery_tutorial = slide.delivery_tutorial
+        slide_orm.fingerprints = slide.fingerprints
+        slide_orm.instructions = slide.instructions
         slide_orm.updated_at = datetime.now(timezone.utc)
 
-        self.session.flush()
+        await self.session.flush()
         return slide_orm.domain
 
-    def slide_exists(self, project_id: UUID, slide_number: int) -> bool:
+    async def slide_exists(self, project_id: UUID, slide_number: int) -> bool:
+        return await self._get_slide_orm(project_id, slide_number, ()) is not None
+
+    async def slides_exist(self, project_id: UUID) -> bool:
         return (
-            self.session.query(SlideORM)
-            .filter(SlideORM.project_id == project_id)
-            .filter(SlideORM.slide_number == slide_number)
-            .first()
+            await self.session.scalar(
+                select(SlideORM.id).where(SlideORM.project_id == project_id).limit(1)
+            )
             is not None
         )
 
-    def slides_exist(self, project_id: UUID) -> bool:
-        return (
-            self.session.query(SlideORM)
-            .filter(SlideORM.project_id == project_id)
-            .first()
-            is not None
+    async def upsert_slides(self, project_id: UUID, slides: List[Slide]) -> None:
+        """Write a full deck in one statement and drop slides not in it.
+
+        Generated text a slide has no value for is left as stored, so a slide
+        whose generation failed keeps its previous content.
+        """
+        now = datetime.now(timezone.utc)
+        table = SlideORM.__table__
+        if slides:
+            rows = insert(table).values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "project_id": project_id,
+                        "slide_number": slide.slide_number,
+                        "title": slide.title,
+                        "description": slide.description,
+                        "time_spent_on_slide": slide.time_spent_on_slide,
+                        "content": slide.content,
+                        "speaker_notes": slide.speaker_notes,
+                        "delivery_tutorial": slide.delivery_tutorial,
+                        "fingerprints": slide.fingerprints,
+                        "instructions": slide.instructions,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for slide in slides
+                ]
+            )
+            statement: Insert = rows.on_conflict_do_update(
+                constraint="uq_slides_project_id_slide_number",
+                set_={
+                    **{
+                        column: rows.excluded[column]
+                        for column in (
+                            "title",
+                            "description",
+                            "time_spent_on_slide",
+                            "fingerprints",
+                            "instructions",
+                            "updated_at",
+                        )
+                    },
+                    **{
+                        column: func.coalesce(rows.excluded[column], table.c[column])
+                        for column in GENERATED_COLUMNS
+                    },
+                },
+            )
+            await self.session.execute(statement)
+
+        await self.session.execute(
+            delete(table)
+            .where(table.c.project_id == project_id)
+            .where(
+                table.c.slide_number.notin_([slide.slide_number for slide in slides])
+            )
         )
+        # rows changed behind the ORM's back, reload them on next access
+        self.session.expire_all()
 
-    def delete_slides(self, project_id: UUID) -> None:
-        self.session.query(SlideORM).filter(SlideORM.project_id == project_id).delete()
-        self.session.flush()
+    async def delete_slides(self, project_id: UUID) -> None:
+        await self.session.execute(
+            delete(SlideORM).where(SlideORM.project_id == project_id)
+        )
+        await self.session.flush()
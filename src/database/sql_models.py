@@ -2,18 +2,35 @@
 
 import uuid
 from datetime import datetime, timezone
-
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+from typing import AbstractSet
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    inspect,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
-from src.types.document import Document, ProcessingStatus
-from src.types.message import Message, MessageType
+from src.types.document import Document, DocumentChunk, ProcessingStatus
+from src.types.idempotency import IdempotencyRecord, IdempotencyStatus
+from src.types.job import Job, JobKind, JobStatus
+from src.types.message import ConversationSummary, Message, MessageType
 from src.types.plan import PresentationPlan
 from src.types.project import Project, ProjectPhase
 from src.types.slides import Slide, Slides
 
+from .compression import CompressedText
+
 Base = declarative_base()
 
 
@@ -24,13 +41,19 @@ class ProjectORM(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text)
     phase = Column(String(50), default=ProjectPhase.PREPARATION)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
-        default=datetime.now(timezone.utc),
-        onupdate=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
     )
     project_metadata = Column(JSON)
+    # sequence number of the project's latest message
+    message_sequence = Column(Integer, nullable=False, default=0)
+    # merged summaries of the project's documents
+    research_summary = Column(Text)
+
+    __table_args__ = (Index("ix_projects_updated_at_id", "updated_at", "id"),)
 
     # Relationships
     messages = relationship(
@@ -50,6 +73,23 @@ class ProjectORM(Base):
         back_populates="project",
         cascade="all, delete-orphan",
     )
+    jobs = relationship(
+        "JobORM",
+        back_populates="project",
+        cascade="all, delete-orphan",
+    )
+    conversation_summary = relationship(
+        "ConversationSummaryORM",
+        back_populates="project",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+    node_metrics = relationship(
+        "NodeMetricsORM",
+        back_populates="project",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     @classmethod
     def from_domain(cls, project: Project) -> "ProjectORM":
@@ -73,6 +113,8 @@ class ProjectORM(Base):
             created_at=self.created_at,
             updated_at=self.updated_at,
             project_metadata=self.project_metadata,
+            message_sequence=self.message_sequence or 0,
+            research_summary=self.research_summary,
         )
 
 
@@ -83,8 +125,15 @@ class MessageORM(Base):
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     role = Column(String(20), nullable=False)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # increases by one for each message in a project
+    sequence = Column(Integer, nullable=False)
     attachments = Column(JSON)
+    token_count = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_messages_project_id_sequence", "project_id", "sequence", unique=True),
+    )
 
     # Relationships
     project = relationship("ProjectORM", back_populates="messages")
@@ -97,7 +146,9 @@ class MessageORM(Base):
             role=message.type.value,
             content=message.content,
             timestamp=message.timestamp,
+            sequence=message.sequence,
             attachments=message.attachments,
+            token_count=message.token_count,
         )
 
     @property
@@ -108,7 +159,35 @@ class MessageORM(Base):
             type=MessageType(self.role),
             content=self.content,
             timestamp=self.timestamp,
+            sequence=self.sequence,
             attachments=self.attachments,
+            token_count=self.token_count,
+        )
+
+
+class ConversationSummaryORM(Base):
+    __tablename__ = "conversation_summaries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(
+        UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, unique=True
+    )
+    summary = Column(Text, nullable=False)
+    summarized_sequence = Column(Integer, nullable=False, default=0)
+    token_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    project = relationship("ProjectORM", back_populates="conversation_summary")
+
+    @property
+    def domain(self) -> ConversationSummary:
+        return ConversationSummary(
+            project_id=self.project_id,
+            summary=self.summary,
+            summarized_sequence=self.summarized_sequence,
+            token_count=self.token_count,
+            updated_at=self.updated_at,
         )
 
 
@@ -121,12 +200,27 @@ class DocumentORM(Base):
     description = Column(Text)
     file_type = Column(String(50))
     file_size = Column(Integer)
-    upload_date = Column(DateTime, default=datetime.now(timezone.utc))
+    upload_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     processing_status = Column(String(20), default=ProcessingStatus.PENDING)
     file_path = Column(String(500))
+    content_hash = Column(String(64), index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    processing_error = Column(Text)
+    processing_attempts = Column(Integer, nullable=False, default=0)
+    processing_started_at = Column(DateTime)
+    chunk_count = Column(Integer)
+    # merged summaries of the document's chunks
+    summary = Column(Text)
+
+    __table_args__ = (
+        Index("ix_documents_processing_status", "processing_status", "upload_date"),
+    )
 
     # Relationships
     project = relationship("ProjectORM", back_populates="documents")
+    chunks = relationship(
+        "DocumentChunkORM", back_populates="document", passive_deletes=True
+    )
 
     @classmethod
     def from_domain(cls, document: Document) -> "DocumentORM":
@@ -140,6 +234,12 @@ class DocumentORM(Base):
             upload_date=document.upload_date,
             processing_status=document.processing_status.value,
             file_path=document.file_path,
+            content_hash=document.content_hash,
+            progress=document.progress,
+            processing_error=document.processing_error,
+            processing_attempts=document.processing_attempts,
+            chunk_count=document.chunk_count,
+            summary=document.summary,
         )
 
     @property
@@ -154,6 +254,50 @@ class DocumentORM(Base):
             upload_date=self.upload_date,
             processing_status=ProcessingStatus(self.processing_status),
             file_path=self.file_path,
+            content_hash=self.content_hash,
+            progress=self.progress or 0.0,
+            processing_error=self.processing_error,
+            processing_attempts=self.processing_attempts or 0,
+            chunk_count=self.chunk_count,
+            summary=self.summary,
+        )
+
+
+class DocumentChunkORM(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    project_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    summary = Column(Text)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "document_id",
+            "chunk_index",
+            name="uq_document_chunks_document_id_chunk_index",
+        ),
+    )
+
+    # Relationships
+    document = relationship("DocumentORM", back_populates="chunks")
+
+    @property
+    def domain(self) -> DocumentChunk:
+        return DocumentChunk(
+            document_id=self.document_id,
+            project_id=self.project_id,
+            chunk_index=self.chunk_index,
+            content=self.content,
+            token_count=self.token_count,
+            summary=self.summary,
         )
 
 
@@ -201,6 +345,9 @@ class PresentationPlanORM(Base):
         )
 
 
+SLIDE_TEXT_GROUP = "slide_text"
+
+
 class SlideORM(Base):
     __tablename__ = "slides"
 
@@ -210,9 +357,17 @@ class SlideORM(Base):
     description = Column(Text)
     time_spent_on_slide = Column(Integer)
     slide_number = Column(Integer)
-    content = Column(Text)
-    speaker_notes = Column(Text)
-    delivery_tutorial = Column(Text)
+    # the generated text is most of a slide's size, it's only loaded when the
+    # query asks for it (undefer_group(SLIDE_TEXT_GROUP) or load_only)
+    content = deferred(Column(CompressedText), group=SLIDE_TEXT_GROUP, raiseload=True)
+    speaker_notes = deferred(
+        Column(CompressedText), group=SLIDE_TEXT_GROUP, raiseload=True
+    )
+    delivery_tutorial = deferred(
+        Column(CompressedText), group=SLIDE_TEXT_GROUP, raiseload=True
+    )
+    fingerprints = Column(JSON)
+    instructions = Column(JSON)
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
@@ -220,6 +375,12 @@ class SlideORM(Base):
         onupdate=datetime.now(timezone.utc),
     )
 
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id", "slide_number", name="uq_slides_project_id_slide_number"
+        ),
+    )
+
     # Relationships
     project = relationship("ProjectORM", back_populates="slides")
 
@@ -233,18 +394,138 @@ class SlideORM(Base):
             content=slide.content,
             speaker_notes=slide.speaker_notes,
             delivery_tutorial=slide.delivery_tutorial,
+            fingerprints=slide.fingerprints,
+            instructions=slide.instructions,
         )
 
     @property
     def domain(self) -> Slide:
+        """The slide, with the columns the query didn't load left as None."""
+        unloaded: AbstractSet[str] = inspect(self).unloaded
         return Slide(
-            title=self.title,
-            description=self.description,
-            time_spent_on_slide=self.time_spent_on_slide,
-            slide_number=self.slide_number,
-            content=self.content,
-            speaker_notes=self.speaker_notes,
-            delivery_tutorial=self.delivery_tutorial,
+            **{
+                field: getattr(self, field)
+                for field in Slide.model_fields
+                if field not in unloaded
+            }
+        )
+
+
+class JobORM(Base):
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
+    kind = Column(String(50), nullable=False, default=JobKind.GENERATION.value)
+    status = Column(String(20), nullable=False, default=JobStatus.QUEUED.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (Index("ix_jobs_status_created_at", "status", "created_at"),)
+
+    # Relationships
+    project = relationship("ProjectORM", back_populates="jobs")
+
+    @classmethod
+    def from_domain(cls, job: Job) -> "JobORM":
+        return cls(
+            id=job.id,
+            project_id=job.project_id,
+            kind=job.kind.value,
+            status=job.status.value,
+            attempts=job.attempts,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
+    @property
+    def domain(self) -> Job:
+        return Job(
+            id=self.id,
+            project_id=self.project_id,
+            kind=JobKind(self.kind),
+            status=JobStatus(self.status),
+            attempts=self.attempts,
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
+
+
+class LLMCacheEntryORM(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String(255), nullable=False)
+    schema_name = Column(String(255), nullable=False)
+    response = Column(JSON, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    last_accessed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (Index("ix_llm_cache_last_accessed_at", "last_accessed_at"),)
+
+
+class IdempotencyKeyORM(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(
+        String(20), nullable=False, default=IdempotencyStatus.PROCESSING.value
+    )
+    response = Column(JSON)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = Column(DateTime)
+
+    __table_args__ = (Index("ix_idempotency_keys_created_at", "created_at"),)
+
+    @property
+    def domain(self) -> IdempotencyRecord:
+        return IdempotencyRecord(
+            key=self.key,
+            fingerprint=self.fingerprint,
+            status=IdempotencyStatus(self.status),
+            response=self.response,
+            created_at=self.created_at,
+            completed_at=self.completed_at,
         )
 
 
+class RateLimitBucketORM(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    name = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class NodeMetricsORM(Base):
+    __tablename__ = "node_metrics"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    run_kind = Column(String(50), nullable=False)
+    node = Column(String(100), nullable=False)
+    wall_time = Column(Float, nullable=False, default=0.0)
+    llm_calls = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    db_time = Column(Float, nullable=False, default=0.0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    project = relationship("ProjectORM", back_populates="node_metrics")
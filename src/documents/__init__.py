@@ -0,0 +1,32 @@
+"""Uploaded research documents."""
+
+from .generations import ChunkMatch
+from .index import VectorIndex, vector_index
+from .keywords import KeywordIndex, keyword_index
+from .pipeline import DocumentPipeline
+from .retrieval import (
+    drop_project_indexes,
+    format_chunks,
+    index_document,
+    retrieve_chunks,
+    unindex_document,
+)
+from .store import DocumentStore, PendingFile, UploadTooLarge, document_store
+
+__all__ = [
+    "ChunkMatch",
+    "DocumentPipeline",
+    "DocumentStore",
+    "KeywordIndex",
+    "PendingFile",
+    "UploadTooLarge",
+    "VectorIndex",
+    "document_store",
+    "drop_project_indexes",
+    "format_chunks",
+    "index_document",
+    "keyword_index",
+    "retrieve_chunks",
+    "unindex_document",
+    "vector_index",
+]
@@ -0,0 +1,100 @@
+"""Text embeddings for document retrieval, created on first use."""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("easeai")
+
+# "google" for Gemini or "fake" for deterministic offline embeddings
+EMBEDDING_PROVIDER = os.getenv(
+    "EMBEDDING_PROVIDER", os.getenv("LLM_PROVIDER", "google")
+)
+EMBEDDING_MODEL = os.getenv(
+    "EMBEDDING_MODEL",
+    "fake" if EMBEDDING_PROVIDER == "fake" else "models/text-embedding-004",
+)
+# texts per embedding request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+FAKE_EMBEDDING_SIZE = 1024
+
+WORD_PATTERN = re.compile(r"\w+")
+
+_embeddings: Optional[Embeddings] = None
+_lock = threading.Lock()
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline embeddings from hashed word counts.
+
+    Texts sharing words get similar vectors, so retrieval still behaves
+    sensibly with the fake LLM provider.
+    """
+
+    def __init__(self, size: int = FAKE_EMBEDDING_SIZE) -> None:
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in WORD_PATTERN.findall(text.lower()):
+            # not hash(), which differs between processes
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "big") % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def get_embeddings() -> Embeddings:
+    """Get the shared embeddings client, creating it on first use."""
+    global _embeddings
+    with _lock:
+        if _embeddings is None:
+            _embeddings = _create_embeddings(EMBEDDING_PROVIDER, EMBEDDING_MODEL)
+            logger.debug(f"Created {EMBEDDING_PROVIDER} embeddings client")
+        return _embeddings
+
+
+def _create_embeddings(provider: str, model: str) -> Embeddings:
+    match provider:
+        case "google":
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            return GoogleGenerativeAIEmbeddings(model=model)
+        case "fake":
+            return HashingEmbeddings()
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, so dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+async def embed_documents(texts: Sequence[str]) -> np.ndarray:
+    """Embed texts in batches into a float32 matrix of unit length rows."""
+    embeddings = get_embeddings()
+    rows: List[List[float]] = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = list(texts[start : start + EMBEDDING_BATCH_SIZE])
+        rows.extend(await embeddings.aembed_documents(batch))
+    if not rows:
+        return np.zeros((0, 0), dtype=np.float32)
+    return normalize(np.asarray(rows, dtype=np.float32))
+
+
+async def embed_query(text: str) -> np.ndarray:
+    return normalize(np.asarray(await get_embeddings().aembed_query(text)))
@@ -0,0 +1,206 @@
+"""On-disk storage shared by the per-project chunk indexes.
+
+Every change to a project's index writes a new generation directory and then
+points `CURRENT` at it, so readers never see a half written index and take no
+lock. Writers to one project are serialized with a file lock. Each process
+keeps the generations it reads open for the `INDEX_CACHE_SIZE` most recently
+searched projects.
+"""
+
+import abc
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Collection,
+    Generic,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+from uuid import UUID
+
+import numpy as np
+
+INDEX_CACHE_SIZE = int(os.getenv("INDEX_CACHE_SIZE", "64"))
+
+CURRENT = "CURRENT"
+
+
+class ChunkMatch(NamedTuple):
+    document_id: UUID
+    chunk_index: int
+    score: float
+
+
+class Generation(Protocol):
+    name: str
+
+
+G = TypeVar("G", bound=Generation)
+
+
+@dataclass
+class Rows:
+    """The document chunk held by each row of an index."""
+
+    # document ids, rows refer to them by position
+    documents: List[UUID]
+    row_documents: np.ndarray
+    row_chunks: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.row_documents)
+
+    @classmethod
+    def empty(cls) -> "Rows":
+        return cls([], np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+    def replace(self, document_id: UUID, chunk_count: int) -> Tuple["Rows", np.ndarray]:
+        """Drop a document's rows and append `chunk_count` new ones for it.
+
+        Returns the new rows and a mask of the old rows that were kept.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if document_id in self.documents:
+            keep = self.row_documents != self.documents.index(document_id)
+        used = np.unique(self.row_documents[keep])
+        renumber = np.full(len(self.documents), -1, dtype=np.int32)
+        renumber[used] = np.arange(len(used), dtype=np.int32)
+        documents = [self.documents[number] for number in used]
+        row_documents = renumber[self.row_documents[keep]]
+        row_chunks = self.row_chunks[keep]
+        if chunk_count:
+            row_documents = np.concatenate(
+                [row_documents, np.full(chunk_count, len(documents), np.int32)]
+            )
+            row_chunks = np.concatenate(
+                [row_chunks, np.arange(chunk_count, dtype=np.int32)]
+            )
+            documents.append(document_id)
+        return Rows(documents, row_documents, row_chunks), keep
+
+    def mask(self, document_ids: Collection[UUID]) -> np.ndarray:
+        """Mask of the rows belonging to some documents."""
+        allowed = set(document_ids)
+        numbers = [
+            n for n, document in enumerate(self.documents) if document in allowed
+        ]
+        return np.isin(self.row_documents, numbers)
+
+    def position(self, row: int) -> Tuple[UUID, int]:
+        return self.documents[self.row_documents[row]], int(self.row_chunks[row])
+
+    def save(self, path: Path) -> None:
+        np.save(path / "row_documents.npy", self.row_documents)
+        np.save(path / "row_chunks.npy", self.row_chunks)
+        (path / "documents.json").write_text(
+            json.dumps([str(document) for document in self.documents])
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "Rows":
+        return cls(
+            documents=[
+                UUID(document)
+                for document in json.loads((path / "documents.json").read_text())
+            ],
+            row_documents=np.load(path / "row_documents.npy"),
+            row_chunks=np.load(path / "row_chunks.npy"),
+        )
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class GenerationStore(abc.ABC, Generic[G]):
+    """Per-project generations of an index under `root`."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self._open: OrderedDict[UUID, G] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def project_dir(self, project_id: UUID) -> Path:
+        return self.root / str(project_id)
+
+    def drop_project(self, project_id: UUID) -> None:
+        with self._lock:
+            self._open.pop(project_id, None)
+        shutil.rmtree(self.project_dir(project_id), ignore_errors=True)
+
+    @abc.abstractmethod
+    def _read(self, path: Path) -> G:
+        """Open the generation written at `path`."""
+
+    def _load(self, project_id: UUID) -> Optional[G]:
+        directory = self.project_dir(project_id)
+        # a writer may replace the generation between reading CURRENT and
+        # opening its files
+        for _ in range(3):
+            try:
+                name = (directory / CURRENT).read_text().strip()
+            except FileNotFoundError:
+                return None
+            with self._lock:
+                generation = self._open.get(project_id)
+                if generation is not None and generation.name == name:
+                    self._open.move_to_end(project_id)
+                    return generation
+            try:
+                generation = self._read(directory / name)
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                self._open[project_id] = generation
+                if len(self._open) > INDEX_CACHE_SIZE:
+                    self._open.popitem(last=False)
+            return generation
+        return None
+
+    @contextmanager
+    def _write_lock(self, project_id: UUID) -> Iterator[Path]:
+        directory = self.project_dir(project_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield directory
+
+    @staticmethod
+    def _new_generation(directory: Path) -> Path:
+        path = directory / f"{time.time_ns():x}"
+        path.mkdir()
+        return path
+
+    @staticmethod
+    def _publish(directory: Path, path: Optional[Path]) -> None:
+        """Make `path` the current generation, or leave none, and remove the
+        others. Readers of a removed generation keep their open files until
+        they reload."""
+        current = directory / CURRENT
+        if path is None:
+            current.unlink(missing_ok=True)
+        else:
+            temporary = directory / f"{CURRENT}.tmp"
+            temporary.write_text(path.name)
+            os.replace(temporary, current)
+        for child in directory.iterdir():
+            if child.is_dir() and (path is None or child.name != path.name):
+                shutil.rmtree(child, ignore_errors=True)
@@ -0,0 +1,292 @@
+"""Per-project vector index over document chunks.
+
+Each project's chunk embeddings are kept under `VECTOR_INDEX_DIR/<project id>`
+as a float32 matrix in a `.npy` file, which searches memory map, so only the
+rows a search scores are read and the page cache is shared between processes.
+Rows are unit length and scored by dot product, i.e. cosine similarity.
+
+Projects with up to `VECTOR_INDEX_IVF_THRESHOLD` chunks are searched exactly.
+Above that an inverted file (IVF) index is trained: rows are clustered with
+k-means, and a search only scores the rows of the `VECTOR_INDEX_PROBES`
+clusters whose centroids are nearest the query. Rows added later join their
+nearest cluster, and the clusters are retrained once the index has doubled.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+from .embeddings import EMBEDDING_MODEL, normalize
+from .generations import ChunkMatch, GenerationStore, Rows, top_k
+
+logger = logging.getLogger("easeai")
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/indexes")
+# chunks above which a project's index is approximate
+VECTOR_INDEX_IVF_THRESHOLD = int(os.getenv("VECTOR_INDEX_IVF_THRESHOLD", "10000"))
+# clusters scored by an approximate search
+VECTOR_INDEX_PROBES = int(os.getenv("VECTOR_INDEX_PROBES", "16"))
+# clusters per square root of the row count
+LISTS_PER_SQRT_ROW = 4
+KMEANS_ITERATIONS = 10
+# k-means trains on a sample of this many rows per cluster
+KMEANS_SAMPLE_PER_LIST = 64
+# rows copied or scored at a time, which bounds memory use
+BLOCK_ROWS = 65536
+
+
+@dataclass
+class _Generation:
+    name: str
+    model: str
+    rows: Rows
+    vectors: np.ndarray
+    centroids: Optional[np.ndarray] = None
+    assignments: Optional[np.ndarray] = None
+    trained_rows: int = 0
+
+    def __post_init__(self) -> None:
+        # row numbers grouped by cluster, and where each cluster starts
+        self.order: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+        if self.centroids is not None and self.assignments is not None:
+            self.order = np.argsort(self.assignments, kind="stable")
+            counts = np.bincount(self.assignments, minlength=len(self.centroids))
+            self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+
+def cluster_count(rows: int) -> int:
+    return max(1, min(rows, int(LISTS_PER_SQRT_ROW * math.sqrt(rows))))
+
+
+def train_centroids(vectors: np.ndarray, clusters: int, seed: int = 0) -> np.ndarray:
+    """Cluster unit length rows with spherical k-means on a sample."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), clusters * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(
+        vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    )
+    centroids = sample[rng.choice(sample_size, clusters, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        # restart empty clusters on random rows
+        empty = np.bincount(assignments, minlength=clusters) == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.concatenate(
+        [
+            np.argmax(np.asarray(vectors[start : start + BLOCK_ROWS]) @ centroids.T, 1)
+            for start in range(0, len(vectors), BLOCK_ROWS)
+        ]
+        or [np.zeros(0, dtype=np.int64)]
+    ).astype(np.int32)
+
+
+class VectorIndex(GenerationStore[_Generation]):
+    def __init__(self, root: str | Path = VECTOR_INDEX_DIR) -> None:
+        super().__init__(root)
+
+    def add_document(
+        self, project_id: UUID, document_id: UUID, vectors: np.ndarray
+    ) -> None:
+        """Index a document's chunk embeddings, one row per chunk in order,
+        replacing any rows it already had."""
+        self._rewrite(project_id, document_id, vectors)
+
+    def remove_document(self, project_id: UUID, document_id: UUID) -> None:
+        self._rewrite(project_id, document_id, None)
+
+    def search(
+        self,
+        project_id: UUID,
+        query: np.ndarray,
+        k: int,
+        document_ids: Optional[Collection[UUID]] = None,
+    ) -> List[ChunkMatch]:
+        """Find the `k` chunks most similar to a unit length query vector,
+        optionally only among the chunks of some documents."""
+        index = self._load(project_id)
+        if index is None or k <= 0:
+            return []
+        if query.shape != (index.vectors.shape[1],):
+            logger.warning(
+                f"Query has {query.shape} dimensions, the index of project "
+                f"{project_id} has {index.vectors.shape[1]}"
+            )
+            return []
+
+        mask = None if document_ids is None else index.rows.mask(document_ids)
+        rows = None
+        if index.order is not None and (
+            mask is None or mask.sum() > VECTOR_INDEX_IVF_THRESHOLD
+        ):
+            rows = self._probe(index, query)
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if len(rows) < k:
+                rows = None
+        if rows is None and mask is not None:
+            rows = np.flatnonzero(mask)
+        if rows is not None and not len(rows):
+            return []
+
+        scores = _score(index.vectors, rows, query)
+        best = top_k(scores, k)
+        matched = rows[best] if rows is not None else best
+        return [
+            ChunkMatch(*index.rows.position(row), score=float(scores[position]))
+            for row, position in zip(matched, best)
+        ]
+
+    @staticmethod
+    def _probe(index: _Generation, query: np.ndarray) -> np.ndarray:
+        assert index.centroids is not None
+        assert index.order is not None and index.offsets is not None
+        probes = min(VECTOR_INDEX_PROBES, len(index.centroids))
+        nearest = np.argpartition(-(index.centroids @ query), probes - 1)[:probes]
+        rows = np.concatenate(
+            [index.order[index.offsets[c] : index.offsets[c + 1]] for c in nearest]
+        )
+        # in file order, so the memory map is read sequentially
+        return np.sort(rows)
+
+    def _read(self, path: Path) -> _Generation:
+        meta = json.loads((path / "meta.json").read_text())
+        centroids = assignments = None
+        if meta["trained_rows"]:
+            centroids = np.load(path / "centroids.npy")
+            assignments = np.load(path / "assignments.npy")
+        return _Generation(
+            name=path.name,
+            model=meta["model"],
+            rows=Rows.load(path),
+            vectors=np.load(path / "vectors.npy", mmap_mode="r"),
+            centroids=centroids,
+            assignments=assignments,
+            trained_rows=meta["trained_rows"],
+        )
+
+    def _rewrite(
+        self, project_id: UUID, document_id: UUID, vectors: Optional[np.ndarray]
+    ) -> None:
+        with self._write_lock(project_id) as directory:
+            current = self._load(project_id)
+            if current is not None and current.model != EMBEDDING_MODEL:
+                logger.warning(
+                    f"Index of project {project_id} was built with {current.model}, "
+                    f"dropping it for {EMBEDDING_MODEL}"
+                )
+                current = None
+            if vectors is not None and not len(vectors):
+                vectors = None
+
+            old_rows = current.rows if current is not None else Rows.empty()
+            rows, keep = old_rows.replace(
+                document_id, len(vectors) if vectors is not None else 0
+            )
+            if not len(rows):
+                self._publish(directory, None)
+                return
+
+            if current is not None:
+                dimensions = current.vectors.shape[1]
+            else:
+                assert vectors is not None
+                dimensions = vectors.shape[1]
+            if vectors is not None and vectors.shape[1] != dimensions:
+                raise ValueError(
+                    f"Embeddings have {vectors.shape[1]} dimensions, "
+                    f"the index of project {project_id} has {dimensions}"
+                )
+
+            path = self._new_generation(directory)
+            output = np.lib.format.open_memmap(
+                path / "vectors.npy",
+                mode="w+",
+                dtype=np.float32,
+                shape=(len(rows), dimensions),
+            )
+            position = 0
+            if current is not None:
+                for start in range(0, len(current.vectors), BLOCK_ROWS):
+                    block = current.vectors[start : start + BLOCK_ROWS]
+                    block = block[keep[start : start + BLOCK_ROWS]]
+                    output[position : position + len(block)] = block
+                    position += len(block)
+            if vectors is not None:
+                output[position:] = vectors
+            output.flush()
+            del output
+            stored = np.load(path / "vectors.npy", mmap_mode="r")
+
+            total = len(rows)
+            trained_rows = 0
+            if total > VECTOR_INDEX_IVF_THRESHOLD:
+                if (
+                    current is not None
+                    and current.centroids is not None
+                    and current.assignments is not None
+                    and total < 2 * current.trained_rows
+                ):
+                    centroids = current.centroids
+                    assignments = current.assignments[keep]
+                    if vectors is not None:
+                        assignments = np.concatenate(
+                            [assignments, assign_clusters(vectors, centroids)]
+                        )
+                    trained_rows = current.trained_rows
+                else:
+                    started = time.perf_counter()
+                    centroids = train_centroids(stored, cluster_count(total))
+                    assignments = assign_clusters(stored, centroids)
+                    trained_rows = total
+                    logger.info(
+                        f"Trained {len(centroids)} clusters on {total} chunks of "
+                        f"project {project_id} in "
+                        f"{time.perf_counter() - started:.2f}s"
+                    )
+                np.save(path / "centroids.npy", centroids)
+                np.save(path / "assignments.npy", assignments)
+
+            rows.save(path)
+            (path / "meta.json").write_text(
+                json.dumps({"model": EMBEDDING_MODEL, "trained_rows": trained_rows})
+            )
+            self._publish(directory, path)
+            logger.debug(f"Indexed {total} chunk vectors of project {project_id}")
+
+
+def _score(
+    vectors: np.ndarray, rows: Optional[np.ndarray], query: np.ndarray
+) -> np.ndarray:
+    """Dot products of the query with some rows, or all rows, a block at a time."""
+    if rows is None:
+        return np.concatenate(
+            [
+                np.asarray(vectors[start : start + BLOCK_ROWS]) @ query
+                for start in range(0, len(vectors), BLOCK_ROWS)
+            ]
+        )
+    return np.concatenate(
+        [
+            vectors[rows[start : start + BLOCK_ROWS]] @ query
+            for start in range(0, len(rows), BLOCK_ROWS)
+        ]
+    )
+
+
+vector_index = VectorIndex()
@@ -0,0 +1,227 @@
+"""Per-project BM25 keyword index over document chunks.
+
+Embeddings miss exact terms such as product names, metrics and acronyms,
+which keyword search finds. Each project's index is an inverted file kept
+under `KEYWORD_INDEX_DIR/<project id>` as flat arrays: the sorted vocabulary,
+and for each term a slice of the `rows` and `counts` posting arrays starting
+at `offsets[term]`. Searching reads only the postings of the query's terms.
+
+The index is updated as each document finishes processing: only that
+document's chunks are tokenized, and their postings are merged into the
+existing arrays.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from .generations import ChunkMatch, GenerationStore, Rows, top_k
+
+logger = logging.getLogger("easeai")
+
+KEYWORD_INDEX_DIR = os.getenv("KEYWORD_INDEX_DIR", "data/keywords")
+# term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# term counts are stored as uint16
+MAX_TERM_COUNT = np.iinfo(np.uint16).max
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class _Postings:
+    name: str
+    rows: Rows
+    terms: List[str]
+    offsets: np.ndarray
+    posting_rows: np.ndarray
+    posting_counts: np.ndarray
+    # tokens in each row
+    lengths: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.term_ids = {term: number for number, term in enumerate(self.terms)}
+        self.average_length = float(self.lengths.mean()) if len(self.lengths) else 0
+
+
+class KeywordIndex(GenerationStore[_Postings]):
+    def __init__(self, root: str | Path = KEYWORD_INDEX_DIR) -> None:
+        super().__init__(root)
+
+    def add_document(
+        self, project_id: UUID, document_id: UUID, chunks: Sequence[str]
+    ) -> None:
+        """Index a document's chunks in order, replacing any it already had."""
+        self._rewrite(project_id, document_id, chunks)
+
+    def remove_document(self, project_id: UUID, document_id: UUID) -> None:
+        self._rewrite(project_id, document_id, ())
+
+    def search(
+        self,
+        project_id: UUID,
+        query: str,
+        k: int,
+        document_ids: Optional[Collection[UUID]] = None,
+    ) -> List[ChunkMatch]:
+        """Find the `k` chunks scoring highest for the query's terms under BM25,
+        optionally only among the chunks of some documents."""
+        index = self._load(project_id)
+        if index is None or k <= 0:
+            return []
+        terms = [
+            index.term_ids[term]
+            for term in set(tokenize(query))
+            if term in index.term_ids
+        ]
+        if not terms:
+            return []
+
+        total = len(index.rows)
+        scores = np.zeros(total, dtype=np.float32)
+        for term in terms:
+            start, end = index.offsets[term], index.offsets[term + 1]
+            rows = index.posting_rows[start:end]
+            counts = index.posting_counts[start:end].astype(np.float32)
+            frequency = end - start
+            idf = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * index.lengths[rows] / index.average_length
+            )
+            scores[rows] += idf * counts * (BM25_K1 + 1) / (counts + norm)
+        if document_ids is not None:
+            scores[~index.rows.mask(document_ids)] = 0
+
+        candidates = np.flatnonzero(scores)
+        best = top_k(scores[candidates], k)
+        return [
+            ChunkMatch(
+                *index.rows.position(candidates[position]),
+                score=float(scores[candidates[position]]),
+            )
+            for position in best
+        ]
+
+    def _read(self, path: Path) -> _Postings:
+        terms = (path / "terms.txt").read_text()
+        return _Postings(
+            name=path.name,
+            rows=Rows.load(path),
+            terms=terms.split("\n") if terms else [],
+            offsets=np.load(path / "offsets.npy"),
+            posting_rows=np.load(path / "posting_rows.npy"),
+            posting_counts=np.load(path / "posting_counts.npy"),
+            lengths=np.load(path / "lengths.npy"),
+        )
+
+    def _rewrite(
+        self, project_id: UUID, document_id: UUID, chunks: Sequence[str]
+    ) -> None:
+        with self._write_lock(project_id) as directory:
+            current = self._load(project_id)
+            old_rows = current.rows if current is not None else Rows.empty()
+            rows, keep = old_rows.replace(document_id, len(chunks))
+            if not len(rows):
+                self._publish(directory, None)
+                return
+
+            # postings of the kept rows, renumbered
+            terms: List[str] = []
+            posting_terms = np.zeros(0, dtype=np.int64)
+            posting_rows = np.zeros(0, dtype=np.int32)
+            posting_counts = np.zeros(0, dtype=np.uint16)
+            lengths = np.zeros(0, dtype=np.int32)
+            if current is not None:
+                terms = current.terms
+                posting_terms = np.repeat(
+                    np.arange(len(terms)), np.diff(current.offsets)
+                )
+                posting_rows = current.posting_rows
+                posting_counts = current.posting_counts
+                lengths = current.lengths
+                # adding a new document keeps every row
+                if not keep.all():
+                    renumber = (np.cumsum(keep) - 1).astype(np.int32)
+                    kept = keep[posting_rows]
+                    posting_terms = posting_terms[kept]
+                    posting_rows = renumber[posting_rows[kept]]
+                    posting_counts = posting_counts[kept]
+                    lengths = lengths[keep]
+
+            # postings of the new chunks
+            first_row = len(rows) - len(chunks)
+            new_terms: List[str] = []
+            new_rows: List[int] = []
+            new_counts: List[int] = []
+            new_lengths: List[int] = []
+            for offset, chunk in enumerate(chunks):
+                tokens = tokenize(chunk)
+                new_lengths.append(len(tokens))
+                for term, count in Counter(tokens).items():
+                    new_terms.append(term)
+                    new_rows.append(first_row + offset)
+                    new_counts.append(min(count, MAX_TERM_COUNT))
+
+            # the vocabulary stays sorted, so renumbered old postings stay in
+            # term order
+            vocabulary = sorted(set(terms).union(new_terms))
+            term_ids = {term: number for number, term in enumerate(vocabulary)}
+            renumber_terms = np.array(
+                [term_ids[term] for term in terms], dtype=np.int64
+            )
+            new_posting_terms = np.array(
+                [term_ids[term] for term in new_terms], dtype=np.int64
+            )
+            new_order = np.argsort(new_posting_terms, kind="stable")
+            posting_terms = np.concatenate(
+                [renumber_terms[posting_terms], new_posting_terms[new_order]]
+            )
+            posting_rows = np.concatenate(
+                [posting_rows, np.array(new_rows, dtype=np.int32)[new_order]]
+            )
+            posting_counts = np.concatenate(
+                [posting_counts, np.array(new_counts, dtype=np.uint16)[new_order]]
+            )
+            lengths = np.concatenate([lengths, np.array(new_lengths, dtype=np.int32)])
+
+            # both runs are sorted by term then row, and the new rows come
+            # after the old ones, so a stable sort by term merges them in about
+            # linear time
+            order = np.argsort(posting_terms, kind="stable")
+            posting_terms = posting_terms[order]
+            # drop terms left without postings
+            frequencies = np.bincount(posting_terms, minlength=len(vocabulary))
+            used = frequencies > 0
+            vocabulary = [
+                term for term, keep_term in zip(vocabulary, used) if keep_term
+            ]
+            offsets = np.concatenate(([0], np.cumsum(frequencies[used])))
+
+            path = self._new_generation(directory)
+            rows.save(path)
+            (path / "terms.txt").write_text("\n".join(vocabulary))
+            np.save(path / "offsets.npy", offsets)
+            np.save(path / "posting_rows.npy", posting_rows[order])
+            np.save(path / "posting_counts.npy", posting_counts[order])
+            np.save(path / "lengths.npy", lengths)
+            self._publish(directory, path)
+            logger.debug(
+                f"Indexed {len(vocabulary)} terms in {len(rows)} chunks "
+                f"of project {project_id}"
+            )
+
+
+keyword_index = KeywordIndex()
@@ -0,0 +1,255 @@
+"""Background processing of uploaded documents.
+
+Runs in the worker next to the generation job loop. Pending documents are
+claimed from the documents table and moved PENDING -> PROCESSING ->
+COMPLETED or FAILED. Extraction, normalization and chunking run in a process
+pool, so parsing large files never holds up the event loop. The chunks are
+then embedded and added to the project's vector and keyword indexes, and
+the project's research summary is brought up to date in the background.
+
+At most `DOCUMENT_QUEUE_DEPTH` documents are claimed by a worker at a time;
+the rest stay pending for other workers. PDFs are extracted in batches of
+pages spread over the pool, and progress is written after every batch.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from uuid import UUID
+
+from src.database import DocumentsAdapter, get_db_session
+from src.types import Document
+
+from .embeddings import embed_documents
+from .processing import (
+    ProcessingTimeout,
+    UnsupportedDocument,
+    document_kind,
+    extract_pages,
+    page_count,
+    prepare_chunks,
+    run_with_deadline,
+)
+from .retrieval import index_document
+from .store import document_store
+
+logger = logging.getLogger("easeai")
+
+DOCUMENT_PROCESSES = int(os.getenv("DOCUMENT_PROCESSES", str(os.cpu_count() or 1)))
+DOCUMENT_QUEUE_DEPTH = int(
+    os.getenv("DOCUMENT_QUEUE_DEPTH", str(2 * DOCUMENT_PROCESSES))
+)
+DOCUMENT_TIMEOUT = int(os.getenv("DOCUMENT_TIMEOUT", "300"))
+DOCUMENT_MAX_ATTEMPTS = int(os.getenv("DOCUMENT_MAX_ATTEMPTS", "3"))
+DOCUMENT_POLL_INTERVAL = float(os.getenv("DOCUMENT_POLL_INTERVAL", "2"))
+DOCUMENT_CHUNK_TOKENS = int(os.getenv("DOCUMENT_CHUNK_TOKENS", "500"))
+DOCUMENT_CHUNK_OVERLAP = int(os.getenv("DOCUMENT_CHUNK_OVERLAP", "50"))
+PAGES_PER_TASK = 20
+# extraction is most of the work, chunking and storing the rest
+EXTRACTION_PROGRESS = 0.8
+# extra time for the parent to wait on a task whose own deadline has passed
+DEADLINE_GRACE = 5.0
+
+
+class DocumentPipeline:
+    def __init__(
+        self,
+        processes: int = DOCUMENT_PROCESSES,
+        queue_depth: int = DOCUMENT_QUEUE_DEPTH,
+        timeout: float = DOCUMENT_TIMEOUT,
+        summarize: Optional[Callable[[UUID], Awaitable[Any]]] = None,
+    ) -> None:
+        self.processes = processes
+        self.timeout = timeout
+        # called with a project's id after each of its documents is processed
+        self.summarize = summarize
+        self._slots = asyncio.Semaphore(queue_depth)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._summaries: Dict[UUID, asyncio.Task] = {}
+        self._summarize_again: Set[UUID] = set()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        # spawned children don't inherit the event loop or database connections
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        return self._pool
+
+    async def run(self) -> None:
+        logger.info(
+            f"Worker {os.getpid()} processing documents on {self.processes} processes"
+        )
+        self._start_pool()
+        try:
+            while True:
+                await self._slots.acquire()
+                try:
+                    document = await self._claim()
+                except Exception:
+                    logger.exception("Failed to claim a document")
+                    document = None
+                if document is None:
+                    self._slots.release()
+                    await asyncio.sleep(DOCUMENT_POLL_INTERVAL)
+                    continue
+                task = asyncio.create_task(self._process_and_release(document))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for task in [*self._tasks, *self._summaries.values()]:
+                task.cancel()
+            if self._pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _claim(self) -> Optional[Document]:
+        async with get_db_session() as session:
+            return await DocumentsAdapter(session).claim_document(
+                # a claimed document finishes or fails within the timeout
+                stale_after=timedelta(seconds=self.timeout + 60),
+                max_attempts=DOCUMENT_MAX_ATTEMPTS,
+            )
+
+    async def _process_and_release(self, document: Document) -> None:
+        try:
+            await self.process(document)
+        finally:
+            self._slots.release()
+
+    async def process(self, document: Document) -> None:
+        logger.info(f"Processing document {document.id} ({document.name})")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            chunks = await self._reuse_chunks(document)
+            if chunks is None:
+                chunks = await self._extract_chunks(document, deadline)
+            vectors = await embed_documents(chunks)
+            async with get_db_session() as session:
+                await DocumentsAdapter(session).complete_document(document.id, chunks)
+            # a failure here requeues the document, which is then indexed again
+            await index_document(document.project_id, document.id, chunks, vectors)
+        except (UnsupportedDocument, ProcessingTimeout, asyncio.TimeoutError) as e:
+            # retrying would fail the same way
+            error = str(e) or "Document processing timed out"
+            logger.warning(f"Document {document.id} failed: {error}")
+            await self._finish(document, error, retry=False)
+            return
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                logger.error("Document process pool broke, starting a new one")
+                self._start_pool()
+            logger.exception(f"Document {document.id} failed")
+            await self._finish(document, str(e), retry=True)
+            return
+        logger.info(f"Document {document.id} processed into {len(chunks)} chunks")
+        self._schedule_summary(document.project_id)
+
+    def _schedule_summary(self, project_id: UUID) -> None:
+        """Summarize the project's research once its current run, if any, ends.
+
+        Documents of one project finishing together share a run rather than
+        each reducing the project summary.
+        """
+        if self.summarize is None:
+            return
+        if project_id in self._summaries:
+            self._summarize_again.add(project_id)
+            return
+        task = asyncio.create_task(self._summarize(project_id))
+        self._summaries[project_id] = task
+        task.add_done_callback(lambda _: self._summaries.pop(project_id, None))
+
+    async def _summarize(self, project_id: UUID) -> None:
+        assert self.summarize is not None
+        while True:
+            self._summarize_again.discard(project_id)
+            try:
+                await self.summarize(project_id)
+            except Exception:
+                logger.exception(f"Failed to summarize research of {project_id}")
+            if project_id not in self._summarize_again:
+                return
+
+    async def _reuse_chunks(self, document: Document) -> Optional[List[str]]:
+        if not document.content_hash:
+            return None
+        async with get_db_session() as session:
+            return await DocumentsAdapter(session).get_processed_chunks(
+                document.content_hash
+            )
+
+    async def _extract_chunks(self, document: Document, deadline: float) -> List[str]:
+        if not document.file_path:
+            raise UnsupportedDocument("Document has no stored file")
+        kind = document_kind(document.name, document.file_type)
+        path = str(document_store.path(document.file_path))
+
+        pages_total = await self._call(deadline, page_count, path, kind)
+        batches = [
+            (start, min(start + PAGES_PER_TASK, pages_total))
+            for start in range(0, pages_total, PAGES_PER_TASK)
+        ]
+
+        async def extract(start: int, end: int) -> tuple[int, List[str]]:
+            return start, await self._call(
+                deadline, extract_pages, path, kind, start, end
+            )
+
+        pages: dict[int, List[str]] = {}
+        pending = [asyncio.ensure_future(extract(*batch)) for batch in batches]
+        try:
+            for next_batch in asyncio.as_completed(pending):
+                start, text = await next_batch
+                pages[start] = text
+                done = sum(len(batch) for batch in pages.values())
+                await self._report(
+                    document, EXTRACTION_PROGRESS * done / max(pages_total, 1)
+                )
+        finally:
+            for future in pending:
+                future.cancel()
+
+        ordered = [page for start in sorted(pages) for page in pages[start]]
+        chunks: List[str] = await self._call(
+            deadline,
+            prepare_chunks,
+            ordered,
+            DOCUMENT_CHUNK_TOKENS,
+            DOCUMENT_CHUNK_OVERLAP,
+        )
+        return chunks
+
+    async def _call(self, deadline: float, function: Callable, *args: Any) -> Any:
+        """Run `function` in the pool within what is left of the deadline.
+
+        The deadline is enforced in the child process; the parent only stops
+        waiting if the child fails to stop in time.
+        """
+        loop = asyncio.get_running_loop()
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise ProcessingTimeout("Document processing timed out")
+        assert self._pool is not None
+        future = loop.run_in_executor(
+            self._pool, run_with_deadline, remaining, function, *args
+        )
+        return await asyncio.wait_for(future, remaining + DEADLINE_GRACE)
+
+    async def _report(self, document: Document, progress: float) -> None:
+        async with get_db_session() as session:
+            await DocumentsAdapter(session).update_progress(document.id, progress)
+
+    async def _finish(self, document: Document, error: str, retry: bool) -> None:
+        async with get_db_session() as session:
+            adapter = DocumentsAdapter(session)
+            if retry and document.processing_attempts < DOCUMENT_MAX_ATTEMPTS:
+                await adapter.requeue_document(document.id, error)
+            else:
+                await adapter.fail_document(document.id, error)
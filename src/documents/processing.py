@@ -0,0 +1,176 @@
+"""Text extraction, normalization and chunking of stored documents.
+
+These functions are CPU bound and run in the document pipeline's process
+pool, so they only take and return plain values and never touch the
+database. Each call runs under a deadline enforced inside the worker process.
+"""
+
+import re
+import signal
+import unicodedata
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional
+
+import pypdf
+
+from src.utils.tokens import CHARS_PER_TOKEN
+
+PDF = "pdf"
+HTML = "html"
+TEXT = "text"
+
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".csv", ".json", ".rst"}
+HTML_EXTENSIONS = {".html", ".htm"}
+
+# paragraphs, then sentences, then words: the first separator that splits a
+# piece small enough is used
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+class UnsupportedDocument(ValueError):
+    pass
+
+
+class ProcessingTimeout(Exception):
+    pass
+
+
+def document_kind(name: str, file_type: Optional[str]) -> str:
+    """Pick the extractor for a document from its MIME type or file name."""
+    suffix = Path(name).suffix.lower()
+    file_type = (file_type or "").split(";")[0].strip().lower()
+    if file_type == "application/pdf" or suffix == ".pdf":
+        return PDF
+    if file_type in ("text/html", "application/xhtml+xml") or suffix in HTML_EXTENSIONS:
+        return HTML
+    if file_type.startswith("text/") or suffix in TEXT_EXTENSIONS:
+        return TEXT
+    raise UnsupportedDocument(f"Unsupported document type {file_type or suffix!r}")
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Raise ProcessingTimeout in the current process after `seconds`.
+
+    Uses SIGALRM, so it only works in the main thread, which is where process
+    pool workers run their tasks.
+    """
+
+    def expire(signum: int, frame: Any) -> None:
+        raise ProcessingTimeout("Document processing timed out")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 0.001))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_with_deadline(seconds: float, function: Callable, *args: Any) -> Any:
+    with deadline(seconds):
+        return function(*args)
+
+
+def page_count(path: str, kind: str) -> int:
+    if kind == PDF:
+        return len(pypdf.PdfReader(path).pages)
+    return 1
+
+
+class _TextExtractor(HTMLParser):
+    SKIPPED = {"script", "style", "head", "noscript"}
+    BLOCKS = {"p", "div", "br", "li", "tr", "section", "article", "h1", "h2", "h3"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in self.SKIPPED:
+            self.skipping += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.SKIPPED and self.skipping:
+            self.skipping -= 1
+
+    def handle_data(self, data: str) -> None:
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def extract_pages(path: str, kind: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages `start` to `end` (exclusive)."""
+    if kind == PDF:
+        reader = pypdf.PdfReader(path)
+        return [reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+    text = Path(path).read_bytes().decode("utf-8", errors="replace")
+    if kind == HTML:
+        parser = _TextExtractor()
+        parser.feed(text)
+        parser.close()
+        text = "".join(parser.parts)
+    return [text]
+
+
+def normalize_text(text: str) -> str:
+    """Clean up extracted text for chunking and retrieval."""
+    text = unicodedata.normalize("NFKC", text)
+    # words hyphenated across a line break in PDFs
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[^\S\n]+", " ", text)
+    text = re.sub(r"[\x00-\x08\x0b-\x1f\x7f]", "", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _split(text: str, size: int) -> List[str]:
+    """Split text into pieces of at most `size` characters on the coarsest
+    separator that works."""
+    if len(text) <= size:
+        return [text]
+    for separator in SEPARATORS:
+        pieces = text.split(separator)
+        if len(pieces) == 1:
+            continue
+        result = []
+        for index, piece in enumerate(pieces):
+            if index < len(pieces) - 1:
+                piece += separator
+            result.extend(_split(piece, size) if len(piece) > size else [piece])
+        return result
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def chunk_text(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """Split text into chunks of about `chunk_tokens` tokens, each starting
+    with the last `overlap_tokens` tokens of the previous one."""
+    size = chunk_tokens * CHARS_PER_TOKEN
+    overlap = overlap_tokens * CHARS_PER_TOKEN
+
+    chunks: List[str] = []
+    current = ""
+    for piece in _split(text, size):
+        if current and len(current) + len(piece) > size:
+            chunks.append(current.strip())
+            tail = current[-overlap:] if overlap else ""
+            # start the overlap on a word boundary
+            current = tail[tail.find(" ") + 1 :] if " " in tail else tail
+        current += piece
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def prepare_chunks(
+    pages: List[str], chunk_tokens: int, overlap_tokens: int
+) -> List[str]:
+    return chunk_text(normalize_text("\n\n".join(pages)), chunk_tokens, overlap_tokens)
@@ -0,0 +1,144 @@
+"""Retrieval of the document chunks relevant to a prompt.
+
+Chunks are ranked twice, by embedding similarity and by BM25 keyword score,
+and the rankings are merged with reciprocal rank fusion. Only the top
+`RETRIEVAL_TOP_K` chunks go into a prompt, so prompt size and latency stay
+bounded however much research a project has.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import DocumentsAdapter
+from src.types import DocumentChunk
+
+from .embeddings import embed_query
+from .generations import ChunkMatch
+from .index import vector_index
+from .keywords import keyword_index
+
+logger = logging.getLogger("easeai")
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+# chunks taken from each ranking before fusing them
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "50"))
+# chunks less similar than this to the query are left out of the vector
+# ranking, even if that leaves fewer than k
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0"))
+# damps the weight of the top ranks, 60 as in the original RRF paper
+RRF_K = 60
+
+Position = Tuple[UUID, int]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[ChunkMatch]], k: int = RRF_K
+) -> List[Position]:
+    """Merge rankings by the sum of 1 / (k + rank) over the rankings a chunk
+    appears in. Only ranks are used, so scores on different scales mix."""
+    scores: Dict[Position, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, 1):
+            scores[(match.document_id, match.chunk_index)] += 1 / (k + rank)
+    return sorted(scores, key=lambda position: scores[position], reverse=True)
+
+
+async def retrieve_chunks(
+    db: AsyncSession,
+    project_id: UUID,
+    query: str,
+    document_ids: Optional[Sequence[UUID]] = None,
+    k: int = RETRIEVAL_TOP_K,
+) -> List[DocumentChunk]:
+    """Find the chunks of the project's documents most relevant to `query`.
+
+    Args:
+        db: Database session
+        project_id: Project to search
+        query: Text to find relevant chunks for
+        document_ids: Only search these documents, e.g. a message's attachments
+        k: Number of chunks to return
+
+    Retrieval is best effort: a ranking that fails is left out, and if both
+    fail the prompt goes without research rather than failing the turn.
+    """
+    if not query.strip():
+        return []
+    documents_adapter = DocumentsAdapter(db)
+    searchable = await documents_adapter.get_searchable_document_ids(
+        project_id, document_ids
+    )
+    # no embedding request for projects without processed documents
+    if not searchable:
+        return []
+
+    candidates = max(k, RETRIEVAL_CANDIDATES)
+    rankings = await asyncio.gather(
+        _vector_ranking(project_id, query, candidates, searchable),
+        _keyword_ranking(project_id, query, candidates, searchable),
+    )
+    positions = reciprocal_rank_fusion(rankings)[:k]
+    chunks = await documents_adapter.get_chunks_at(project_id, positions)
+    logger.debug(
+        f"Retrieved {len(chunks)} chunks for project {project_id} from "
+        f"{len(rankings[0])} vector and {len(rankings[1])} keyword matches"
+    )
+    return chunks
+
+
+async def _vector_ranking(
+    project_id: UUID, query: str, k: int, document_ids: Sequence[UUID]
+) -> List[ChunkMatch]:
+    try:
+        vector = await embed_query(query)
+        matches = await asyncio.to_thread(
+            vector_index.search, project_id, vector, k, document_ids
+        )
+    except Exception:
+        logger.exception(f"Vector search failed for project {project_id}")
+        return []
+    return [match for match in matches if match.score > RETRIEVAL_MIN_SCORE]
+
+
+async def _keyword_ranking(
+    project_id: UUID, query: str, k: int, document_ids: Sequence[UUID]
+) -> List[ChunkMatch]:
+    try:
+        return await asyncio.to_thread(
+            keyword_index.search, project_id, query, k, document_ids
+        )
+    except Exception:
+        logger.exception(f"Keyword search failed for project {project_id}")
+        return []
+
+
+async def index_document(
+    project_id: UUID, document_id: UUID, chunks: Sequence[str], vectors: np.ndarray
+) -> None:
+    """Add a processed document's chunks to the project's indexes."""
+    await asyncio.to_thread(vector_index.add_document, project_id, document_id, vectors)
+    await asyncio.to_thread(keyword_index.add_document, project_id, document_id, chunks)
+
+
+async def unindex_document(project_id: UUID, document_id: UUID) -> None:
+    await asyncio.to_thread(vector_index.remove_document, project_id, document_id)
+    await asyncio.to_thread(keyword_index.remove_document, project_id, document_id)
+
+
+async def drop_project_indexes(project_id: UUID) -> None:
+    await asyncio.to_thread(vector_index.drop_project, project_id)
+    await asyncio.to_thread(keyword_index.drop_project, project_id)
+
+
+def format_chunks(chunks: Sequence[DocumentChunk]) -> str:
+    """Number retrieved chunks for a prompt."""
+    return "\n\n".join(
+        f"[{number}] {chunk.content}" for number, chunk in enumerate(chunks, 1)
+    )
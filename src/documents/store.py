@@ -0,0 +1,99 @@
+"""Content addressed file store for uploaded documents.
+
+Files are kept under their sha256 as `<root>/ab/cd/abcd...`, so identical
+uploads, in the same or in different projects, are stored once. Uploads are
+streamed to a temporary file in fixed size chunks and hashed on the way, so
+memory use doesn't depend on the file size, then moved into place.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple, Protocol
+
+logger = logging.getLogger("easeai")
+
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", "data/documents")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# bytes, 0 lets uploads of any size through
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(500 * 1024 * 1024)))
+
+
+class AsyncReader(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class PendingFile(NamedTuple):
+    """An upload written to a temporary file, not yet in the store."""
+
+    path: Path
+    content_hash: str
+    size: int
+
+
+class DocumentStore:
+    def __init__(self, root: str, max_size: int = 0) -> None:
+        self.root = Path(root)
+        self.max_size = max_size
+
+    def relative_path(self, content_hash: str) -> str:
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    def path(self, relative_path: str) -> Path:
+        return self.root / relative_path
+
+    async def write_temporary(self, source: AsyncReader) -> PendingFile:
+        """Stream `source` into a temporary file, hashing it on the way."""
+        temporary_dir = self.root / "tmp"
+        await asyncio.to_thread(temporary_dir.mkdir, parents=True, exist_ok=True)
+        temporary = temporary_dir / uuid.uuid4().hex
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with await asyncio.to_thread(open, temporary, "wb") as file:
+                while chunk := await source.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if self.max_size and size > self.max_size:
+                        raise UploadTooLarge(
+                            f"Uploads are limited to {self.max_size} bytes"
+                        )
+                    digest.update(chunk)
+                    await asyncio.to_thread(file.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(temporary.unlink, missing_ok=True)
+            raise
+        return PendingFile(temporary, digest.hexdigest(), size)
+
+    async def commit(self, pending: PendingFile) -> str:
+        """Move a temporary file to its content address.
+
+        A file with the same hash is simply replaced by an identical copy,
+        which also restores it if it was removed in the meantime.
+        """
+        relative_path = self.relative_path(pending.content_hash)
+        target = self.path(relative_path)
+
+        def move() -> None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(pending.path, target)
+
+        await asyncio.to_thread(move)
+        return relative_path
+
+    async def discard(self, pending: PendingFile) -> None:
+        await asyncio.to_thread(pending.path.unlink, missing_ok=True)
+
+    async def remove(self, relative_path: str) -> None:
+        logger.debug(f"Removing stored document {relative_path}")
+        await asyncio.to_thread(self.path(relative_path).unlink, missing_ok=True)
+
+
+document_store = DocumentStore(DOCUMENT_STORE_DIR, MAX_UPLOAD_SIZE)
@@ -1,9 +1,12 @@
-"""Health check endpoint."""
+"""Health check and metrics endpoints."""
 
 from datetime import datetime, timezone
 from typing import Dict
 
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.utils.metrics import registry
 
 router = APIRouter(tags=["Health"])
 
@@ -21,3 +24,16 @@ async def health_check() -> Dict[str, str]:
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "version": "1.0.0",
     }
+
+
+@router.get("/diagnostics/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Process metrics in Prometheus text exposition format.
+
+    Returns:
+        Node latency, LLM token usage, cost, retries and database timings.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
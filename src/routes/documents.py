@@ -1,11 +1,12 @@
-from typing import Annotated
+from typing import Annotated, Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import ProjectsAdapter, get_db
+from src.database import DocumentsAdapter, ProjectsAdapter, get_db
+from src.documents import UploadTooLarge, document_store, unindex_document
 
 router = APIRouter(prefix="/projects/{project_id}/documents", tags=["Documents"])
 
@@ -18,72 +19,132 @@ class DocumentResponse(BaseModel):
     file_size: int | None
     upload_date: str
     processing_status: str
+    # fraction of processing done, 1 once completed
+    progress: float
+    processing_error: str | None
+    chunk_count: int | None
+
+    @classmethod
+    def from_domain(cls, document: Any) -> "DocumentResponse":
+        return cls(
+            id=document.id,
+            name=document.name,
+            description=document.description,
+            file_type=document.file_type,
+            file_size=document.file_size,
+            upload_date=document.upload_date.isoformat(),
+            processing_status=document.processing_status,
+            progress=document.progress,
+            processing_error=document.processing_error,
+            chunk_count=document.chunk_count,
+        )
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
-def upload_document(
+async def upload_document(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
     file: UploadFile = File(...),
     name: str | None = Form(None),
     description: str | None = Form(None),
 ) -> DocumentResponse:
-    """Upload research document"""
+    """Upload research document
+
+    The file is streamed to the document store in chunks. Identical files are
+    stored once, however many projects upload them. The document is pending
+    until a worker has extracted and chunked its text.
+    """
     projects_adapter = ProjectsAdapter(db)
+    documents_adapter = DocumentsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    raise HTTPException(
-        status_code=501, detail="Document upload functionality not yet implemented"
+    try:
+        pending = await document_store.write_temporary(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        # held until commit, so a concurrent delete can't remove the file
+        # between storing it and recording the document
+        await documents_adapter.lock_content(pending.content_hash)
+        file_path = await document_store.commit(pending)
+    except BaseException:
+        await document_store.discard(pending)
+        raise
+
+    document = await documents_adapter.create_document(
+        project_id=project_id,
+        name=name or file.filename or "Untitled document",
+        description=description,
+        file_type=file.content_type,
+        file_size=pending.size,
+        file_path=file_path,
+        content_hash=pending.content_hash,
     )
+    return DocumentResponse.from_domain(document)
 
 
 @router.get("/", response_model=list[DocumentResponse])
-def list_documents(
+async def list_documents(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> list[DocumentResponse]:
     """List project documents"""
     projects_adapter = ProjectsAdapter(db)
+    documents_adapter = DocumentsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    raise HTTPException(
-        status_code=501, detail="Document listing functionality not yet implemented"
-    )
+    documents = await documents_adapter.get_documents(project_id)
+    return [DocumentResponse.from_domain(document) for document in documents]
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(
+async def get_document(
     project_id: UUID,
     document_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> DocumentResponse:
-    """Get document details"""
+    """Get document details and processing progress"""
     projects_adapter = ProjectsAdapter(db)
+    documents_adapter = DocumentsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    raise HTTPException(
-        status_code=501, detail="Document retrieval functionality not yet implemented"
-    )
+    document = await documents_adapter.get_document(project_id, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return DocumentResponse.from_domain(document)
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_document(
+async def delete_document(
     project_id: UUID,
     document_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> None:
-    """Delete document"""
+    """Delete document
+
+    The document's chunks leave the project's indexes, and the stored
+    file is removed once no document references it.
+    """
     projects_adapter = ProjectsAdapter(db)
+    documents_adapter = DocumentsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    raise HTTPException(
-        status_code=501, detail="Document deletion functionality not yet implemented"
-    )
+    document = await documents_adapter.delete_document(project_id, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    await unindex_document(project_id, document_id)
+    if document.content_hash and document.file_path:
+        await documents_adapter.lock_content(document.content_hash)
+        if not await documents_adapter.content_in_use(document.content_hash):
+            await document_store.remove(document.file_path)
@@ -0,0 +1,90 @@
+"""Idempotency-Key support for POST routes with side effects."""
+
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional, Type, TypeVar
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import IdempotencyAdapter, get_db_session
+from src.types import IdempotencyStatus
+
+logger = logging.getLogger("easeai")
+
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+# a request still processing after this long is assumed to have died
+IDEMPOTENCY_PROCESSING_TIMEOUT = int(os.getenv("IDEMPOTENCY_PROCESSING_TIMEOUT", "600"))
+IDEMPOTENCY_POLL_INTERVAL = 0.25
+IDEMPOTENCY_EVICT_EVERY = 100
+
+ResponseModel = TypeVar("ResponseModel", bound=BaseModel)
+
+_completed = 0
+
+
+def request_fingerprint(*parts: Any) -> str:
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    response: Response,
+    key: Optional[str],
+    fingerprint: str,
+    response_model: Type[ResponseModel],
+    call: Callable[[], Awaitable[ResponseModel]],
+) -> ResponseModel:
+    """Run a request at most once per Idempotency-Key.
+
+    The key is claimed in its own transaction so concurrent duplicates see it
+    straight away. A duplicate of a completed request gets the stored response
+    back, a duplicate of one still in flight waits for it. A failed request
+    releases its key so the client can retry. Reusing a key for a different
+    request is rejected with 422.
+    """
+    if key is None:
+        return await call()
+
+    while True:
+        async with get_db_session() as session:
+            record = await IdempotencyAdapter(session).claim(
+                key,
+                fingerprint,
+                ttl=timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+                processing_timeout=timedelta(seconds=IDEMPOTENCY_PROCESSING_TIMEOUT),
+            )
+        if record is None:
+            break
+        if record.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if record.status == IdempotencyStatus.COMPLETED:
+            logger.debug(f"Replaying response for idempotency key {key}")
+            response.headers["Idempotent-Replayed"] = "true"
+            return response_model.model_validate(record.response)
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    try:
+        result = await call()
+        # the response is only stored once the changes it reports are committed
+        await db.commit()
+    except BaseException:
+        async with get_db_session() as session:
+            await IdempotencyAdapter(session).release(key)
+        raise
+
+    global _completed
+    _completed += 1
+    async with get_db_session() as session:
+        adapter = IdempotencyAdapter(session)
+        await adapter.complete(key, result.model_dump(mode="json"))
+        if _completed % IDEMPOTENCY_EVICT_EVERY == 0:
+            await adapter.evict(timedelta(seconds=IDEMPOTENCY_KEY_TTL))
+    return result
@@ -0,0 +1,51 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import JobsAdapter, get_db
+from src.types import Job
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+class JobResponse(BaseModel):
+    id: UUID
+    project_id: UUID
+    kind: str
+    status: str
+    attempts: int
+    error: str | None
+    created_at: str
+    started_at: str | None
+    finished_at: str | None
+
+    @classmethod
+    def from_domain(cls, job: Job) -> "JobResponse":
+        return cls(
+            id=job.id,
+            project_id=job.project_id,
+            kind=job.kind,
+            status=job.status,
+            attempts=job.attempts,
+            error=job.error,
+            created_at=job.created_at.isoformat(),
+            started_at=job.started_at.isoformat() if job.started_at else None,
+            finished_at=job.finished_at.isoformat() if job.finished_at else None,
+        )
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID, db: Annotated[AsyncSession, Depends(get_db)]
+) -> JobResponse:
+    """Get background job status"""
+    adapter = JobsAdapter(db)
+
+    job = await adapter.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JobResponse.from_domain(job)
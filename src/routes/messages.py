@@ -1,24 +1,38 @@
+import json
 import logging
-from typing import Annotated, Any, Optional
+from contextlib import AsyncExitStack
+from typing import Annotated, Any, AsyncGenerator, Optional, cast
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import Receive, Scope, Send
 
-from src.agents import agent
+from src import agents
 from src.database import (
+    JobsAdapter,
     MessagesAdapter,
     PresentationPlanAdapter,
+    ProjectLocksAdapter,
     ProjectsAdapter,
     get_db,
+    get_db_session,
 )
-from src.types import PresentationPlan
+from src.types import PresentationPlan, Project
+from src.utils import SingleFlight
+
+from .idempotency import request_fingerprint, run_idempotent
 
 logger = logging.getLogger("easeai")
 router = APIRouter(prefix="/projects/{project_id}/messages", tags=["Research"])
 
+# identical messages sent while one is running, e.g. a double clicked send,
+# share its response instead of running the agent again
+chat_turns = SingleFlight()
+
 
 class CreateMessageRequest(BaseModel):
     message: str
@@ -30,46 +44,47 @@ class MessageResponse(BaseModel):
     presentation_plan: Optional[PresentationPlan] = None
 
 
-@router.post("/", response_model=MessageResponse, status_code=status.HTTP_200_OK)
-def send_message(
-    project_id: UUID,
-    request: CreateMessageRequest,
-    db: Annotated[Session, Depends(get_db)],
-) -> MessageResponse:
-    """Send message to AI agent"""
-    logger.debug(f"Sending message to project {project_id}: {request.message}")
-    projects_adapter = ProjectsAdapter(db)
+async def prepare_agent_run(
+    db: AsyncSession, project: Project, request: CreateMessageRequest
+) -> tuple[dict[str, Any], RunnableConfig]:
+    """Store the user message and build the agent input for a chat turn"""
     messages_adapter = MessagesAdapter(db)
     plan_adapter = PresentationPlanAdapter(db)
 
-    project = projects_adapter.get_project(project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    messages_adapter.create_message(
-        project_id=project_id,
+    await messages_adapter.create_message(
+        project_id=project.id,
         role="user",
         content=request.message,
         attachments=request.attachments,
     )
 
-    # Prepare the agent state and invoke the agent
-    messages = messages_adapter.get_messages(project_id=project_id)[0]
     initial_state = {
-        "messages": [message.AnyMessage for message in messages],
+        "messages": await agents.build_context(db, project.id),
         "project_phase": project.phase,
-        "presentation_plan": plan_adapter.get_plan(project_id),
+        "presentation_plan": await plan_adapter.get_plan(project.id),
     }
     config = RunnableConfig(
+        callbacks=[agents.metrics_handler],
         configurable={
-            "project_id": project_id,
+            "project_id": project.id,
             "db_session": db,
-        }
+            # the planner searches these documents for research
+            "attachments": request.attachments,
+        },
     )
-    output_state = agent.invoke(initial_state, config=config)
+    return initial_state, config
+
+
+async def complete_agent_run(
+    db: AsyncSession,
+    project_id: UUID,
+    initial_state: dict[str, Any],
+    output_state: dict[str, Any],
+) -> MessageResponse:
+    """Persist phase changes and build the response for a finished chat turn"""
     response = output_state["messages"][-1]
     if output_state["project_phase"] != initial_state["project_phase"]:
-        projects_adapter.update_project(
+        await ProjectsAdapter(db).update_project(
             project_id=project_id,
             phase=output_state["project_phase"],
         )
@@ -83,26 +98,185 @@ def send_message(
     )
 
 
+def server_sent_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Streams `content`, then closes `stack` however the response ends,
+    including when the client disconnects before streaming starts."""
+
+    def __init__(
+        self,
+        content: AsyncGenerator[str, None],
+        stack: AsyncExitStack,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self.content = content
+        self.stack = stack
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # a stream stopped midway rolls its session back
+            await self.content.aclose()
+            await self.stack.aclose()
+
+
+@router.post("/", response_model=MessageResponse, status_code=status.HTTP_200_OK)
+async def send_message(
+    project_id: UUID,
+    request: CreateMessageRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    response: Response,
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
+) -> MessageResponse:
+    """Send message to AI agent
+
+    Retries sent with the same `Idempotency-Key` header get the original
+    response back instead of running the agent again.
+    """
+    logger.debug(f"Sending message to project {project_id}: {request.message}")
+    return await run_idempotent(
+        db,
+        response,
+        idempotency_key,
+        request_fingerprint("messages", project_id, request.model_dump_json()),
+        MessageResponse,
+        lambda: chat_turns.do(
+            (project_id, request.model_dump_json()),
+            lambda: run_chat_turn(db, project_id, request),
+        ),
+    )
+
+
+async def run_chat_turn(
+    db: AsyncSession, project_id: UUID, request: CreateMessageRequest
+) -> MessageResponse:
+    projects_adapter = ProjectsAdapter(db)
+
+    project = await projects_adapter.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if await JobsAdapter(db).get_active_job(project_id):
+        raise HTTPException(status_code=409, detail="Slides are being generated")
+
+    # held until the request's transaction ends
+    if not await ProjectLocksAdapter(db).try_lock(project_id):
+        raise HTTPException(
+            status_code=409, detail="Another run is in progress for this project"
+        )
+
+    # Prepare the agent state and invoke the agent
+    initial_state, config = await prepare_agent_run(db, project, request)
+    async with agents.track_run(project_id, "chat") as run_metrics:
+        config["configurable"]["run_metrics"] = run_metrics
+        output_state = await agents.get_agent().ainvoke(initial_state, config=config)
+    return await complete_agent_run(db, project_id, initial_state, output_state)
+
+
+@router.post("/stream", status_code=status.HTTP_200_OK)
+async def stream_message(
+    project_id: UUID,
+    request: CreateMessageRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> StreamingResponse:
+    """Send message to AI agent and stream the response as server-sent events
+
+    Emits `response` events carrying text deltas as the planner decodes them,
+    followed by a single `done` event with the full MessageResponse.
+    """
+    logger.debug(f"Streaming message to project {project_id}: {request.message}")
+    projects_adapter = ProjectsAdapter(db)
+
+    if not await projects_adapter.project_exists(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if await JobsAdapter(db).get_active_job(project_id):
+        raise HTTPException(status_code=409, detail="Slides are being generated")
+
+    # the request scoped session may be closed before streaming finishes, so
+    # the agent run gets a session of its own, locked before the response starts
+    stack = AsyncExitStack()
+    session = await stack.enter_async_context(get_db_session())
+    if not await ProjectLocksAdapter(session).try_lock(project_id):
+        await stack.aclose()
+        raise HTTPException(
+            status_code=409, detail="Another run is in progress for this project"
+        )
+    # the project may have been deleted since it was checked
+    project = await ProjectsAdapter(session).get_project(project_id)
+    if project is None:
+        await stack.aclose()
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    async def event_stream() -> AsyncGenerator[str, None]:
+        async with stack:
+            initial_state, config = await prepare_agent_run(session, project, request)
+            output_state = initial_state
+            try:
+                async with agents.track_run(project_id, "chat") as run_metrics:
+                    config["configurable"]["run_metrics"] = run_metrics
+                    async for mode, chunk in agents.get_agent().astream(
+                        initial_state, config=config, stream_mode=["custom", "values"]
+                    ):
+                        data = cast(dict[str, Any], chunk)
+                        if mode == "custom":
+                            yield server_sent_event(
+                                "response", json.dumps({"delta": data["response"]})
+                            )
+                        else:
+                            output_state = data
+            except Exception:
+                logger.exception(f"Streaming agent run failed for {project_id}")
+                yield server_sent_event(
+                    "error", json.dumps({"detail": "Agent run failed"})
+                )
+                raise
+            result = await complete_agent_run(
+                session, project_id, initial_state, output_state
+            )
+            yield server_sent_event("done", result.model_dump_json())
+
+    return ClosingStreamingResponse(
+        event_stream(), stack, media_type="text/event-stream"
+    )
+
+
 @router.get("/", response_model=dict)
-def get_conversation_history(
+async def get_conversation_history(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
     limit: int = 50,
-    offset: int = 0,
+    after: int | None = None,
+    before: int | None = None,
+    include_total: bool = False,
 ) -> dict[str, Any]:
-    """Get conversation history"""
+    """Get conversation history
+
+    Messages are paged by their `sequence`: pass the last sequence of a page
+    as `after` to get the next page, or the first one as `before` to get the
+    previous one.
+    """
     projects_adapter = ProjectsAdapter(db)
     messages_adapter = MessagesAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    messages, total = messages_adapter.get_messages(
-        project_id=project_id, limit=limit, offset=offset
+    messages, has_more, total = await messages_adapter.get_messages(
+        project_id=project_id,
+        limit=limit,
+        after=after,
+        before=before,
+        include_total=include_total,
     )
 
     return {
         "messages": messages,
+        "has_more": has_more,
         "total": total,
-        "has_more": (offset + limit) < total,
     }
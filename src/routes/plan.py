@@ -1,22 +1,28 @@
 from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from langchain_core.runnables import RunnableConfig
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.agents import agent
 from src.database import (
-    MessagesAdapter,
+    JobsAdapter,
     PresentationPlanAdapter,
+    ProjectLocksAdapter,
     ProjectsAdapter,
     get_db,
 )
 from src.types import ProjectPhase
+from src.utils import SingleFlight
+
+from .idempotency import request_fingerprint, run_idempotent
+from .jobs import JobResponse
 
 router = APIRouter(prefix="/projects/{project_id}/plan", tags=["Plan"])
 
+# concurrent approvals of the same project share the job the first one queued
+approvals = SingleFlight()
+
 
 class PresentationPlanResponse(BaseModel):
     id: UUID
@@ -54,18 +60,18 @@ class PresentationPlanUpdate(BaseModel):
 
 
 @router.get("/", response_model=PresentationPlanResponse)
-def get_presentation_plan(
+async def get_presentation_plan(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> PresentationPlanResponse:
     """Get presentation plan"""
     projects_adapter = ProjectsAdapter(db)
     plan_adapter = PresentationPlanAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    plan = plan_adapter.get_plan(project_id)
+    plan = await plan_adapter.get_plan(project_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not yet generated")
 
@@ -73,19 +79,19 @@ def get_presentation_plan(
 
 
 @router.patch("/", response_model=PresentationPlanResponse)
-def update_presentation_plan(
+async def update_presentation_plan(
     project_id: UUID,
     request: PresentationPlanUpdate,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> PresentationPlanResponse:
     """Update presentation plan"""
     projects_adapter = ProjectsAdapter(db)
     plan_adapter = PresentationPlanAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    plan = plan_adapter.update_plan(
+    plan = await plan_adapter.update_plan(
         project_id=project_id,
         title=request.title,
         objective=request.objective,
@@ -101,44 +107,62 @@ def update_presentation_plan(
     return PresentationPlanResponse.from_domain(plan)
 
 
-@router.post("/approve", status_code=201)
-def approve_plan(
+@router.post(
+    "/approve", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def approve_plan(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
-) -> str:
-    """Approve plan and move to content production"""
+    db: Annotated[AsyncSession, Depends(get_db)],
+    response: Response,
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
+) -> JobResponse:
+    """Approve plan and queue content generation
+
+    Retries sent with the same `Idempotency-Key` header get the original job
+    back.
+    """
+    return await run_idempotent(
+        db,
+        response,
+        idempotency_key,
+        request_fingerprint("approve", project_id),
+        JobResponse,
+        lambda: approvals.do(project_id, lambda: queue_generation(db, project_id)),
+    )
+
+
+async def queue_generation(db: AsyncSession, project_id: UUID) -> JobResponse:
     projects_adapter = ProjectsAdapter(db)
     plan_adapter = PresentationPlanAdapter(db)
+    jobs_adapter = JobsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    if not plan_adapter.plan_exists(project_id):
+    if not await plan_adapter.plan_exists(project_id):
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    # Approve plan
-    projects_adapter.update_project(
-        project_id=project_id,
-        phase=ProjectPhase.GENERATION,
-    )
+    # Generation is already queued or running for this project
+    active_job = await jobs_adapter.get_active_job(project_id)
+    if active_job:
+        return JobResponse.from_domain(active_job)
 
-    messages_adapter = MessagesAdapter(db)
-    messages = messages_adapter.get_messages(project_id=project_id)[0]
-    initial_state = {
-        "messages": [message.AnyMessage for message in messages],
-        "project_phase": ProjectPhase.GENERATION,
-        "presentation_plan": plan_adapter.get_plan(project_id),
-    }
-    config = RunnableConfig(
-        configurable={
-            "project_id": project_id,
-            "db_session": db,
-        }
-    )
-    agent.invoke(initial_state, config=config)
-    projects_adapter.update_project(
+    # a chat turn or regeneration still running would race the generation
+    if not await ProjectLocksAdapter(db).try_lock(project_id):
+        raise HTTPException(
+            status_code=409, detail="Another run is in progress for this project"
+        )
+
+    # another process may have queued a job before the lock was released
+    active_job = await jobs_adapter.get_active_job(project_id)
+    if active_job:
+        return JobResponse.from_domain(active_job)
+
+    # Approve plan and hand generation over to the workers
+    await projects_adapter.update_project(
         project_id=project_id,
-        phase=ProjectPhase.REVIEW,
+        phase=ProjectPhase.GENERATION,
     )
+    job = await jobs_adapter.create_job(project_id)
 
-    return "Plan approved and content generation started completed"
+    return JobResponse.from_domain(job)
@@ -1,11 +1,14 @@
-from typing import Annotated, Any
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import ProjectsAdapter, get_db
+from src.database import MessagesAdapter, ProjectsAdapter, SlidesAdapter, get_db
+from src.documents import drop_project_indexes
+from src.types import Message, PresentationPlan, Slide
+from src.utils import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -53,19 +56,39 @@ class ProjectSummary(BaseModel):
         )
 
 
+SnapshotField = Literal[
+    "messages",
+    "plan",
+    "slides",
+    "slides.content",
+    "slides.speaker_notes",
+    "slides.delivery_tutorial",
+]
+DEFAULT_SNAPSHOT_FIELDS: list[SnapshotField] = ["messages", "plan", "slides"]
+SLIDE_SUMMARY_FIELDS = ["title", "description", "time_spent_on_slide"]
+
+
+class ProjectSnapshotResponse(BaseModel):
+    project: ProjectResponse
+    messages: list[Message] | None = None
+    has_more_messages: bool | None = None
+    plan: PresentationPlan | None = None
+    slides: list[Slide] | None = None
+
+
 class UpdateProjectRequest(BaseModel):
     title: str | None = None
     description: str | None = None
 
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-def create_project(
-    request: CreateProjectRequest, db: Annotated[Session, Depends(get_db)]
+async def create_project(
+    request: CreateProjectRequest, db: Annotated[AsyncSession, Depends(get_db)]
 ) -> ProjectResponse:
     """Create new presentation project"""
     adapter = ProjectsAdapter(db)
 
-    project = adapter.create_project(
+    project = await adapter.create_project(
         title=request.title, description=request.description
     )
 
@@ -73,46 +96,124 @@ def create_project(
 
 
 @router.get("/", response_model=dict)
-def get_projects(
-    db: Annotated[Session, Depends(get_db)],
+async def get_projects(
+    db: Annotated[AsyncSession, Depends(get_db)],
     limit: int = 20,
-    offset: int = 0,
+    after: str | None = None,
+    before: str | None = None,
+    include_total: bool = False,
 ) -> dict[str, Any]:
-    """List user's projects with pagination"""
+    """List user's projects with cursor pagination
+
+    Pass `next_cursor` as `after` to get the next page, or `prev_cursor` as
+    `before` to get the previous one.
+    """
     adapter = ProjectsAdapter(db)
 
-    projects, total = adapter.get_projects(limit=limit, offset=offset)
+    try:
+        after_position = decode_cursor(after) if after else None
+        before_position = decode_cursor(before) if before else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    projects, has_more, total = await adapter.get_projects(
+        limit=limit,
+        after=after_position,
+        before=before_position,
+        include_total=include_total,
+    )
 
     return {
         "projects": [ProjectSummary.from_domain(project) for project in projects],
+        "has_more": has_more,
+        "next_cursor": (
+            encode_cursor(projects[-1].updated_at, projects[-1].id)
+            if projects
+            else None
+        ),
+        "prev_cursor": (
+            encode_cursor(projects[0].updated_at, projects[0].id) if projects else None
+        ),
         "total": total,
     }
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
-    project_id: UUID, db: Annotated[Session, Depends(get_db)]
+async def get_project(
+    project_id: UUID, db: Annotated[AsyncSession, Depends(get_db)]
 ) -> ProjectResponse:
     """Get project details"""
     adapter = ProjectsAdapter(db)
 
-    project = adapter.get_project(project_id)
+    project = await adapter.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     return ProjectResponse.from_domain(project)
 
 
+@router.get("/{project_id}/snapshot", response_model=ProjectSnapshotResponse)
+async def get_project_snapshot(
+    project_id: UUID,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    fields: Annotated[list[SnapshotField] | None, Query()] = None,
+    messages_limit: int = 50,
+) -> ProjectSnapshotResponse:
+    """Get a project with its latest messages, plan and slides
+
+    Everything needed to open a project, read in one transaction. `fields`
+    picks the sections to include, by default the messages, the plan and the
+    slides without their generated text. Add `slides.content`,
+    `slides.speaker_notes` or `slides.delivery_tutorial` to include those.
+    Older messages are paged with `GET /messages/?before=`.
+    """
+    selected = set(fields or DEFAULT_SNAPSHOT_FIELDS)
+    slide_fields = [
+        field.removeprefix("slides.")
+        for field in sorted(selected)
+        if field.startswith("slides.")
+    ]
+
+    # the sections are read from one snapshot so they agree with each other
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    found = await ProjectsAdapter(db).get_project_with_plan(project_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project, plan = found
+    snapshot = ProjectSnapshotResponse(project=ProjectResponse.from_domain(project))
+
+    if "messages" in selected:
+        # the page ending at the latest message
+        messages, has_more, _ = await MessagesAdapter(db).get_messages(
+            project_id=project_id,
+            limit=messages_limit,
+            before=project.message_sequence + 1,
+        )
+        snapshot.messages = messages
+        snapshot.has_more_messages = has_more
+
+    if "plan" in selected:
+        snapshot.plan = plan
+
+    if "slides" in selected or slide_fields:
+        snapshot.slides = await SlidesAdapter(db).get_slides(
+            project_id, [*SLIDE_SUMMARY_FIELDS, *slide_fields]
+        )
+
+    return snapshot
+
+
 @router.patch("/{project_id}", response_model=ProjectResponse)
-def update_project(
+async def update_project(
     project_id: UUID,
     request: UpdateProjectRequest,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> ProjectResponse:
     """Update project metadata"""
     adapter = ProjectsAdapter(db)
 
-    project = adapter.update_project(
+    project = await adapter.update_project(
         project_id=project_id,
         title=request.title,
         description=request.description,
@@ -125,10 +226,14 @@ def update_project(
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(project_id: UUID, db: Annotated[Session, Depends(get_db)]) -> None:
+async def delete_project(
+    project_id: UUID, db: Annotated[AsyncSession, Depends(get_db)]
+) -> None:
     """Delete project"""
     adapter = ProjectsAdapter(db)
 
-    success = adapter.delete_project(project_id)
+    success = await adapter.delete_project(project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")
+
+    await drop_project_indexes(project_id)
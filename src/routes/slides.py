@@ -1,15 +1,37 @@
-from typing import Annotated
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
-from src.database import ProjectsAdapter, SlidesAdapter, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import agents
+from src.database import (
+    JobsAdapter,
+    ProjectLocksAdapter,
+    ProjectsAdapter,
+    SlidesAdapter,
+    get_db,
+)
 from src.types.slides import Slide
+from src.utils import SingleFlight
 
 router = APIRouter(prefix="/projects/{project_id}/slides", tags=["Content"])
 
+# identical regenerations requested while one is running share its slides
+regenerations = SingleFlight()
+
+
+SlideField = Literal[
+    "title",
+    "description",
+    "time_spent_on_slide",
+    "content",
+    "speaker_notes",
+    "delivery_tutorial",
+]
+
 
 class SlidesResponse(BaseModel):
     slides: list[Slide]
@@ -31,43 +53,73 @@ class SlideUpdate(BaseModel):
 
 class RegenerateRequest(BaseModel):
     instructions: str | None = None
+    # restrict the instructions to one slide and/or some of its fields
+    slide_number: int | None = None
+    fields: list[Literal["content", "speaker_notes", "delivery_tutorial"]] | None = None
 
 
 @router.get("/", response_model=SlidesResponse)
-def get_slides(
+async def get_slides(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    fields: Annotated[list[SlideField] | None, Query()] = None,
 ) -> SlidesResponse:
-    """Get presentation slides"""
+    """Get presentation slides
+
+    `fields` picks the slide fields to return, e.g. `?fields=title&fields=
+    time_spent_on_slide` for an outline without the slide content. The slide
+    number is always included and by default every field is.
+    """
     projects_adapter = ProjectsAdapter(db)
     slides_adapter = SlidesAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    slides = slides_adapter.get_slides(project_id)
+    slides = await slides_adapter.get_slides(project_id, fields)
     if not slides:
         raise HTTPException(status_code=404, detail="Slides not yet generated")
 
     return SlidesResponse.from_domain(slides)
 
 
+@router.get("/{slide_number}", response_model=Slide)
+async def get_slide(
+    project_id: UUID,
+    slide_number: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    fields: Annotated[list[SlideField] | None, Query()] = None,
+) -> Slide:
+    """Get a specific slide"""
+    projects_adapter = ProjectsAdapter(db)
+    slides_adapter = SlidesAdapter(db)
+
+    if not await projects_adapter.project_exists(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    slide = await slides_adapter.get_slide(project_id, slide_number, fields)
+    if not slide:
+        raise HTTPException(status_code=404, detail="Slide not found")
+
+    return slide
+
+
 @router.patch("/{slide_number}", response_model=Slide)
-def update_slide(
+async def update_slide(
     project_id: UUID,
     slide_number: int,
     request: SlideUpdate,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> Slide:
     """Update a specific slide"""
     projects_adapter = ProjectsAdapter(db)
     slides_adapter = SlidesAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Get existing slide
-    existing_slide = slides_adapter.get_slide(project_id, slide_number)
+    existing_slide = await slides_adapter.get_slide(project_id, slide_number)
     if not existing_slide:
         raise HTTPException(status_code=404, detail="Slide not found")
 
@@ -80,9 +132,11 @@ def update_slide(
         content=request.content or existing_slide.content,
         speaker_notes=request.speaker_notes or existing_slide.speaker_notes,
         delivery_tutorial=request.delivery_tutorial or existing_slide.delivery_tutorial,
+        fingerprints=existing_slide.fingerprints,
+        instructions=existing_slide.instructions,
     )
 
-    result = slides_adapter.update_slide(project_id, slide_number, updated_slide)
+    result = await slides_adapter.update_slide(project_id, slide_number, updated_slide)
     if not result:
         raise HTTPException(status_code=404, detail="Slide not found")
 
@@ -90,22 +144,58 @@ def update_slide(
 
 
 @router.post("/regenerate", response_model=SlidesResponse)
-def regenerate_slides(
+async def regenerate_slides(
     project_id: UUID,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
     request: RegenerateRequest | None = None,
 ) -> SlidesResponse:
-    """Regenerate slides based on plan changes"""
+    """Regenerate the slides affected by plan changes or new instructions"""
+    request = request or RegenerateRequest()
+    return await regenerations.do(
+        (project_id, request.model_dump_json()),
+        lambda: run_regeneration(db, project_id, request),
+    )
+
+
+async def run_regeneration(
+    db: AsyncSession, project_id: UUID, request: RegenerateRequest
+) -> SlidesResponse:
     projects_adapter = ProjectsAdapter(db)
     slides_adapter = SlidesAdapter(db)
+    jobs_adapter = JobsAdapter(db)
 
-    if not projects_adapter.project_exists(project_id):
+    if not await projects_adapter.project_exists(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    slides = slides_adapter.get_slides(project_id)
-    if not slides:
+    if not await slides_adapter.slides_exist(project_id):
         raise HTTPException(status_code=404, detail="Slides not found")
 
-    raise HTTPException(
-        status_code=501, detail="Slides regeneration functionality not yet implemented"
+    if request.slide_number is not None and not await slides_adapter.slide_exists(
+        project_id, request.slide_number
+    ):
+        raise HTTPException(status_code=404, detail="Slide not found")
+
+    if await jobs_adapter.get_active_job(project_id):
+        raise HTTPException(status_code=409, detail="Slides are being generated")
+
+    if not await ProjectLocksAdapter(db).try_lock(project_id):
+        raise HTTPException(
+            status_code=409, detail="Another run is in progress for this project"
+        )
+
+    config = RunnableConfig(
+        callbacks=[agents.metrics_handler],
+        configurable={"project_id": project_id, "db_session": db},
     )
+    async with agents.track_run(project_id, "regeneration") as run_metrics:
+        config["configurable"]["run_metrics"] = run_metrics
+        slides = await agents.regenerate_stale_slides(
+            db,
+            project_id,
+            config,
+            instructions=request.instructions,
+            slide_number=request.slide_number,
+            fields=request.fields,
+        )
+
+    return SlidesResponse.from_domain(slides)
@@ -1,11 +1,20 @@
-from .document import Document, ProcessingStatus
-from .message import Message, MessageType
+from .document import Document, DocumentChunk, ProcessingStatus
+from .idempotency import IdempotencyRecord, IdempotencyStatus
+from .job import Job, JobKind, JobStatus
+from .message import ConversationSummary, Message, MessageType
 from .plan import PresentationPlan, update_plan
 from .project import Project, ProjectPhase
 from .slides import Slide, Slides, update_slides
 
 __all__ = [
+    "ConversationSummary",
     "Document",
+    "DocumentChunk",
+    "IdempotencyRecord",
+    "IdempotencyStatus",
+    "Job",
+    "JobKind",
+    "JobStatus",
     "Message",
     "update_plan",
     "MessageType",
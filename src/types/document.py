@@ -23,3 +23,21 @@ class Document(BaseModel):
     upload_date: datetime
     processing_status: ProcessingStatus
     file_path: Optional[str]
+    # sha256 of the file, identical files share one stored copy
+    content_hash: Optional[str] = None
+    # fraction of the processing done, 1 once completed
+    progress: float = 0.0
+    processing_error: Optional[str] = None
+    processing_attempts: int = 0
+    chunk_count: Optional[int] = None
+    # merged from the chunk summaries once the document is summarized
+    summary: Optional[str] = None
+
+
+class DocumentChunk(BaseModel):
+    document_id: UUID
+    project_id: UUID
+    chunk_index: int
+    content: str
+    token_count: int
+    summary: Optional[str] = None
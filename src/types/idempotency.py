@@ -0,0 +1,19 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class IdempotencyStatus(str, Enum):
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+
+
+class IdempotencyRecord(BaseModel):
+    key: str
+    fingerprint: str
+    status: IdempotencyStatus
+    response: Optional[Any]
+    created_at: datetime
+    completed_at: Optional[datetime]
@@ -0,0 +1,29 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobKind(str, Enum):
+    GENERATION = "generation"
+
+
+class Job(BaseModel):
+    id: UUID
+    project_id: UUID
+    kind: JobKind
+    status: JobStatus
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -18,7 +18,9 @@ class Message(BaseModel):
     type: MessageType
     content: str
     timestamp: datetime
+    sequence: Optional[int] = None
     attachments: Optional[List]
+    token_count: Optional[int] = None
 
     @property
     def AnyMessage(self) -> AnyMessage:
@@ -28,3 +30,12 @@ class Message(BaseModel):
             return AIMessage(content=self.content)
         else:
             raise ValueError(f"Unknown role: {self.type}")
+
+
+class ConversationSummary(BaseModel):
+    project_id: UUID
+    summary: str
+    # sequence of the last message folded into the summary
+    summarized_sequence: int
+    token_count: int
+    updated_at: datetime
@@ -21,3 +21,7 @@ class Project(BaseModel):
     created_at: datetime
     updated_at: datetime
     project_metadata: Optional[Dict]
+    # sequence number of the latest message
+    message_sequence: int = 0
+    # merged from the summaries of the project's documents
+    research_summary: Optional[str] = None
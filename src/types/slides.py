@@ -13,6 +13,10 @@ class Slide(BaseModel):
     content: Optional[str] = None
     speaker_notes: Optional[str] = None
     delivery_tutorial: Optional[str] = None
+    # per field: hash of the inputs the field was generated from
+    fingerprints: Optional[Dict[str, str]] = None
+    # per field: standing user instructions for regenerating the field
+    instructions: Optional[Dict[str, str]] = None
 
     def __str__(self) -> str:
         parts = [f"Slide {self.slide_number or 'N/A'}"]
@@ -31,6 +35,8 @@ class Slide(BaseModel):
             parts.append("Speaker Notes: [Generated]")
         if self.delivery_tutorial:
             parts.append("Delivery Tutorial: [Generated]")
+        for instructions in (self.instructions or {}).values():
+            parts.append(f"Instructions: {instructions}")
         return " | ".join(parts)
 
 
@@ -69,6 +75,8 @@ def update_slides(
                 delivery_tutorial=(
                     slide_update.delivery_tutorial or existing_slide.delivery_tutorial
                 ),
+                fingerprints=(slide_update.fingerprints or existing_slide.fingerprints),
+                instructions=(slide_update.instructions or existing_slide.instructions),
             )
             updated[slide_num] = updated_slide
         else:
@@ -1,3 +1,12 @@
 from .logger import setup_logger
+from .pagination import decode_cursor, encode_cursor
+from .single_flight import SingleFlight
+from .tokens import estimate_tokens
 
-__all__ = ["setup_logger"]
+__all__ = [
+    "SingleFlight",
+    "decode_cursor",
+    "encode_cursor",
+    "estimate_tokens",
+    "setup_logger",
+]
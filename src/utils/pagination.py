@@ -0,0 +1,20 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+def encode_cursor(updated_at: datetime, item_id: UUID) -> str:
+    """Encode a keyset position as an opaque URL safe cursor."""
+    raw = f"{updated_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor made by `encode_cursor`. Raises ValueError if invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, item_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(updated_at), UUID(item_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
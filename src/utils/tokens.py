@@ -0,0 +1,13 @@
+"""Cheap token estimates for prompt budgeting."""
+
+# Gemini averages roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text.
+
+    Args:
+        text: Text to measure
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
@@ -0,0 +1,246 @@
+"""Background worker that executes queued generation jobs and processes
+uploaded documents.
+
+Run with `python -m src.worker`. Any number of worker processes can poll the
+same jobs and documents tables; each job and document is claimed by exactly
+one of them.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+from datetime import timedelta
+
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .agents import (
+    build_context,
+    get_checkpointer,
+    get_generation_agent,
+    metrics_handler,
+    summarize_research,
+    track_run,
+)
+from .database import (
+    JobsAdapter,
+    PresentationPlanAdapter,
+    ProjectLocksAdapter,
+    ProjectsAdapter,
+    get_db_session,
+    get_engine,
+)
+from .documents import DocumentPipeline
+from .documents.pipeline import DOCUMENT_PROCESSES
+from .types import Job, JobStatus, ProjectPhase
+from .utils.logger import setup_logger
+
+logger = logging.getLogger("easeai")
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "1800"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+class JobSuperseded(Exception):
+    """Another worker has claimed the job since this one did."""
+
+
+async def run_generation(db: AsyncSession, job: Job) -> None:
+    """Run the generation graph for an approved plan and move to review.
+
+    Each job runs on its own checkpointed thread, so a retried job picks up
+    from the last step that completed instead of regenerating everything.
+    """
+    projects_adapter = ProjectsAdapter(db)
+    plan_adapter = PresentationPlanAdapter(db)
+
+    # chat turns and regenerations get a 409 until this job's transaction ends
+    await ProjectLocksAdapter(db).lock(job.project_id)
+    # a job that overran JOB_TIMEOUT may have been claimed again while this
+    # worker waited for the lock; only its latest claim runs it
+    current = await JobsAdapter(db).get_job(job.id)
+    if (
+        current is None
+        or current.status != JobStatus.RUNNING
+        or current.attempts != job.attempts
+    ):
+        raise JobSuperseded(f"Job {job.id} was claimed again or finished")
+
+    generation_agent = await get_generation_agent()
+
+    config = RunnableConfig(
+        callbacks=[metrics_handler],
+        configurable={
+            "thread_id": str(job.id),
+            "project_id": job.project_id,
+            "db_session": db,
+        },
+    )
+    snapshot = await generation_agent.aget_state(config)
+    if snapshot.next:
+        logger.info(f"Resuming job {job.id} at {', '.join(snapshot.next)}")
+        initial_state = None
+    else:
+        initial_state = {
+            "messages": await build_context(db, job.project_id),
+            "project_phase": ProjectPhase.GENERATION,
+            "presentation_plan": await plan_adapter.get_plan(job.project_id),
+        }
+
+    async with track_run(job.project_id, "generation") as run_metrics:
+        config["configurable"]["run_metrics"] = run_metrics
+        await generation_agent.ainvoke(initial_state, config=config)
+    await projects_adapter.update_project(
+        project_id=job.project_id,
+        phase=ProjectPhase.REVIEW,
+    )
+
+
+async def run_job(job: Job) -> None:
+    logger.info(f"Running job {job.id} for project {job.project_id}")
+    try:
+        async with get_db_session() as session:
+            await run_generation(session, job)
+            await JobsAdapter(session).complete_job(job.id)
+    except JobSuperseded as e:
+        logger.info(f"Skipping job: {e}")
+        return
+    except Exception as e:
+        if job.attempts < JOB_MAX_ATTEMPTS:
+            logger.exception(f"Job {job.id} failed, queued for retry")
+            async with get_db_session() as session:
+                await JobsAdapter(session).requeue_job(job.id, str(e))
+            return
+
+        logger.exception(f"Job {job.id} failed")
+        async with get_db_session() as session:
+            await JobsAdapter(session).fail_job(job.id, str(e))
+            # return the project to preparation so the plan can be approved again
+            await ProjectsAdapter(session).update_project(
+                project_id=job.project_id,
+                phase=ProjectPhase.PREPARATION,
+            )
+        checkpointer = await get_checkpointer()
+        await checkpointer.adelete_thread(str(job.id))
+        return
+
+    checkpointer = await get_checkpointer()
+    await checkpointer.adelete_thread(str(job.id))
+    logger.info(f"Job {job.id} completed")
+
+
+async def fail_abandoned_jobs() -> None:
+    """Fail jobs whose worker stopped during their last attempt.
+
+    They are never claimed again, so without this they would stay running
+    and keep their project in generation.
+    """
+    async with get_db_session() as session:
+        jobs = await JobsAdapter(session).get_abandoned_jobs(
+            stale_after=timedelta(seconds=JOB_TIMEOUT),
+            max_attempts=JOB_MAX_ATTEMPTS,
+        )
+    for job in jobs:
+        async with get_db_session() as session:
+            # a worker still running the job holds the project lock
+            if not await ProjectLocksAdapter(session).try_lock(job.project_id):
+                continue
+            if not await JobsAdapter(session).fail_abandoned_job(
+                job, "Worker stopped before the job finished"
+            ):
+                continue
+            await ProjectsAdapter(session).update_project(
+                project_id=job.project_id,
+                phase=ProjectPhase.PREPARATION,
+            )
+        logger.warning(f"Job {job.id} failed, its worker stopped")
+        checkpointer = await get_checkpointer()
+        await checkpointer.adelete_thread(str(job.id))
+
+
+async def process_next_job() -> bool:
+    """Claim and run a single job. Returns False if the queue was empty."""
+    # the claim is committed straight away so the row lock is only held briefly
+    async with get_db_session() as session:
+        job = await JobsAdapter(session).claim_job(
+            stale_after=timedelta(seconds=JOB_TIMEOUT),
+            max_attempts=JOB_MAX_ATTEMPTS,
+        )
+    if job is None:
+        return False
+    await run_job(job)
+    return True
+
+
+async def poll_jobs() -> None:
+    logger.info(f"Worker {os.getpid()} polling for jobs")
+    while True:
+        try:
+            if not await process_next_job():
+                await fail_abandoned_jobs()
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+        except Exception:
+            logger.exception("Worker failed to process job queue")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def run_worker_loops(document_processes: int) -> None:
+    loops = [poll_jobs()]
+    if document_processes > 0:
+        loops.append(
+            DocumentPipeline(
+                processes=document_processes, summarize=summarize_research
+            ).run()
+        )
+    await asyncio.gather(*loops)
+
+
+def run_worker(document_processes: int = DOCUMENT_PROCESSES) -> None:
+    # connections inherited from a parent process must not be reused
+    get_engine().sync_engine.dispose(close=False)
+    try:
+        asyncio.run(run_worker_loops(document_processes))
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EaseAI generation worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes to run",
+    )
+    parser.add_argument(
+        "--document-processes",
+        type=int,
+        default=DOCUMENT_PROCESSES,
+        help="Document processing pool size per worker process, 0 to disable",
+    )
+    args = parser.parse_args()
+
+    setup_logger("easeai", logging.INFO)
+    if args.processes <= 1:
+        run_worker(args.document_processes)
+        return
+
+    # not daemonic: daemonic processes can't start the document process pool
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.document_processes,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Shutting down workers")
+
+
+if __name__ == "__main__":
+    main()